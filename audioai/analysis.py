@@ -0,0 +1,358 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+
+from audioai.bleed import BleedEstimator
+
+# Speech detection for all microphones in one worker thread. The PortAudio
+# callbacks only copy PCM into each mic's AudioRing; every hop this worker
+# drains the rings, resamples the new hops of all mics onto one
+# (mics x hops x samples) array and computes volume, the speech counter, the
+# silence hangover and which speaker dominates for all of them at once. The
+# result is published as one immutable AudioSnapshot, so readers always see
+# the state of every mic from the same round.
+#
+# Mics in "spectral" VAD mode decide per hop from the hop's spectrum instead of
+# its raw level: speech-band (300-3400 Hz) share of the energy, spectral
+# flatness (tonal/harmonic vs. noise-like), the band energy's ratio to an
+# adaptive per-mic noise floor and periodicity (autocorrelation at a voice
+# pitch lag, 80-400 Hz). HVAC rumble fails the band share, fans and hiss fail
+# flatness and the noise floor, isolated keyboard clicks fail the
+# speech_frames_required run length, and chords (music) fail periodicity as
+# they hold several pitches at once. A single melodic instrument or a singer is
+# periodic like a voice and still counts as speech. All of it is relative, so
+# it means the same at any device sample rate and input gain.
+#
+# With bleed estimation on, the 16 kHz hops also feed a BleedEstimator; each
+# mic's "own" volume (its volume minus what other speakers leak into it) is
+# what dominance compares, so a mic carrying only bleed never dominates. It is
+# off by default, as the leak removed is also what kept a quieter speaker above
+# dominance_ratio while a louder one talks near their mic: in bench_vad.py's
+# two-person room B dominates 80% of B's speech while both talk, against 97%
+# without it (where A's speech alone is credited to B's mic almost always).
+#
+# Hops are timed by when their audio was captured (the rings' ADC-based
+# stamps, see audioai/sources.py), not when the worker got to them. Every
+# snapshot records the capture time it covers, and the last couple of seconds
+# of snapshots are kept, so snapshot_at(t) returns the audio state as of a
+# video frame captured at t rather than whatever was analysed last.
+
+ANALYSIS_RATE = 16000 # Common sample rate hops are resampled to
+SPEECH_BAND = (300.0, 3400.0)
+FLATNESS_BAND = (100.0, 4000.0)
+PITCH_RANGE = (80.0, 400.0) # Voice f0, the periodicity check's lags
+
+
+class AudioSnapshot:
+    def __init__(self, speaking, volume, dominant, timestamp, own_volume=None, bleed=None,
+                 captured=None, lag=None, onset=None):
+        self.speaking = speaking    # {key: bool} speech (with hangover) per mic
+        self.volume = volume        # {key: float} L2 norm of the mic's newest hop
+        self.dominant = dominant    # {key: bool} speaking, enabled and not drowned out by a louder mic
+        self.timestamp = timestamp  # time.monotonic() of the round
+        self.own_volume = own_volume if own_volume is not None else volume # {key: float} volume without bleed
+        self.bleed = bleed or {}    # {(src_key, dst_key): (gain, delay s)} estimated leak paths
+        self.captured = captured or {} # {key: capture time of the mic's newest analysed sample}
+        self.lag = lag or {}        # {key: s} how far the mic's analysed audio trails the round
+        self.onset = onset or {}    # {key: capture time the current speech run started} for speaking mics
+        # Instant up to which every mic's audio is reflected (-inf before any audio)
+        self.capture_time = min(self.captured.values()) if self.captured else -np.inf
+
+
+# {(n, out_len): (lo, hi, frac)} interpolation weights of _resample_rows
+_resample_weights = {}
+
+
+def _resample_rows(rows, out_len):
+    """Linear resampling of each row of a (hops, n) block to out_len samples"""
+    n = rows.shape[1]
+    if n == out_len:
+        return rows
+    weights = _resample_weights.get((n, out_len))
+    if weights is None:
+        pos = np.linspace(0, n - 1, out_len)
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, n - 1)
+        weights = (lo, hi, (pos - lo).astype(np.float32))
+        _resample_weights[(n, out_len)] = weights
+    lo, hi, frac = weights
+    return rows[:, lo] * (1 - frac) + rows[:, hi] * frac
+
+
+class AudioAnalyzer:
+    def __init__(
+        self,
+        hop_duration=0.03,     # Seconds of audio per analysis step (one VAD "chunk")
+        dominance_ratio=0.7,   # Speakers quieter than this share of the loudest one count as bleed
+        max_hops=8,            # Hops processed per round; older backlog is dropped
+        snr_threshold=4.0,     # Spectral: speech-band energy over the noise floor (~6 dB)
+        band_ratio_min=0.5,    # Spectral: minimum share of energy in the speech band
+        flatness_max=0.3,      # Spectral: maximum spectral flatness (white noise ~0.5+)
+        periodicity_min=0.75,  # Spectral: minimum normalized autocorrelation at a voice pitch lag
+        min_level=0.001,       # Spectral: RMS below this is silence whatever the spectrum
+        floor_rise=1.01,       # Spectral: per-hop noise floor growth in non-speech hops (~1.4 dB/s)
+        floor_fall=0.8,        # Spectral: weight of the old floor when the band energy is below it
+        bleed=False,           # Estimate cross-mic bleed (audioai/bleed.py) for dominance (see above)
+        bleed_every=2,         # Hops between bleed estimates
+        min_own=0.3,           # Share of a mic's energy that must be its own for it to dominate
+        history=2.0            # Seconds of snapshots kept for snapshot_at()
+    ):
+        self.hop_duration = hop_duration
+        self.hop_samples = int(round(ANALYSIS_RATE * hop_duration))
+        self.dominance_ratio = dominance_ratio
+        self.max_hops = max_hops
+        self.snr_threshold = snr_threshold
+        self.band_ratio_min = band_ratio_min
+        self.flatness_max = flatness_max
+        self.log_flatness_max = np.log(flatness_max)
+        self.periodicity_min = periodicity_min
+        self.min_level = min_level
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.bleed = BleedEstimator(ANALYSIS_RATE) if bleed else None
+        self.bleed_every = bleed_every
+        self.min_own = min_own
+        self.hops_since_bleed = 0
+
+        self.fft_size = 1 << (self.hop_samples - 1).bit_length()
+        self.window = np.hanning(self.hop_samples).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.fft_size, 1.0 / ANALYSIS_RATE)
+        # Bin ranges as slices (cheaper than boolean masks on one hop)
+        bins = lambda lo, hi=np.inf: slice(int(np.searchsorted(freqs, lo)), int(np.searchsorted(freqs, hi, side="right")))
+        self.speech_bins = bins(*SPEECH_BAND)
+        self.voice_bins = bins(60.0) # Ignore DC / sub-bass in the band share
+        self.flatness_bins = bins(*FLATNESS_BAND)
+        # Autocorrelation from the power spectrum, divided by the window's own
+        # (so a perfectly periodic hop reads 1 at its period)
+        self.pitch_lags = slice(int(ANALYSIS_RATE / PITCH_RANGE[1]), int(ANALYSIS_RATE / PITCH_RANGE[0]) + 1)
+        window_acf = np.fft.irfft(np.abs(np.fft.rfft(self.window, n=self.fft_size)) ** 2, n=self.fft_size)
+        self.window_acf = (window_acf[self.pitch_lags] / window_acf[0]).astype(np.float32)
+
+        self.lock = threading.Lock()   # Guards the mic list and per-mic arrays (never taken by callbacks)
+        self.keys = []                 # Mic keys, row order of the arrays below
+        self.mics = {}                 # {key: VoiceActivityDetector}
+        self.enabled = {}              # {key: bool}, disabled mics can't dominate
+        self.counter = np.zeros(0, dtype=np.int32)  # Speech counter per mic
+        self.last_speech = np.zeros(0)              # Time each mic last met speech_frames_required
+        self.volume = np.zeros(0)                   # Newest hop volume per mic
+        self.noise_floor = np.zeros(0)              # Spectral: speech-band energy of the background per mic
+        self.captured = np.zeros(0)                 # Capture time of each mic's newest analysed sample
+        self.lag = np.zeros(0)                      # Round time minus that, at the mic's last read
+        self.run_start = np.zeros(0)                # Capture time of the first hop of the latest speech run
+
+        self.snapshot = AudioSnapshot({}, {}, {}, 0.0)
+        # Rounds run every half hop
+        self.history = deque(maxlen=int(history / (hop_duration / 2)) + 1)
+        self.rounds = 0
+        self.stopped = True
+        self.thread = None
+
+    def add(self, key, vad):
+        with self.lock:
+            if key in self.mics:
+                self._remove(key)
+            self.keys.append(key)
+            self.mics[key] = vad
+            self.counter = np.append(self.counter, 0).astype(np.int32)
+            self.last_speech = np.append(self.last_speech, -np.inf)
+            self.volume = np.append(self.volume, 0.0)
+            self.noise_floor = np.append(self.noise_floor, np.inf) # Set by the first hop
+            self.captured = np.append(self.captured, -np.inf)
+            self.lag = np.append(self.lag, 0.0)
+            self.run_start = np.append(self.run_start, -np.inf)
+            if self.bleed is not None:
+                self.bleed.resize(len(self.keys))
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        if key not in self.mics:
+            return
+        i = self.keys.index(key)
+        self.keys.pop(i)
+        del self.mics[key]
+        self.counter = np.delete(self.counter, i)
+        self.last_speech = np.delete(self.last_speech, i)
+        self.volume = np.delete(self.volume, i)
+        self.noise_floor = np.delete(self.noise_floor, i)
+        self.captured = np.delete(self.captured, i)
+        self.lag = np.delete(self.lag, i)
+        self.run_start = np.delete(self.run_start, i)
+        if self.bleed is not None:
+            self.bleed.resize(len(self.keys), keep=[k for k in range(len(self.keys) + 1) if k != i])
+
+    def set_enabled(self, key, enabled):
+        self.enabled[key] = enabled
+
+    def latest(self):
+        """AudioSnapshot of the last round"""
+        return self.snapshot
+
+    def snapshot_at(self, t):
+        """
+        AudioSnapshot as of capture time t: the newest one covering no audio
+        captured after t (the oldest kept if t is older, the latest if audio
+        trails t; compare t with its capture_time for the remaining skew)
+        """
+        history = list(self.history) # Copied in one C call, safe against the worker appending
+        for snapshot in reversed(history):
+            if snapshot.capture_time <= t:
+                return snapshot
+        return history[0] if history else self.snapshot
+
+    def start(self):
+        if not self.stopped:
+            return
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="audio-analysis", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while not self.stopped:
+            try:
+                self.process()
+            except Exception as e:
+                print(f"❌ Audio analysis error: {e}")
+            time.sleep(self.hop_duration / 2)
+
+    def process(self, now=None):
+        """Drains every mic's ring and publishes a new snapshot"""
+        with self.lock:
+            keys = list(self.keys)
+            mics = [self.mics[k] for k in keys]
+            now = time.monotonic() if now is None else now
+
+            # Complete hops waiting per mic (each at its own native rate)
+            counts = np.zeros(len(mics), dtype=np.intp)
+            for i, mic in enumerate(mics):
+                hops = mic.ring.available() // mic.hop_samples
+                if hops > self.max_hops:
+                    mic.ring.skip((hops - self.max_hops) * mic.hop_samples)
+                    hops = self.max_hops
+                counts[i] = hops
+            depth = int(counts.max()) if len(mics) else 0
+
+            if depth:
+                # Newest hop of every mic in the last column, older ones before it
+                frames = np.zeros((len(mics), depth, self.hop_samples), dtype=np.float32)
+                native = np.ones(len(mics))
+                for i, mic in enumerate(mics):
+                    native[i] = mic.hop_samples
+                    if counts[i]:
+                        raw = mic.ring.read(counts[i] * mic.hop_samples).reshape(counts[i], mic.hop_samples)
+                        frames[i, depth - counts[i]:] = _resample_rows(raw, self.hop_samples)
+                        self.captured[i] = mic.ring.time_at(mic.ring.main.read_pos)
+                        self.lag[i] = now - self.captured[i]
+                valid = np.arange(depth)[None, :] >= (depth - counts)[:, None]
+
+                if self.bleed is not None:
+                    for i in np.flatnonzero(counts):
+                        self.bleed.push(i, frames[i, depth - counts[i]:].reshape(-1))
+                    self.hops_since_bleed += depth
+                    if self.hops_since_bleed >= self.bleed_every:
+                        self.bleed.estimate()
+                        self.hops_since_bleed = 0
+
+                # Norm over the native hop, as the VAD thresholds are tuned for
+                mean_square = np.mean(frames * frames, axis=2)
+                volume = np.sqrt(mean_square * native[:, None])
+                thresholds = np.array([m.speech_threshold for m in mics], dtype=np.float64)
+                required = np.array([m.speech_frames_required for m in mics])
+                spectral = np.array([m.mode == "spectral" for m in mics], dtype=bool)
+                above = volume > thresholds[:, None]
+                if spectral.any():
+                    band, voiced = self._spectral_features(frames, mean_square)
+
+                for j in range(depth):
+                    has_hop = valid[:, j]
+                    speech_hop = above[:, j]
+                    if spectral.any():
+                        # Noise floor follows the band energy down quickly and
+                        # creeps up slowly, so it settles on the background
+                        floor = np.where(np.isinf(self.noise_floor), band[:, j], self.noise_floor)
+                        snr_ok = band[:, j] > floor * self.snr_threshold
+                        candidate = snr_ok & voiced[:, j]
+                        floor = np.where(band[:, j] < floor,
+                                         self.floor_fall * floor + (1 - self.floor_fall) * band[:, j],
+                                         np.minimum(band[:, j], floor * np.where(candidate, 1.001, self.floor_rise)))
+                        self.noise_floor = np.where(has_hop & spectral, floor, self.noise_floor)
+                        speech_hop = np.where(spectral, candidate, speech_hop)
+                    # Capture time of the end of hop j (the newest hop ends at `captured`)
+                    hop_time = self.captured - (depth - 1 - j) * self.hop_duration
+                    # A speech hop on an idle counter starts a new run (its onset)
+                    rising = has_hop & speech_hop & (self.counter == 0)
+                    self.run_start = np.where(rising, hop_time - self.hop_duration, self.run_start)
+                    step = np.where(speech_hop, 1, -1)
+                    counter = np.maximum(0, self.counter + step)
+                    # Spectral: capped, so the hangover after speech is just silence_hold_time
+                    counter = np.where(spectral, np.minimum(counter, required), counter)
+                    self.counter = np.where(has_hop, counter, self.counter)
+                    self.last_speech = np.where(has_hop & (self.counter >= required), hop_time, self.last_speech)
+                self.volume = np.where(counts > 0, volume[:, -1], self.volume)
+
+            # Hangover: keep "speaking" for silence_hold_time after the last
+            # speech hop, on the mic's capture clock (a stalled mic still expires)
+            required = np.array([m.speech_frames_required for m in mics])
+            hold = np.array([m.silence_hold_time for m in mics], dtype=np.float64)
+            speaking = (self.counter >= required) | (now - self.lag - self.last_speech < hold)
+
+            # Dominance: among enabled speakers with enough of their own
+            # speech, only those close to the loudest one
+            enabled = np.array([self.enabled.get(k, True) for k in keys], dtype=bool)
+            candidates = speaking & enabled
+            own_volume = self.volume
+            bleed = {}
+            if self.bleed is not None and len(keys):
+                own = self.bleed.own_fraction
+                own_volume = self.volume * np.sqrt(own)
+                candidates &= own >= self.min_own
+                for src, dst in zip(*np.nonzero(self.bleed.gain > 0.05)):
+                    bleed[(keys[src], keys[dst])] = (float(self.bleed.gain[src, dst]), float(self.bleed.delay[src, dst]))
+            loudest = own_volume[candidates].max() if candidates.any() else 0.0
+            dominant = candidates & (own_volume >= loudest * self.dominance_ratio)
+
+            self.snapshot = AudioSnapshot(
+                dict(zip(keys, speaking.tolist())),
+                dict(zip(keys, self.volume.tolist())),
+                dict(zip(keys, dominant.tolist())),
+                now,
+                dict(zip(keys, own_volume.tolist())),
+                bleed,
+                {k: c for k, c in zip(keys, self.captured.tolist()) if c > -np.inf},
+                dict(zip(keys, self.lag.tolist())),
+                {k: t for k, t, on in zip(keys, self.run_start.tolist(), speaking.tolist()) if on}
+            )
+            self.history.append(self.snapshot)
+            self.rounds += 1
+
+    def _spectral_features(self, frames, mean_square):
+        """
+        (speech-band energy, voice-like flag) per (mic, hop) of a (mics, hops,
+        samples) block; mean_square: each hop's mean squared sample
+        """
+        spectrum = np.fft.rfft(frames * self.window, n=self.fft_size, axis=2)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        band = power[..., self.speech_bins].sum(axis=2)
+        ratio = band / (power[..., self.voice_bins].sum(axis=2) + 1e-12)
+        flat = power[..., self.flatness_bins] + 1e-12
+        # Flatness (geometric over arithmetic mean) compared in the log domain
+        log_flatness = np.log(flat).mean(axis=2) - np.log(flat.mean(axis=2))
+        voiced = ((ratio > self.band_ratio_min) & (log_flatness < self.log_flatness_max)
+                  & (mean_square > self.min_level ** 2))
+        # Periodicity within the flatness band (rumble excluded): one pitch
+        # repeats at its period, chords and noise don't
+        power[..., :self.flatness_bins.start] = 0.0
+        power[..., self.flatness_bins.stop:] = 0.0
+        acf = np.fft.irfft(power, n=self.fft_size, axis=2)
+        periodicity = (acf[..., self.pitch_lags] / self.window_acf).max(axis=2) / (acf[..., 0] + 1e-12)
+        voiced &= periodicity > self.periodicity_min
+        return band, voiced
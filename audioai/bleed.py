@@ -0,0 +1,113 @@
+import numpy as np
+
+# Mic bleed estimation by FFT cross-correlation. Every mic picks up the other
+# speakers too, delayed and attenuated. For each mic pair the last `window`
+# seconds are cross-correlated (GCC-PHAT for a sharp delay peak, the plain
+# correlation at that lag for the gain), once for each direction. A peak
+# means a source reaches both mics: the mic it reaches first is taken as the
+# source's own mic, and the coherent part of the other mic (gain^2 x source
+# energy) is bleed. What is left of each mic's energy is its own speech.
+#
+# Arrival order is only meaningful when the mics' windows are time-aligned.
+# If the "first" mic receives a component much weaker than the other mic
+# (gain above max_gain, e.g. separate devices with different buffering), the
+# louder mic is taken as the source instead.
+
+
+class BleedEstimator:
+    def __init__(
+        self,
+        sample_rate=16000,
+        window=0.256,          # Seconds correlated per estimate
+        max_delay=0.03,        # Largest acoustic + buffering delay searched (~10 m)
+        min_peak=0.1,          # GCC-PHAT peak height for a shared source (noise / pitch echoes stay < 0.05)
+        min_coherence=0.1,     # Normalized plain correlation at that peak
+        lag_tolerance=0.0005,  # Delays below this are "simultaneous": the louder mic is the source
+        max_gain=1.0,          # Bleed can't be louder than the source on its own mic
+        smoothing=0.3          # EMA weight of new gain/delay estimates (display only)
+    ):
+        self.sample_rate = sample_rate
+        self.window_samples = int(window * sample_rate)
+        self.max_lag = int(max_delay * sample_rate)
+        self.fft_size = 1 << (2 * self.window_samples - 1).bit_length()
+        self.min_peak = min_peak
+        self.min_coherence = min_coherence
+        self.tolerance = int(lag_tolerance * sample_rate)
+        self.max_gain = max_gain
+        self.smoothing = smoothing
+
+        # Lags searched, split by sign: > 0 means the second mic of a pair hears it first
+        self.lags = np.arange(-self.max_lag, self.max_lag + 1)
+        self.history = np.zeros((0, self.window_samples), dtype=np.float32)
+        self.gain = np.zeros((0, 0))      # [src, dst] smoothed gain of mic src's source in mic dst
+        self.delay = np.zeros((0, 0))     # [src, dst] smoothed delay in seconds
+        self.own_fraction = np.ones(0)    # Share of each mic's window energy that is its own
+
+    def resize(self, mics, keep=None):
+        """Re-shapes the state for `mics` rows, keeping rows `keep` (old indices) in order"""
+        keep = list(range(min(mics, len(self.history)))) if keep is None else list(keep)
+        history = np.zeros((mics, self.window_samples), dtype=np.float32)
+        gain = np.zeros((mics, mics))
+        delay = np.zeros((mics, mics))
+        own = np.ones(mics)
+        n = len(keep)
+        history[:n] = self.history[keep]
+        gain[:n, :n] = self.gain[np.ix_(keep, keep)]
+        delay[:n, :n] = self.delay[np.ix_(keep, keep)]
+        own[:n] = self.own_fraction[keep]
+        self.history, self.gain, self.delay, self.own_fraction = history, gain, delay, own
+
+    def push(self, i, samples):
+        """Appends mic i's newest samples (at sample_rate) to its window"""
+        n = min(len(samples), self.window_samples)
+        if n == 0:
+            return
+        row = self.history[i]
+        row[:-n] = row[n:].copy()
+        row[-n:] = samples[-n:]
+
+    def estimate(self):
+        """Updates and returns own_fraction, the share of each mic's energy that isn't bleed"""
+        mics = len(self.history)
+        if mics < 2:
+            self.own_fraction = np.ones(mics)
+            return self.own_fraction
+
+        energy = np.einsum("ij,ij->i", self.history, self.history).astype(np.float64) + 1e-12
+        spectra = np.fft.rfft(self.history, n=self.fft_size, axis=1)
+        first, second = np.triu_indices(mics, k=1)
+        cross = spectra[first] * np.conj(spectra[second])
+        # cc[k] = sum x_first[n + k] * x_second[n]: a peak at k > 0 means first lags second
+        phat = np.fft.irfft(cross / (np.abs(cross) + 1e-12), n=self.fft_size, axis=1)[:, self.lags]
+        plain = np.fft.irfft(cross, n=self.fft_size, axis=1)[:, self.lags]
+
+        bleed = np.zeros(mics)
+        pairs = np.arange(len(first))
+        for side in (self.lags < 0, self.lags >= 0):
+            # Strongest peak per pair and direction
+            lags = self.lags[side]
+            best = np.argmax(phat[:, side], axis=1)
+            lag = lags[best]
+            peak = phat[:, side][pairs, best]
+            cc = plain[:, side][pairs, best]
+            coherence = np.abs(cc) / np.sqrt(energy[first] * energy[second])
+            valid = (peak >= self.min_peak) & (coherence >= self.min_coherence)
+
+            # Source = the mic that hears it first, unless that makes the bleed louder than the source
+            src = np.where(lag > 0, second, first)
+            dst = np.where(lag > 0, first, second)
+            gain = np.abs(cc) / energy[src]
+            implausible = (np.abs(lag) <= self.tolerance) | (gain > self.max_gain)
+            louder_is_first = energy[first] >= energy[second]
+            src = np.where(implausible, np.where(louder_is_first, first, second), src)
+            dst = np.where(implausible, np.where(louder_is_first, second, first), dst)
+            gain = np.abs(cc) / energy[src]
+
+            np.add.at(bleed, dst[valid], (cc[valid] ** 2) / energy[src[valid]])
+            a = self.smoothing
+            self.gain[src[valid], dst[valid]] = (1 - a) * self.gain[src[valid], dst[valid]] + a * gain[valid]
+            self.delay[src[valid], dst[valid]] = ((1 - a) * self.delay[src[valid], dst[valid]]
+                                                  + a * np.abs(lag[valid]) / self.sample_rate)
+
+        self.own_fraction = np.clip(1.0 - bleed / energy, 0.0, 1.0)
+        return self.own_fraction
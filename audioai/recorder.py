@@ -0,0 +1,205 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+
+import numpy as np
+
+# Session audio. During recording a background thread drains every mic's ring
+# (through its own RingReader, so the audio callback never waits on disk) into
+# a raw 16-bit WAV per mic, and notes (sample index, time.monotonic()) anchors
+# from the ring's write stamps. At session end the soundtrack is rebuilt on the
+# video's timeline: video frame k plays at k / fps, so it gets the 1 / fps of
+# each mic's audio starting at the capture time of the frame that was written.
+# That keeps lip sync even when the output loop dropped or repeated frames.
+# The result is written as a WAV sidecar (one mix, or one track per mic) and,
+# when ffmpeg is installed, muxed with the video into a .mkv.
+
+MODES = ("mix", "tracks")
+
+
+class _Track:
+    def __init__(self, key, vad, path):
+        self.key = key
+        self.rate = vad.sample_rate
+        self.ring = vad.ring
+        self.reader = vad.ring.reader()
+        self.first = self.reader.read_pos   # Ring position of the file's sample 0
+        self.path = path
+        self.wav = wave.open(path, "wb")
+        self.wav.setnchannels(1)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(self.rate)
+        self.samples = 0
+        self.anchors = []                   # [(file sample index, time.monotonic())]
+
+    def drain(self):
+        stamp = self.ring.stamp
+        n = self.reader.available()
+        if n:
+            skipped = self.reader.dropped
+            data = self.reader.read(n)
+            if skipped:
+                # The writer lapped us: pad the gap so the timeline stays intact
+                self.wav.writeframes(np.zeros(skipped, dtype="<i2").tobytes())
+                self.samples += skipped
+                self.reader.dropped = 0
+            self.wav.writeframes(AudioRecorder._pcm16(data))
+            self.samples += n
+        if stamp is not None and stamp[0] > self.first:
+            self.anchors.append((stamp[0] - self.first, stamp[1]))
+
+    def close(self):
+        self.wav.close()
+
+
+class AudioRecorder:
+    def __init__(self, vads, base_path, mode="mix", interval=0.2):
+        """
+        vads: {key: VoiceActivityDetector} to record; base_path: recording
+        path without extension (files are named <base>_mic<key>.raw.wav,
+        <base>.wav or <base>_mic<key>.wav, <base>.mkv)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown audio recording mode '{mode}' (expected one of {MODES})")
+        self.base_path = base_path
+        self.mode = mode
+        self.interval = interval
+        self.tracks = {key: _Track(key, vad, f"{base_path}_mic{key}.raw.wav") for key, vad in vads.items()}
+        self.stopped = True
+        self.thread = None
+
+    def start(self):
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="audio-recorder", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped:
+            for track in self.tracks.values():
+                track.drain()
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.stopped = True
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        for track in self.tracks.values():
+            track.drain()
+            track.close()
+
+    def build(self, frame_times, fps, enabled=None, rate=48000, keep_raw=False, chunk_seconds=30.0):
+        """
+        Writes the soundtrack for a video whose frame k was captured at
+        frame_times[k] (time.monotonic()). enabled: {key: per-frame bools},
+        muted frames are silent. Works in chunks, so memory doesn't grow with
+        the session length. Returns the written WAV paths.
+        """
+        frame_times = np.asarray(frame_times, dtype=np.float64)
+        if not len(frame_times) or not self.tracks:
+            self._remove_raw(keep_raw)
+            return []
+        # A repeated (or early) frame still advances the audio by one frame
+        for k in range(1, len(frame_times)):
+            frame_times[k] = max(frame_times[k], frame_times[k - 1] + 1.0 / fps)
+
+        if self.mode == "mix":
+            outputs = {None: f"{self.base_path}.wav"}
+        else:
+            outputs = {key: f"{self.base_path}_mic{key}.wav" for key in self.tracks}
+        writers = {key: self._open_wav(path, rate) for key, path in outputs.items()}
+        sources = {key: wave.open(track.path, "rb") for key, track in self.tracks.items()}
+        clocks = {key: self._sample_clock(track) for key, track in self.tracks.items()}
+        try:
+            out_len = int(round(len(frame_times) * rate / fps))
+            chunk = int(chunk_seconds * rate)
+            for start in range(0, out_len, chunk):
+                # Output sample j belongs to frame j * fps / rate and lies (j - frame start) / rate into it
+                j = np.arange(start, min(out_len, start + chunk))
+                frame = np.minimum((j * fps // rate).astype(np.intp), len(frame_times) - 1)
+                t = frame_times[frame] + (j - frame * rate / fps) / rate
+                mix = np.zeros(len(j), dtype=np.float32)
+                for key, track in self.tracks.items():
+                    samples = self._read_at(sources[key], clocks[key], t)
+                    if enabled is not None and key in enabled:
+                        samples[~np.asarray(enabled[key], dtype=bool)[frame]] = 0.0
+                    if self.mode == "mix":
+                        mix += samples / np.sqrt(len(self.tracks))
+                    else:
+                        writers[key].writeframes(self._pcm16(samples))
+                if self.mode == "mix":
+                    writers[None].writeframes(self._pcm16(mix))
+        finally:
+            for f in list(writers.values()) + list(sources.values()):
+                f.close()
+        self._remove_raw(keep_raw)
+        return list(outputs.values())
+
+    @staticmethod
+    def _sample_clock(track):
+        """(slope, offset) mapping time.monotonic() to the track's file sample index, or None"""
+        if len(track.anchors) >= 2:
+            idx, times = np.array(track.anchors).T
+            # Least squares: absorbs callback jitter and the device's clock drift
+            slope, offset = np.polyfit(times - times[0], idx, 1)
+            return slope, offset - slope * times[0]
+        if track.anchors:
+            return track.rate, track.anchors[0][0] - track.rate * track.anchors[0][1]
+        return None
+
+    @staticmethod
+    def _read_at(source, clock, t):
+        """Track samples at times t (interpolated); silence where nothing was recorded"""
+        samples = np.zeros(len(t), dtype=np.float32)
+        if clock is None:
+            return samples
+        positions = clock[1] + clock[0] * t
+        inside = (positions >= 0) & (positions <= source.getnframes() - 1)
+        if not inside.any():
+            return samples
+        lo = int(np.floor(positions[inside].min()))
+        hi = int(np.ceil(positions[inside].max())) + 1
+        source.setpos(lo)
+        data = np.frombuffer(source.readframes(hi - lo), dtype="<i2").astype(np.float32) / 32767
+        samples[inside] = np.interp(positions[inside] - lo, np.arange(len(data)), data)
+        return samples
+
+    @staticmethod
+    def _open_wav(path, rate):
+        f = wave.open(path, "wb")
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        return f
+
+    @staticmethod
+    def _pcm16(samples):
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    def _remove_raw(self, keep_raw):
+        if keep_raw:
+            return
+        for track in self.tracks.values():
+            try:
+                os.remove(track.path)
+            except OSError:
+                pass
+
+
+def mux(video_path, audio_paths, out_path):
+    """Muxes the video with the soundtrack(s) into out_path using ffmpeg; None if ffmpeg isn't installed"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None or not audio_paths:
+        return None
+    cmd = [ffmpeg, "-y", "-loglevel", "error", "-i", video_path]
+    for path in audio_paths:
+        cmd += ["-i", path]
+    cmd += ["-map", "0:v"]
+    for i in range(len(audio_paths)):
+        cmd += ["-map", f"{i + 1}:a"]
+    cmd += ["-c:v", "copy", "-c:a", "aac", "-shortest", out_path]
+    subprocess.run(cmd, check=True, timeout=600)
+    return out_path
@@ -0,0 +1,96 @@
+import time
+import numpy as np
+
+# Single-producer sample ring. The PortAudio callback is the only writer; each
+# consumer (the audio analysis worker, the session recorder) reads through its
+# own RingReader. No lock is needed: the writer publishes new samples by
+# advancing `written` only after they have been copied in (and stamped), and
+# every reader only advances its own position.
+
+
+class AudioRing:
+    def __init__(self, capacity, sample_rate=None):
+        self.capacity = int(capacity)
+        self.sample_rate = sample_rate
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.written = 0    # Total samples written (advanced by the writer only)
+        self.stamp = None   # (written, capture time of sample `written`) after the last write
+        self.main = RingReader(self) # The analysis worker's reader
+
+    def write(self, samples, timestamp=None):
+        """
+        Copies 1-D samples in. Called from the audio callback: no allocation, no locks.
+        timestamp: capture time just after the last sample (default: now).
+        """
+        n = len(samples)
+        written = self.written
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            written += n - self.capacity
+            n = self.capacity
+        start = written % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        if n > first:
+            self.buffer[:n - first] = samples[first:]
+        written += n
+        # Stamp first: a reader that sees the new `written` must also find its stamp
+        self.stamp = (written, time.monotonic() if timestamp is None else timestamp)
+        self.written = written
+
+    def time_at(self, pos):
+        """Capture time of ring position pos, extrapolated from the last write's stamp"""
+        written, timestamp = self.stamp
+        return timestamp - (written - pos) / self.sample_rate
+
+    def reader(self):
+        """An extra, independent reader starting at the newest sample"""
+        reader = RingReader(self)
+        reader.read_pos = self.written
+        return reader
+
+    # The analysis worker reads through the ring itself
+    def available(self):
+        return self.main.available()
+
+    def skip(self, n):
+        self.main.skip(n)
+
+    def read(self, n, out=None):
+        return self.main.read(n, out)
+
+
+class RingReader:
+    def __init__(self, ring):
+        self.ring = ring
+        self.read_pos = 0   # Total samples consumed by this reader
+        self.dropped = 0    # Samples lost because the writer lapped this reader
+
+    def available(self):
+        """Unread samples; older ones than a full ring are skipped over"""
+        ring = self.ring
+        written = ring.written
+        if written - self.read_pos > ring.capacity:
+            # Overrun: keep the newest half so the next write can't tear the read
+            skip_to = written - ring.capacity // 2
+            self.dropped += skip_to - self.read_pos
+            self.read_pos = skip_to
+        return written - self.read_pos
+
+    def skip(self, n):
+        """Consumes n samples without reading them"""
+        self.dropped += n
+        self.read_pos += n
+
+    def read(self, n, out=None):
+        """Consumes the next n samples (check available() first) into `out` or a new array"""
+        ring = self.ring
+        if out is None:
+            out = np.empty(n, dtype=np.float32)
+        start = self.read_pos % ring.capacity
+        first = min(n, ring.capacity - start)
+        out[:first] = ring.buffer[start:start + first]
+        if n > first:
+            out[first:n] = ring.buffer[:n - first]
+        self.read_pos += n
+        return out
@@ -0,0 +1,268 @@
+import threading
+import time
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+
+from audioai import synthetic
+
+# Audio sources mimic the part of sd.InputStream that VoiceActivityDetector
+# uses (start / stop / close, and calling callback(indata, frames, time_info,
+# status) with (frames, 1) float32 blocks), so a live mic, a WAV recording and
+# a scripted generator all drive the same callback path.
+# Non-live sources can also be stepped by hand (step() delivers one block),
+# which is how offline benchmarks run them as fast as the consumer keeps up.
+#
+# capture_time() turns a callback's time_info into the capture time of the
+# block's first sample in the consumer's clock: time.monotonic() for running
+# sources (the clock camera frames are stamped with), source time for sources
+# stepped by hand.
+
+
+class AudioSource:
+    """Base class for anything a VoiceActivityDetector can take audio from."""
+
+    latency = 0.0 # Seconds from capturing a block's last sample to its callback
+
+    def capture_time(self, time_info, frames):
+        # Generated sources put their own clock into inputBufferAdcTime
+        return time_info.inputBufferAdcTime
+
+    def start(self):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class LiveAudioSource(AudioSource):
+    """
+    A PortAudio input device (sd.InputStream). sounddevice is only imported here.
+    Block times come from PortAudio's ADC timestamps, moved from the stream
+    clock onto time.monotonic(); host APIs that don't report them (0.0) fall
+    back to the stream's reported input latency. `latency` is a running
+    estimate of the device's buffering delay.
+    """
+
+    def __init__(self, samplerate, blocksize, callback, device=None):
+        import sounddevice as sd
+        self.stream = sd.InputStream(
+            samplerate=samplerate,
+            channels=1,
+            dtype="float32",
+            blocksize=blocksize,
+            callback=callback,
+            device=device
+        )
+        self.samplerate = samplerate
+        self.reported_latency = float(self.stream.latency)
+        self.latency = self.reported_latency
+
+    def capture_time(self, time_info, frames):
+        now = time.monotonic()
+        duration = frames / self.samplerate
+        age = time_info.currentTime - time_info.inputBufferAdcTime
+        if not time_info.inputBufferAdcTime or not 0.0 < age < 1.0:
+            age = duration + self.reported_latency
+        self.latency += 0.05 * (max(0.0, age - duration) - self.latency)
+        return now - age
+
+    def start(self):
+        self.stream.start()
+
+    def stop(self):
+        self.stream.stop()
+
+    def close(self):
+        self.stream.close()
+
+
+class BlockSource(AudioSource):
+    """
+    Feeds a prepared mono float32 signal to the callback block by block.
+    rate:
+      - "native": paced in real time by a feeder thread (like a device)
+      - "fast":   the feeder thread delivers blocks back to back; the consumer
+                  must keep up (or drive step() itself)
+    """
+
+    RATES = ("native", "fast")
+
+    def __init__(self, signal, samplerate, blocksize, callback, rate="native", loop=True):
+        if rate not in self.RATES:
+            raise ValueError(f"Unknown audio replay rate '{rate}' (expected one of {self.RATES})")
+        self.signal = np.asarray(signal, dtype=np.float32)
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.rate = rate
+        self.loop = loop
+
+        self.position = 0          # Samples delivered so far (keeps counting across loops)
+        self.start_time = 0.0      # time.monotonic() of sample 0 (0.0 when stepped by hand)
+        self.block = np.zeros((blocksize, 1), dtype=np.float32)
+        self.running = False
+        self.thread = None
+
+    @property
+    def time(self):
+        """Source time (s) of the next sample to deliver"""
+        return self.position / self.samplerate
+
+    def step(self):
+        """Delivers the next block to the callback; False once a non-looping signal ran out"""
+        n = len(self.signal)
+        offset = self.position % n if self.loop else self.position
+        if offset + self.blocksize > n and not self.loop:
+            return False
+        end = offset + self.blocksize
+        if end <= n:
+            self.block[:, 0] = self.signal[offset:end]
+        else:
+            head = n - offset
+            self.block[:head, 0] = self.signal[offset:]
+            self.block[head:, 0] = self.signal[:self.blocksize - head]
+        adc_time = self.start_time + self.time
+        time_info = SimpleNamespace(inputBufferAdcTime=adc_time,
+                                    currentTime=time.monotonic() if self.running else adc_time)
+        self.position += self.blocksize
+        self.callback(self.block, self.blocksize, time_info, None)
+        return True
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.start_time = time.monotonic() - self.time
+        self.thread = threading.Thread(target=self._run, name="audio-source", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        interval = self.blocksize / self.samplerate
+        while self.running:
+            if self.rate == "native":
+                # The block is complete once its last sample has been "recorded"
+                wait_time = self.start_time + self.time + interval - time.monotonic()
+                if wait_time > 0:
+                    time.sleep(wait_time)
+            if not self.step():
+                break
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+
+def read_wav(path, samplerate=None):
+    """Mono float32 samples of a PCM WAV file, resampled to `samplerate` if given"""
+    with wave.open(path, "rb") as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        raw = f.readframes(f.getnframes())
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        data = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        data = ((b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8).astype(np.float32) / 8388608
+    elif width == 4:
+        data = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width {width} bytes in {path}")
+    data = data.reshape(-1, channels).mean(axis=1)
+    if samplerate and samplerate != rate:
+        positions = np.arange(int(len(data) * samplerate / rate)) * (rate / samplerate)
+        data = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+    return data
+
+
+class WavSource(BlockSource):
+    """Replays a WAV file (any PCM width / channel count, mixed to mono)"""
+
+    def __init__(self, path, samplerate, blocksize, callback, rate="native", loop=True):
+        self.path = path
+        super().__init__(read_wav(path, samplerate), samplerate, blocksize, callback, rate, loop)
+
+
+class SyntheticAudioSource(BlockSource):
+    """
+    Scripted talk / silence generator (audioai/synthetic.py speech over a
+    noise floor). script: [("talk" | "silence", seconds), ...]; by default a
+    random alternation of `duration` seconds. Deterministic for a given seed.
+    `talk_spans` holds the (start, end) source times of the speech it contains.
+    """
+
+    def __init__(self, samplerate, blocksize, callback, script=None, rate="native", loop=True,
+                 seed=0, pitch=140.0, level=0.05, noise=0.001, duration=60.0):
+        rng = np.random.default_rng(seed)
+        if script is None:
+            script, total = [], 0.0
+            while total < duration:
+                script += [("silence", rng.uniform(0.5, 3.0)), ("talk", rng.uniform(1.0, 4.0))]
+                total += script[-2][1] + script[-1][1]
+        self.script = [(kind, float(seconds)) for kind, seconds in script]
+
+        parts, labels = [], []
+        for kind, seconds in self.script:
+            if kind == "talk":
+                s, l = synthetic.speech(seconds, samplerate, rng, pitch=pitch, level=level)
+            elif kind == "silence":
+                n = int(seconds * samplerate)
+                s, l = np.zeros(n, dtype=np.float32), np.zeros(n, dtype=bool)
+            else:
+                raise ValueError(f"Unknown script entry '{kind}' (expected 'talk' or 'silence')")
+            parts.append(s)
+            labels.append(l)
+        signal = np.concatenate(parts)
+        signal = signal + (rng.standard_normal(len(signal)) * noise).astype(np.float32)
+        self.labels = np.concatenate(labels)   # Per-sample speech ground truth
+
+        # Speech spans: labelled runs, with gaps shorter than 0.3 s (inside words) merged
+        edges = np.flatnonzero(np.diff(self.labels.astype(np.int8)))
+        starts = list(edges[self.labels[edges + 1]] + 1)
+        ends = list(edges[~self.labels[edges + 1]] + 1)
+        if self.labels[0]:
+            starts.insert(0, 0)
+        if self.labels[-1]:
+            ends.append(len(self.labels))
+        spans = []
+        for start, end in zip(starts, ends):
+            if spans and start - spans[-1][1] < 0.3 * samplerate:
+                spans[-1][1] = end
+            else:
+                spans.append([start, end])
+        self.talk_spans = [(s / samplerate, e / samplerate) for s, e in spans]
+
+        super().__init__(signal, samplerate, blocksize, callback, rate, loop)
+
+
+def create_audio_source(spec, samplerate, blocksize, callback, device=None):
+    """
+    Builds an AudioSource from a CAMERA_CONFIG style "audio_source" entry:
+      None / {"type": "live"}                                 -> LiveAudioSource(device)
+      {"type": "wav", "path": "talk.wav", "rate": "native"|"fast", "loop": True}
+      {"type": "synthetic", "script": [["talk", 2.0], ["silence", 1.5]], "seed": 0,
+       "pitch": 140, "level": 0.05, "noise": 0.001, "rate": "native"}
+    A bare path string is treated as a WAV source at native rate.
+    """
+    if spec is None:
+        return LiveAudioSource(samplerate, blocksize, callback, device)
+    if isinstance(spec, str):
+        spec = {"type": "wav", "path": spec}
+
+    kind = spec.get("type", "live")
+    params = {k: v for k, v in spec.items() if k != "type"}
+
+    if kind == "live":
+        return LiveAudioSource(samplerate, blocksize, callback, params.get("device", device))
+    if kind == "wav":
+        return WavSource(samplerate=samplerate, blocksize=blocksize, callback=callback, **params)
+    if kind == "synthetic":
+        return SyntheticAudioSource(samplerate, blocksize, callback, **params)
+    raise ValueError(f"Unknown audio source type '{kind}'")
@@ -0,0 +1,132 @@
+import numpy as np
+
+# Synthetic audio with known speech / non-speech labels, for benchmarking the
+# VAD without recordings. "Speech" is a harmonic source (jittered pitch) shaped
+# by vowel formants, in syllables with fricative onsets and pauses between
+# words; the non-speech classes are the usual false triggers in a room:
+# HVAC rumble, broadband noise, keyboard clicks and music.
+
+VOWEL_FORMANTS = [ # (F1, F2, F3) Hz
+    (730, 1090, 2440), (530, 1840, 2480), (270, 2290, 3010),
+    (570, 840, 2410), (300, 870, 2240), (660, 1720, 2410),
+]
+
+
+def _formant_gain(freqs, formants, bandwidth=120.0):
+    gain = np.zeros_like(freqs)
+    for i, f in enumerate(formants):
+        gain += (0.6 ** i) / (1.0 + ((freqs - f) / bandwidth) ** 2)
+    return gain
+
+
+def _highpass_noise(n, rng, cutoff, sample_rate):
+    spectrum = np.fft.rfft(rng.standard_normal(n))
+    spectrum[np.fft.rfftfreq(n, 1.0 / sample_rate) < cutoff] = 0
+    return np.fft.irfft(spectrum, n)
+
+
+def _normalize(x, level):
+    rms = np.sqrt(np.mean(x * x)) + 1e-12
+    return (x * (level / rms)).astype(np.float32)
+
+
+def speech(duration, sample_rate=16000, rng=None, pitch=140.0, level=0.05):
+    """Returns (signal, per-sample speech label)"""
+    rng = rng or np.random.default_rng()
+    n = int(duration * sample_rate)
+    out = np.zeros(n)
+    labels = np.zeros(n, dtype=bool)
+    pos = int(rng.uniform(0.0, 0.2) * sample_rate)
+    while pos < n:
+        # A word: 2-5 syllables, then a pause
+        for _ in range(rng.integers(2, 6)):
+            length = int(rng.uniform(0.12, 0.28) * sample_rate)
+            if pos + length > n:
+                break
+            t = np.arange(length) / sample_rate
+            f0 = pitch * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(1, 3) * t)) * rng.uniform(0.9, 1.1)
+            phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+            formants = np.array(VOWEL_FORMANTS[rng.integers(len(VOWEL_FORMANTS))]) * rng.uniform(0.9, 1.1)
+            harmonics = np.arange(1, int(4000 / f0.mean()))
+            gains = _formant_gain(harmonics * f0.mean(), formants)
+            voiced = (gains[:, None] * np.sin(harmonics[:, None] * phase[None, :])).sum(axis=0)
+            envelope = np.sin(np.pi * np.arange(length) / length) ** 0.5
+            syllable = voiced * envelope
+            # Fricative / plosive onset
+            onset = int(0.04 * sample_rate)
+            syllable[:onset] += 0.3 * _highpass_noise(onset, rng, 2500, sample_rate) * np.abs(voiced).max()
+            out[pos:pos + length] += syllable
+            labels[pos:pos + length] = True
+            pos += length + int(rng.uniform(0.0, 0.05) * sample_rate)
+        pos += int(rng.uniform(0.3, 1.2) * sample_rate)
+    rms = np.sqrt(np.mean(out[labels] ** 2)) if labels.any() else 1.0
+    return (out * (level / rms)).astype(np.float32), labels
+
+
+def hvac(duration, sample_rate=16000, rng=None, level=0.02):
+    """Low-frequency rumble: brown noise plus fan hum"""
+    rng = rng or np.random.default_rng()
+    n = int(duration * sample_rate)
+    brown = np.cumsum(rng.standard_normal(n))
+    brown -= np.convolve(brown, np.ones(2000) / 2000, mode="same") # Remove drift
+    t = np.arange(n) / sample_rate
+    hum = 0.5 * np.sin(2 * np.pi * 60 * t) + 0.25 * np.sin(2 * np.pi * 120 * t)
+    return _normalize(brown / np.abs(brown).max() + hum, level)
+
+
+def white_noise(duration, sample_rate=16000, rng=None, level=0.02):
+    rng = rng or np.random.default_rng()
+    return _normalize(rng.standard_normal(int(duration * sample_rate)), level)
+
+
+def keyboard(duration, sample_rate=16000, rng=None, level=0.02, rate=6.0):
+    """Typing: short decaying broadband clicks at ~rate per second"""
+    rng = rng or np.random.default_rng()
+    n = int(duration * sample_rate)
+    out = np.zeros(n)
+    click_len = int(0.015 * sample_rate)
+    decay = np.exp(-np.arange(click_len) / (0.002 * sample_rate))
+    for start in np.cumsum(rng.exponential(1.0 / rate, int(duration * rate * 2)) * sample_rate).astype(int):
+        if start + click_len >= n:
+            break
+        out[start:start + click_len] += rng.standard_normal(click_len) * decay * rng.uniform(0.5, 1.0)
+    return _normalize(out, level)
+
+
+def music(duration, sample_rate=16000, rng=None, level=0.05, tempo=100):
+    """Sustained harmonic chords changing on the beat"""
+    rng = rng or np.random.default_rng()
+    n = int(duration * sample_rate)
+    beat = int(60.0 / tempo * sample_rate)
+    out = np.zeros(n)
+    t = np.arange(beat) / sample_rate
+    for start in range(0, n, beat):
+        root = 110 * 2 ** (rng.integers(0, 12) / 12)
+        chord = np.zeros(beat)
+        for ratio in (1, 1.26, 1.5, 2):
+            for k in range(1, 6):
+                chord += np.sin(2 * np.pi * root * ratio * k * t) / k
+        length = min(beat, n - start)
+        out[start:start + length] = (chord * np.exp(-t * 1.5))[:length]
+    return _normalize(out, level)
+
+
+def labelled_set(sample_rate=16000, duration=8.0, seed=0):
+    """[(name, signal, per-sample speech labels)] covering speech in quiet and in noise plus noise-only clips"""
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    none = np.zeros(n, dtype=bool)
+    clips = []
+    for pitch in (110.0, 210.0):
+        s, labels = speech(duration, sample_rate, rng, pitch=pitch)
+        clips.append((f"speech {pitch:.0f}Hz", s + white_noise(duration, sample_rate, rng, level=0.001), labels))
+    s, labels = speech(duration, sample_rate, rng)
+    clips.append(("speech + hvac", s + hvac(duration, sample_rate, rng, level=0.02), labels))
+    s, labels = speech(duration, sample_rate, rng)
+    clips.append(("speech + keyboard", s + keyboard(duration, sample_rate, rng, level=0.01), labels))
+    clips.append(("hvac", hvac(duration, sample_rate, rng, level=0.05), none))
+    clips.append(("white noise", white_noise(duration, sample_rate, rng, level=0.03), none))
+    clips.append(("keyboard", keyboard(duration, sample_rate, rng, level=0.05), none))
+    clips.append(("music", music(duration, sample_rate, rng, level=0.05), none))
+    clips.append(("silence", white_noise(duration, sample_rate, rng, level=0.0005), none))
+    return clips
@@ -1,8 +1,17 @@
-import sounddevice as sd
-import numpy as np
-import threading
+import time
+
+from audioai.ring import AudioRing
+from audioai.analysis import AudioAnalyzer
+from audioai.sources import create_audio_source
 
 class VoiceActivityDetector:
+    """
+    One microphone. The audio callback only copies PCM into `ring`; speech
+    detection runs in an AudioAnalyzer shared by all mics (pass the engine's,
+    or a private one is started). is_speaking / current_volume read its latest
+    snapshot. `source` replaces the live device with a WAV file or a synthetic
+    talk script (see audioai/sources.py).
+    """
     def __init__(
         self,
         sample_rate=16000,
@@ -10,7 +19,12 @@ class VoiceActivityDetector:
         speech_threshold=1,
         speech_frames_required=4,
         silence_hold_time=0.8, # Seconds to hold "speaking" state after silence
-        device_index=None
+        device_index=None,
+        source=None,           # create_audio_source spec (WAV / synthetic); None = live device_index
+        mode="energy",         # "energy": hop norm > speech_threshold, "spectral": see audioai/analysis.py
+        analyzer=None,         # Shared AudioAnalyzer
+        key=0,                 # This mic's key in the analyzer (the engine uses the camera index)
+        ring_seconds=2.0       # Audio the ring holds if the analyzer falls behind
     ):
         self.sample_rate = sample_rate
         self.chunk_duration = chunk_duration
@@ -18,57 +32,68 @@ class VoiceActivityDetector:
         self.speech_frames_required = speech_frames_required
         self.silence_hold_time = silence_hold_time
         self.device_index = device_index
+        self.source = source
+        if mode not in ("energy", "spectral"):
+            raise ValueError(f"Unknown VAD mode '{mode}' (expected 'energy' or 'spectral')")
+        self.mode = mode
 
-        self.current_volume = 0.0
-        self.speech_counter = 0
-        self.is_speaking = False
-        
-        # Silence hold logic
-        self.last_speech_time = 0
-        import time
-        self.time_module = time
+        self.analyzer = analyzer
+        self.owns_analyzer = False
+        self.key = key
+        self.ring = AudioRing(int(sample_rate * ring_seconds), sample_rate)
+        self.hop_samples = int(round(sample_rate * (analyzer.hop_duration if analyzer else chunk_duration)))
+        self.status_count = 0 # Callbacks that reported over/underflows
 
         self.running = False
         self.stream = None
 
-    def _audio_callback(self, indata, frames, time_info, status):
-        if status:
-            print(status)
+    @property
+    def is_speaking(self):
+        return self.analyzer.latest().speaking.get(self.key, False) if self.analyzer else False
 
-        volume = np.linalg.norm(indata)
-        self.current_volume = volume
+    @property
+    def current_volume(self):
+        return self.analyzer.latest().volume.get(self.key, 0.0) if self.analyzer else 0.0
 
-        if volume > self.speech_threshold:
-            self.speech_counter += 1
-        else:
-            self.speech_counter = max(0, self.speech_counter - 1)
+    @property
+    def latency(self):
+        """Estimated input latency of the device (s)"""
+        return self.stream.latency if self.stream else 0.0
 
-        currently_speaking = self.speech_counter >= self.speech_frames_required
-        
-        if currently_speaking:
-            self.is_speaking = True
-            self.last_speech_time = self.time_module.time()
+    def _audio_callback(self, indata, frames, time_info, status):
+        # Real-time thread: stamp, copy and return, analysis happens in the analyzer
+        if status:
+            self.status_count += 1
+        if time_info is None:
+            captured = time.monotonic() - frames / self.sample_rate
+        elif self.stream is not None:
+            captured = self.stream.capture_time(time_info, frames)
         else:
-            # Check if we are within the hold time
-            if self.time_module.time() - self.last_speech_time < self.silence_hold_time:
-                self.is_speaking = True
-            else:
-                self.is_speaking = False
+            captured = time_info.inputBufferAdcTime # Fed by hand, already in the caller's clock
+        self.ring.write(indata[:, 0], captured + frames / self.sample_rate)
 
     def start(self):
         if self.running:
             return
 
+        if self.analyzer is None:
+            self.analyzer = AudioAnalyzer(hop_duration=self.chunk_duration)
+            self.owns_analyzer = True
+        self.hop_samples = int(round(self.sample_rate * self.analyzer.hop_duration))
+
         self.running = True
-        self.stream = sd.InputStream(
-            samplerate=self.sample_rate,
-            channels=1,
-            blocksize=int(self.sample_rate * self.chunk_duration),
-            callback=self._audio_callback,
-            device=self.device_index
-        )
+        self.stream = create_audio_source(self.source, self.sample_rate,
+                                          int(self.sample_rate * self.chunk_duration),
+                                          self._audio_callback, self.device_index)
+        self.analyzer.add(self.key, self)
         self.stream.start()
-        print(f"🎙️ Voice Activity Detection Started (Device: {self.device_index if self.device_index is not None else 'Default'})")
+        if self.owns_analyzer:
+            self.analyzer.start()
+        if self.source is not None:
+            name = type(self.stream).__name__
+        else:
+            name = self.device_index if self.device_index is not None else 'Default'
+        print(f"🎙️ Voice Activity Detection Started (Device: {name})")
 
     def stop(self):
         if not self.running:
@@ -79,10 +104,14 @@ class VoiceActivityDetector:
             self.stream.stop()
             self.stream.close()
             self.stream = None
+        self.analyzer.remove(self.key)
+        if self.owns_analyzer:
+            self.analyzer.stop()
+        if self.status_count:
+            print(f"⚠️ Mic {self.key}: {self.status_count} audio callbacks reported over/underflows")
         print("🎙️ Voice Activity Detection Stopped")
 
 if __name__ == "__main__":
-    import time
     vad = VoiceActivityDetector()
     vad.start()
     try:
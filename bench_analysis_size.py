@@ -0,0 +1,138 @@
+"""
+Face detector cost vs. accuracy at different analysis resolutions.
+
+The reference is the synthetic source's ground truth, or full-resolution YuNet
+detections for recordings. For each analysis size (long side in px) we report
+mean detect() latency, recall / precision of the rescaled boxes against the
+reference (IoU >= 0.5) and mean IoU of matches.
+
+Examples:
+    python bench_analysis_size.py --source synthetic --width 1920 --height 1080
+    python bench_analysis_size.py --source file --path output/recording_20260112_110524.avi
+"""
+import argparse
+import time
+import numpy as np
+
+from capture.sources import create_source, find_recordings
+from visionai.face_detect import FaceDetector
+
+
+def iou(a, b):
+    ax1, ay1, aw, ah = a[:4]
+    bx1, by1, bw, bh = b[:4]
+    ix = max(0.0, min(ax1 + aw, bx1 + bw) - max(ax1, bx1))
+    iy = max(0.0, min(ay1 + ah, by1 + bh) - max(ay1, by1))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match(reference, faces, threshold=0.5):
+    """Greedy IoU matching. Returns (matched, ious)."""
+    if reference is None or faces is None:
+        return 0, []
+    used = set()
+    ious = []
+    for ref in reference:
+        best, best_j = 0.0, None
+        for j, face in enumerate(faces):
+            if j in used:
+                continue
+            v = iou(ref, face)
+            if v > best:
+                best, best_j = v, j
+        if best_j is not None and best >= threshold:
+            used.add(best_j)
+            ious.append(best)
+    return len(ious), ious
+
+
+def load_frames(args):
+    if args.source == "synthetic":
+        spec = {"type": "synthetic", "width": args.width, "height": args.height,
+                "fps": None, "num_faces": args.faces, "seed": 0}
+    else:
+        path = args.path or (find_recordings() or [None])[-1]
+        if path is None:
+            raise SystemExit("No recordings found in output/ (pass --path)")
+        spec = {"type": "file", "path": path, "rate": "fast", "loop": False}
+
+    source = create_source(spec)
+    frames = []
+    truth = [] if args.source == "synthetic" else None
+    # Spread samples out a bit so consecutive near-identical frames don't dominate
+    while len(frames) < args.frames:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+        if truth is not None:
+            truth.append(np.array(source.last_boxes, dtype=np.float32).reshape(-1, 4))
+        for _ in range(args.stride - 1):
+            source.read()
+    source.release()
+    return frames, truth
+
+
+def time_detect(detector, frames, analysis_size):
+    results = []
+    start = time.perf_counter()
+    for frame in frames:
+        results.append(detector.detect(frame, analysis_size=analysis_size))
+    return (time.perf_counter() - start) / max(1, len(frames)), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YuNet cost vs accuracy per analysis size")
+    parser.add_argument("--source", choices=["synthetic", "file"], default="synthetic")
+    parser.add_argument("--path")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--faces", type=int, default=3)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--stride", type=int, default=3)
+    parser.add_argument("--sizes", default="960,640,480,320,240,160",
+                        help="Comma separated analysis long sides")
+    args = parser.parse_args()
+
+    frames, truth = load_frames(args)
+    if not frames:
+        raise SystemExit("No frames to benchmark")
+    h, w = frames[0].shape[:2]
+    detector = FaceDetector()
+
+    # Warm up + full resolution run (the reference when there's no ground truth)
+    detector.detect(frames[0])
+    ref_ms, full_results = time_detect(detector, frames, None)
+    reference = truth if truth is not None else full_results
+    ref_total = sum(len(r) for r in reference if r is not None)
+
+    print(f"\n{len(frames)} frames @ {w}x{h}, {ref_total} reference faces "
+          f"({'ground truth' if truth is not None else 'full-res detections'})")
+    print(f"{'size':>8} {'ms/frame':>10} {'speedup':>8} {'recall':>8} {'precision':>10} {'mean IoU':>9}")
+
+    for size in [None] + [int(s) for s in args.sizes.split(",") if s.strip()]:
+        if size is not None and size >= max(w, h):
+            continue
+        if size is None:
+            ms, results = ref_ms, full_results
+        else:
+            detector.detect(frames[0], analysis_size=size)
+            ms, results = time_detect(detector, frames, size)
+
+        matched, ious, found = 0, [], 0
+        for ref, res in zip(reference, results):
+            m, v = match(ref, res)
+            matched += m
+            ious.extend(v)
+            found += 0 if res is None else len(res)
+
+        recall = matched / ref_total if ref_total else 1.0
+        precision = matched / found if found else 1.0
+        mean_iou = float(np.mean(ious)) if ious else 0.0
+        print(f"{size or 'full':>8} {ms * 1000:>10.2f} {ref_ms / ms:>8.2f} {recall:>8.2f} {precision:>10.2f} {mean_iou:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+AutoDirector parameter sweep over session tick logs (fusion/simulator.py).
+
+Sessions are the recording_<ts>_ticks.jsonl files the engine writes next to
+each recording; without any, synthetic conversations are generated. Each
+session is first replayed with its logged parameters (live agreement shows
+that the replay reproduces the live cuts), then every combination of the
+grid is simulated over all sessions, faster than real time and in parallel,
+and the best combinations by --sort are listed. With --cost, the cost of one
+AutoDirector.update() is measured against the number of cameras instead.
+
+Examples:
+    python bench_director.py
+    python bench_director.py output/recording_*_ticks.jsonl --sort time_on_speaker --max-cpm 4
+    python bench_director.py --grid MIN_SHOT_DURATION=2,3,4,6 --grid REACTION_THRESHOLD=1,2,3 --csv sweep.csv
+    python bench_director.py --cost 2,4,8,16,32
+"""
+import argparse
+import csv
+import glob
+import time
+
+import numpy as np
+
+from fusion.director import AutoDirector
+from fusion.simulator import load_session, prepare, simulate, summarize, sweep, synthetic_session, grid_combinations
+
+DEFAULT_GRID = {
+    "MIN_SHOT_DURATION": [2.0, 3.0, 4.0, 6.0],
+    "MAX_SHOT_DURATION": [10.0, 15.0, 25.0],
+    "REACTION_THRESHOLD": [1.0, 2.0, 3.0],
+    "FACE_LOSS_THRESHOLD": [1.0, 2.0],
+    "REACTION_MIN_SHOT": [1.0, 2.0, 4.0],
+}
+
+
+def parse_grid(entries):
+    grid = {}
+    for entry in entries:
+        name, _, values = entry.partition("=")
+        if name not in AutoDirector.PARAMS or not values:
+            raise SystemExit(f"--grid expects NAME=v1,v2,... with NAME one of {AutoDirector.PARAMS}")
+        grid[name] = [float(v) for v in values.split(",")]
+    return grid
+
+
+def pct(value):
+    return "-" if value is None else f"{value * 100:.1f}%"
+
+
+def update_cost(cameras, seconds=120.0, repeat=3):
+    """
+    Per-tick seconds over a synthetic session with that many cameras: mean and
+    p99 of update() (per-camera dicts, as the engine calls it), and the mean of
+    decide() on the session's prepared feature arrays (as the simulator does)
+    """
+    header, ticks = synthetic_session(seconds, cameras, seed=cameras)
+    features = prepare(header, ticks)["features"]
+    updates, decides = [], []
+    for _ in range(repeat):
+        director = AutoDirector({c: {} for c in range(cameras)}, clock=lambda: 0.0, verbose=False)
+        director.set_state(header["state"])
+        for tick in ticks:
+            start = time.perf_counter()
+            director.update(tick["speaking"], tick["faces"], tick["volume"], tick["emotions"], now=tick["t"])
+            updates.append(time.perf_counter() - start)
+        director = AutoDirector({c: {} for c in range(cameras)}, clock=lambda: 0.0, verbose=False)
+        director.set_state(header["state"])
+        for tick, row in zip(ticks, features):
+            start = time.perf_counter()
+            director.decide(tick["t"], row)
+            decides.append(time.perf_counter() - start)
+    return float(np.mean(updates)), float(np.percentile(updates, 99)), float(np.mean(decides))
+
+
+def print_cost(counts):
+    print(f"{'cameras':>8} {'update mean':>12} {'p99':>9} {'decide(arrays)':>15}")
+    for cameras in counts:
+        mean, p99, decide = update_cost(cameras)
+        print(f"{cameras:>8} {mean * 1e6:>10.1f}us {p99 * 1e6:>7.1f}us {decide * 1e6:>13.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep AutoDirector parameters over recorded or synthetic sessions")
+    parser.add_argument("logs", nargs="*", help="Tick logs (globs allowed); default: synthetic sessions")
+    parser.add_argument("--grid", action="append", default=[], help="NAME=v1,v2,... (repeatable, replaces the default grid)")
+    parser.add_argument("--sort", default="time_on_speaker",
+                        choices=["time_on_speaker", "cuts_per_minute", "mean_shot", "reaction_shots", "short_shots"])
+    parser.add_argument("--ascending", action="store_true", help="Smallest --sort value first")
+    parser.add_argument("--max-cpm", type=float, default=None, help="Drop combinations cutting more often than this per minute")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument("--sessions", type=int, default=4, help="Synthetic sessions when no logs are given")
+    parser.add_argument("--seconds", type=float, default=600.0, help="Length of each synthetic session")
+    parser.add_argument("--cameras", type=int, default=3, help="Cameras in each synthetic session")
+    parser.add_argument("--csv", default=None, help="Write every combination's metrics here")
+    parser.add_argument("--cost", default=None, help="Only time update() for these camera counts, e.g. 2,4,8,16")
+    args = parser.parse_args()
+
+    if args.cost:
+        print_cost([int(c) for c in args.cost.split(",")])
+        return
+
+    paths = sorted(p for pattern in args.logs for p in glob.glob(pattern))
+    if args.logs and not paths:
+        raise SystemExit("No tick logs matched")
+    if paths:
+        sessions = [load_session(p) for p in paths]
+        names = paths
+    else:
+        sessions = [synthetic_session(args.seconds, args.cameras, seed=s) for s in range(args.sessions)]
+        names = [f"synthetic #{s} ({args.cameras} cams)" for s in range(args.sessions)]
+    ticks = sum(len(t) for _, t in sessions)
+    duration = sum(t[-1]["t"] - t[0]["t"] for _, t in sessions if t)
+
+    print(f"{len(sessions)} session(s), {ticks} ticks, {duration / 60:.1f} min")
+    print(f"\n{'session':<48} {'cuts/min':>9} {'mean shot':>10} {'on speaker':>11} {'reactions':>10} {'live agree':>11}")
+    for name, (header, session_ticks) in zip(names, sessions):
+        prepared = prepare(header, session_ticks) # Once per session (per worker in the sweep)
+        start = time.perf_counter()
+        _, raw = simulate(header, session_ticks, prepared=prepared)
+        elapsed = time.perf_counter() - start
+        m = summarize(raw)
+        print(f"{name[-48:]:<48} {m['cuts_per_minute']:>9.2f} {m['mean_shot']:>9.1f}s "
+              f"{pct(m['time_on_speaker']):>11} {m['reaction_shots']:>10} {pct(m['live_agreement']):>11}")
+    print(f"Replay speed: {len(session_ticks) / elapsed:,.0f} ticks/s "
+          f"({raw['duration'] / elapsed:,.0f}x real time, one process)")
+
+    grid = parse_grid(args.grid) if args.grid else DEFAULT_GRID
+    combos = len(grid_combinations(grid))
+    start = time.perf_counter()
+    results = sweep(sessions, grid, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"\nSweep: {combos} combinations x {len(sessions)} session(s) in {elapsed:.1f}s "
+          f"({combos * ticks / elapsed:,.0f} ticks/s)")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            metric_names = list(results[0][1]) if results else []
+            writer.writerow(list(grid) + metric_names)
+            for params, metrics in results:
+                writer.writerow([params[n] for n in grid] + [metrics[n] for n in metric_names])
+        print(f"📄 Wrote {args.csv}")
+
+    if args.max_cpm is not None:
+        results = [r for r in results if r[1]["cuts_per_minute"] <= args.max_cpm]
+    results = [r for r in results if r[1][args.sort] is not None]
+    results.sort(key=lambda r: r[1][args.sort], reverse=not args.ascending)
+
+    print(f"\nTop {min(args.top, len(results))} by {args.sort}" + (f" (<= {args.max_cpm} cuts/min)" if args.max_cpm else ""))
+    names = list(grid)
+    print("".join(f"{n:>20}" for n in names) + f" {'cuts/min':>9} {'mean shot':>10} {'on speaker':>11} {'reactions':>10} {'short':>6}")
+    for params, m in results[:args.top]:
+        print("".join(f"{params[n]:>20g}" for n in names)
+              + f" {m['cuts_per_minute']:>9.2f} {m['mean_shot']:>9.1f}s {pct(m['time_on_speaker']):>11}"
+              f" {m['reaction_shots']:>10} {m['short_shots']:>6}")
+
+
+if __name__ == "__main__":
+    main()
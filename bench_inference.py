@@ -0,0 +1,120 @@
+"""
+Per-model inference latency for each OpenCV DNN configuration.
+
+For every (backend, target) pair this OpenCV build supports and every thread
+budget, the face detector (YuNet) and the emotion model (FERPlus, if present)
+are loaded and timed: the first (cold) call, then the mean / p95 of warm calls.
+Copy the fastest row into DirectorEngine.INFERENCE.
+
+Examples:
+    python bench_inference.py
+    python bench_inference.py --threads 1,2,4 --size 480 --batch 4
+"""
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+
+from capture.sources import SyntheticSource
+from visionai.face_detect import FaceDetector, make_analysis_frame
+from visionai.emotion_detect import EmotionDetector
+from visionai.inference import available_configs
+
+
+def time_calls(fn, iterations):
+    start = time.perf_counter()
+    fn()
+    cold = time.perf_counter() - start
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return cold, float(np.mean(times)), float(np.percentile(times, 95))
+
+
+def print_row(model, backend, target, threads, load, cold, mean, p95):
+    print(f"{model:>8} {backend:>9} {target:>12} {str(threads):>8} {load * 1000:>8.1f} "
+          f"{cold * 1000:>9.2f} {mean * 1000:>9.2f} {p95 * 1000:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenCV DNN latency per backend/target/thread budget")
+    parser.add_argument("--configs", help="Comma separated backend:target pairs (default: all available)")
+    parser.add_argument("--threads", default=f"default,1,{os.cpu_count() or 1}",
+                        help="Comma separated cv2.setNumThreads budgets ('default' = leave as is)")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--size", type=int, default=320, help="Analysis long side the detector runs at")
+    parser.add_argument("--batch", type=int, default=2, help="Faces per emotion forward pass")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.configs:
+        configs = [tuple(c.split(":")) for c in args.configs.split(",") if c.strip()]
+    else:
+        configs = available_configs()
+    budgets = []
+    for t in args.threads.split(","):
+        budget = None if t.strip() == "default" else int(t)
+        if t.strip() and budget not in budgets:
+            budgets.append(budget)
+    default_threads = cv2.getNumThreads()
+
+    source = SyntheticSource(args.width, args.height, fps=None, num_faces=2, seed=0)
+    _, frame = source.read()
+    frame, scale = make_analysis_frame(frame.copy(), args.size)
+    # Emotion input: the synthetic faces, preprocessed like EmotionDetector does
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    crops = [cv2.resize(gray[int(y):int(y + h), int(x):int(x + w)], (64, 64))
+             for x, y, w, h in np.array(source.last_boxes, dtype=np.float32) * scale]
+    crops = (crops * args.batch)[:args.batch]
+
+    emotion_available = True
+    print(f"\nAnalysis frame {frame.shape[1]}x{frame.shape[0]}, emotion batch {args.batch}, {args.iterations} iterations")
+    print(f"{'model':>8} {'backend':>9} {'target':>12} {'threads':>8} {'load ms':>8} "
+          f"{'cold ms':>9} {'mean ms':>9} {'p95 ms':>9}")
+
+    best = {}
+    for backend, target in configs:
+        for threads in budgets:
+            cv2.setNumThreads(default_threads) # 'default' rows must not inherit the previous budget
+            try:
+                start = time.perf_counter()
+                detector = FaceDetector(backend=backend, target=target, threads=threads)
+                load = time.perf_counter() - start
+                cold, mean, p95 = time_calls(lambda: detector.detect(frame), args.iterations)
+            except Exception as e:
+                print(f"{'face':>8} {backend:>9} {target:>12} {str(threads):>8}  failed: {e}")
+                continue
+            print_row("face", backend, target, threads, load, cold, mean, p95)
+            if mean < best.get("face", (None, float("inf")))[1]:
+                best["face"] = ((backend, target, threads), mean)
+
+            if not emotion_available:
+                continue
+            try:
+                start = time.perf_counter()
+                emotion = EmotionDetector(backend=backend, target=target, threads=threads)
+                load = time.perf_counter() - start
+            except Exception as e:
+                print(f"Emotion model unavailable, skipping it: {e}")
+                emotion_available = False
+                continue
+            try:
+                cold, mean, p95 = time_calls(lambda: emotion.predict_batch(crops), args.iterations)
+            except Exception as e:
+                print(f"{'emotion':>8} {backend:>9} {target:>12} {str(threads):>8}  failed: {e}")
+                continue
+            print_row("emotion", backend, target, threads, load, cold, mean, p95)
+            if mean < best.get("emotion", (None, float("inf")))[1]:
+                best["emotion"] = ((backend, target, threads), mean)
+
+    print()
+    for model, ((backend, target, threads), mean) in best.items():
+        print(f"Fastest {model}: {{\"backend\": \"{backend}\", \"target\": \"{target}\", \"threads\": {threads}}} ({mean * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
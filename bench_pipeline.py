@@ -0,0 +1,129 @@
+"""
+Headless whole-pipeline benchmark.
+
+Runs DirectorEngine.run end to end (detection, emotion, director, render, encode)
+against replayed recordings or synthetic cameras, so throughput can be measured
+on machines without cameras.
+
+Examples:
+    python bench_pipeline.py --source synthetic --cameras 2 --seconds 20
+    python bench_pipeline.py --source file --rate fast
+    python bench_pipeline.py --source synthetic --cameras 4 --width 1920 --height 1080 --capture process
+    python bench_pipeline.py --source file --path output/recording_20260112_110524.avi --rate fixed --fps 30
+    python bench_pipeline.py --width 3840 --height 2160 --faces 6 --face-size 0.03,0.05 --tiled
+    python bench_pipeline.py --audio synthetic --seconds 30
+    python bench_pipeline.py --audio wav --audio-path talk_host.wav,talk_guest.wav
+    python bench_pipeline.py --audio synthetic --delay 2 --seconds 30   # delayed broadcast with hindsight cuts
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+from state import AppState
+from engine import DirectorEngine
+from capture.sources import find_recordings
+
+
+def build_sources(args):
+    sources = []
+    if args.source == "synthetic":
+        fps = None if args.rate == "fast" else args.fps
+        for i in range(args.cameras):
+            sources.append({"type": "synthetic", "width": args.width, "height": args.height,
+                            "fps": fps, "num_faces": args.faces, "seed": i,
+                            "face_size": [float(v) for v in args.face_size.split(",")]})
+    else:
+        paths = [args.path] if args.path else find_recordings()
+        if not paths:
+            raise SystemExit("No recordings found in output/ (pass --path)")
+        for i in range(args.cameras):
+            spec = {"type": "file", "path": paths[i % len(paths)], "rate": args.rate}
+            if args.rate == "fixed":
+                spec["fps"] = args.fps
+            sources.append(spec)
+    return sources
+
+
+def build_audio_sources(args):
+    """Per-camera "audio_source" specs (None = no mic, as on a machine without devices)"""
+    if args.audio == "none":
+        return [None] * args.cameras
+    if args.audio == "synthetic":
+        # Different voice and talk/silence script per camera
+        return [{"type": "synthetic", "seed": i, "pitch": 110.0 + 60.0 * i} for i in range(args.cameras)]
+    if not args.audio_path:
+        raise SystemExit("--audio wav needs --audio-path")
+    paths = args.audio_path.split(",")
+    return [{"type": "wav", "path": paths[i % len(paths)]} for i in range(args.cameras)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless DirectorEngine throughput benchmark")
+    parser.add_argument("--source", choices=["synthetic", "file"], default="synthetic")
+    parser.add_argument("--path", help="Recording to replay (default: every output/recording_*.avi)")
+    parser.add_argument("--rate", choices=["native", "fixed", "fast"], default="native")
+    parser.add_argument("--fps", type=float, default=30.0, help="Rate for 'fixed' replay and synthetic cameras")
+    parser.add_argument("--cameras", type=int, default=2)
+    parser.add_argument("--faces", type=int, default=2, help="Faces per synthetic camera")
+    parser.add_argument("--face-size", default="0.22,0.32",
+                        help="Synthetic face height range as a fraction of the shorter frame side")
+    parser.add_argument("--tiled", action="store_true", help="Use tiled face detection on every camera")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--capture", choices=["thread", "process"], default="thread",
+                        help="Capture backend (process = shared-memory capture process per camera)")
+    parser.add_argument("--audio", choices=["none", "synthetic", "wav"], default="none",
+                        help="Per-camera audio input driving the VADs")
+    parser.add_argument("--audio-path", help="Comma separated WAV files for --audio wav (one per camera, cycled)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Delayed broadcast: program delay in seconds (0 = live)")
+    parser.add_argument("--delay-quality", type=int, default=85, help="JPEG quality of the delay buffers")
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--target-fps", type=float, default=None, help="Override the engine's output frame rate cap")
+    args = parser.parse_args()
+
+    state = AppState()
+    state.broadcast_delay = args.delay
+    state.delay_quality = args.delay_quality
+    engine = DirectorEngine(state)
+    engine.CAMERA_CONFIG = {
+        idx: {"role": f"BENCH {idx}", "mic_patterns": [], "source": spec, "tiling": args.tiled,
+              "audio_source": audio}
+        for idx, (spec, audio) in enumerate(zip(build_sources(args), build_audio_sources(args)))
+    }
+
+    engine.CAPTURE_MODE = args.capture
+    if args.target_fps:
+        engine.TARGET_FPS = args.target_fps
+
+    engine.initialize()
+
+    frames_out = [0]
+    def on_frame(frame):
+        frames_out[0] += 1
+
+    state.running = True
+    timer = threading.Timer(args.seconds, engine.stop)
+    timer.start()
+
+    start = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine.run(frame_callback=on_frame, output_dir=tmp)
+    elapsed = time.time() - start
+    timer.cancel()
+
+    print("\n--- Pipeline Benchmark ---")
+    print(f"Source:   {args.source} ({args.rate}), {args.cameras} camera(s) @ {args.width}x{args.height}, {args.capture} capture")
+    print(f"Duration: {elapsed:.2f}s")
+    print(f"Frames:   {frames_out[0]}")
+    print(f"Output:   {frames_out[0] / max(elapsed, 1e-9):.2f} FPS")
+    for idx, result in sorted(engine.analysis.latest().items()):
+        print(f"Faces cam {idx}: {0 if result.faces is None else len(result.faces)} in the last analysed frame")
+    for idx, gate in sorted(engine.analysis.motion_gates.items()):
+        print(f"Motion gate cam {idx}: skipped {gate.skips}/{gate.checks} analysis passes ({gate.hit_rate * 100:.1f}%)")
+    if args.audio != "none":
+        print(f"Audio:    {engine.audio.rounds} analysis rounds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+VAD accuracy and cost on a labelled synthetic set (audioai/synthetic.py).
+
+Every clip is fed as its own mic into one AudioAnalyzer (one 30 ms block per
+mic per round, as the PortAudio callbacks would) for each VAD mode and device
+sample rate. Reported per clip:
+  speech clips  - recall: share of speech hops flagged as speaking
+  all clips     - false alarms: share of hops flagged as speaking that are
+                  more than silence_hold_time after any speech
+Then a two-person room with mic bleed (person A also close to B's mic): how
+often each mic dominates while A, B or both talk, with the bleed estimator
+(audioai/bleed.py) off and on. Then onset / release latency on a scripted
+talk/silence source (audioai/sources.py, stepped as fast as possible). Last,
+the analyzer's CPU cost per mic, as a share of one core.
+
+Examples:
+    python bench_vad.py
+    python bench_vad.py --rates 16000,44100,48000 --threshold 0.1 --mics 1,4,8
+"""
+import argparse
+import time
+from types import SimpleNamespace
+import numpy as np
+
+from audioai.analysis import AudioAnalyzer
+from audioai.vad import VoiceActivityDetector
+from audioai import synthetic
+from audioai.sources import SyntheticAudioSource
+from state import AppState
+
+
+def feed(vad, chunk, t):
+    """One callback block captured at source time t (the clock process(now=...) runs on)"""
+    vad._audio_callback(chunk, len(chunk), SimpleNamespace(inputBufferAdcTime=t), None)
+
+
+def run_set(clips, sample_rate, mode, threshold, hold):
+    analyzer = AudioAnalyzer()
+    block = int(round(sample_rate * analyzer.hop_duration))
+    vads = []
+    for key, _ in enumerate(clips):
+        vad = VoiceActivityDetector(sample_rate=sample_rate, speech_threshold=threshold,
+                                    silence_hold_time=hold, mode=mode, analyzer=analyzer, key=key)
+        analyzer.add(key, vad)
+        vads.append(vad)
+
+    hops = min(len(signal) for _, signal, _ in clips) // block
+    speaking = np.zeros((len(clips), hops), dtype=bool)
+    for h in range(hops):
+        for vad, (_, signal, _) in zip(vads, clips):
+            feed(vad, signal[h * block:(h + 1) * block, None], h * analyzer.hop_duration)
+        analyzer.process(now=(h + 1) * analyzer.hop_duration)
+        snapshot = analyzer.latest()
+        speaking[:, h] = [snapshot.speaking[k] for k in range(len(clips))]
+    return speaking, block, hops
+
+
+def score(labels, speaking, block, hops, hold_hops):
+    speech = labels[:hops * block].reshape(hops, block).mean(axis=1) > 0.5
+    # Hops within the hangover after speech are expected to still read "speaking"
+    near = np.convolve(speech, np.ones(hold_hops + 1))[:hops] > 0
+    recall = speaking[speech].mean() if speech.any() else None
+    false_alarm = speaking[~near].mean() if (~near).any() else 0.0
+    return recall, false_alarm
+
+
+def delayed(x, samples):
+    return np.concatenate([np.zeros(samples, dtype=np.float32), x[:-samples]])
+
+
+def bench_bleed(sample_rate, threshold, bleed, duration=8.0):
+    """{scenario: (share of A's speech hops mic 0 dominates, share of B's speech hops mic 1 dominates, ...)}"""
+    rng = np.random.default_rng(2)
+    a, a_labels = synthetic.speech(duration, sample_rate, rng, pitch=120)
+    b, b_labels = synthetic.speech(duration, sample_rate, rng, pitch=200, level=0.035)
+    ms = sample_rate // 1000
+    results = {}
+    for name, a_on, b_on in (("A talks", 1, 0), ("B talks", 0, 1), ("both talk", 1, 1)):
+        # A sits close to B's mic (gain 0.8), B is quieter and further from A's mic
+        mic0 = a * a_on + 0.3 * delayed(b * b_on, 4 * ms)
+        mic1 = 0.8 * delayed(a * a_on, 2 * ms) + b * b_on
+        analyzer = AudioAnalyzer(bleed=bleed)
+        block = int(round(sample_rate * analyzer.hop_duration))
+        vads = []
+        for key, signal in enumerate((mic0, mic1)):
+            vad = VoiceActivityDetector(sample_rate=sample_rate, speech_threshold=threshold,
+                                        analyzer=analyzer, key=key)
+            analyzer.add(key, vad)
+            vads.append(vad)
+        hops = len(mic0) // block
+        dominant = np.zeros((2, hops), dtype=bool)
+        for h in range(hops):
+            for vad, signal in zip(vads, (mic0, mic1)):
+                feed(vad, signal[h * block:(h + 1) * block, None], h * analyzer.hop_duration)
+            analyzer.process(now=(h + 1) * analyzer.hop_duration)
+            dominant[:, h] = [analyzer.latest().dominant[k] for k in range(2)]
+        a_speech = a_labels[:hops * block].reshape(hops, block).mean(axis=1) > 0.5
+        b_speech = b_labels[:hops * block].reshape(hops, block).mean(axis=1) > 0.5
+        silent_a = ~a_speech if a_on else np.ones(hops, dtype=bool)
+        silent_b = ~b_speech if b_on else np.ones(hops, dtype=bool)
+        results[name] = (
+            dominant[0][a_speech].mean() if a_on else None,   # A credited while A talks
+            dominant[1][b_speech].mean() if b_on else None,   # B credited while B talks
+            dominant[1][silent_b & a_speech].mean() if a_on else None,  # B credited for A's speech
+            dominant[0][silent_a & b_speech].mean() if b_on else None,  # A credited for B's speech
+        )
+    return results
+
+
+def bench_latency(sample_rate, mode, threshold, hold, seconds=120.0):
+    """Onset / release delays (s) of "speaking" against the script's speech spans"""
+    analyzer = AudioAnalyzer(bleed=False)
+    vad = VoiceActivityDetector(sample_rate=sample_rate, speech_threshold=threshold, silence_hold_time=hold,
+                                mode=mode, analyzer=analyzer)
+    analyzer.add(vad.key, vad)
+    source = SyntheticAudioSource(sample_rate, int(sample_rate * vad.chunk_duration), vad._audio_callback,
+                                  rate="fast", loop=False, seed=5, duration=seconds)
+    times, speaking = [], []
+    while source.step():
+        analyzer.process(now=source.time)
+        times.append(source.time)
+        speaking.append(analyzer.latest().speaking[vad.key])
+    times, speaking = np.array(times), np.array(speaking)
+
+    onsets, releases, missed = [], [], 0
+    for i, (start, end) in enumerate(source.talk_spans):
+        next_start = source.talk_spans[i + 1][0] if i + 1 < len(source.talk_spans) else times[-1]
+        on = np.flatnonzero(speaking & (times >= start) & (times <= end))
+        if not len(on):
+            missed += 1
+            continue
+        onsets.append(times[on[0]] - start)
+        off = np.flatnonzero(~speaking & (times > end) & (times <= next_start))
+        if len(off):
+            releases.append(times[off[0]] - end)
+    return onsets, releases, missed, len(source.talk_spans)
+
+
+def bench_cost(mics, sample_rate, mode, bleed=True, rounds=300):
+    rng = np.random.default_rng(1)
+    analyzer = AudioAnalyzer(bleed=bleed)
+    block = int(round(sample_rate * analyzer.hop_duration))
+    signal, _ = synthetic.speech(rounds * analyzer.hop_duration + 1, sample_rate, rng)
+    vads = []
+    for key in range(mics):
+        vad = VoiceActivityDetector(sample_rate=sample_rate, mode=mode, analyzer=analyzer, key=key)
+        analyzer.add(key, vad)
+        vads.append(vad)
+    elapsed = 0.0
+    for h in range(rounds):
+        chunk = signal[h * block:(h + 1) * block, None]
+        for vad in vads:
+            vad._audio_callback(chunk, block, None, None)
+        start = time.perf_counter()
+        analyzer.process()
+        elapsed += time.perf_counter() - start
+    per_round = elapsed / rounds
+    return per_round, per_round / analyzer.hop_duration / mics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VAD accuracy / cost on labelled synthetic audio")
+    parser.add_argument("--rates", default="16000,48000", help="Comma separated device sample rates")
+    parser.add_argument("--threshold", type=float, default=AppState().audio_threshold,
+                        help="Energy mode speech_threshold (default: the GUI's default)")
+    parser.add_argument("--hold", type=float, default=0.8, help="silence_hold_time")
+    parser.add_argument("--duration", type=float, default=8.0, help="Seconds per clip")
+    parser.add_argument("--mics", default="1,4,8", help="Mic counts for the cost measurement")
+    args = parser.parse_args()
+
+    modes = ("energy", "spectral")
+    for rate in [int(r) for r in args.rates.split(",")]:
+        clips = synthetic.labelled_set(rate, args.duration)
+        results = {}
+        for mode in modes:
+            speaking, block, hops = run_set(clips, rate, mode, args.threshold, args.hold)
+            hold_hops = int(np.ceil(args.hold / 0.03))
+            results[mode] = [score(labels, speaking[i], block, hops, hold_hops)
+                             for i, (_, _, labels) in enumerate(clips)]
+
+        print(f"\n{rate} Hz (energy threshold {args.threshold}, hold {args.hold}s)")
+        print(f"{'clip':<18}" + "".join(f"{m + ' recall':>17}{m + ' false':>16}" for m in modes))
+        for i, (name, _, _) in enumerate(clips):
+            row = f"{name:<18}"
+            for mode in modes:
+                recall, false_alarm = results[mode][i]
+                row += f"{'-' if recall is None else f'{recall * 100:.1f}%':>17}{false_alarm * 100:>15.1f}%"
+            print(row)
+
+    rate = int(args.rates.split(",")[-1])
+    print(f"\nMic bleed at {rate} Hz (energy mode): share of speech hops a mic dominates")
+    print(f"{'scenario':<11} {'bleed est.':>10} {'A on mic 0':>11} {'B on mic 1':>11} {'A on mic 1':>11} {'B on mic 0':>11}")
+    for bleed in (False, True):
+        for name, shares in bench_bleed(rate, args.threshold, bleed).items():
+            cells = "".join(f"{'-' if v is None else f'{v * 100:.0f}%':>12}" for v in shares)
+            print(f"{name:<11} {'on' if bleed else 'off':>10}{cells}")
+
+    print(f"\nLatency at {rate} Hz (scripted talk/silence, hold {args.hold}s)")
+    print(f"{'mode':>9} {'spans':>6} {'missed':>7} {'onset mean':>11} {'onset p95':>10} {'release mean':>13}")
+    for mode in modes:
+        onsets, releases, missed, spans = bench_latency(rate, mode, args.threshold, args.hold)
+        print(f"{mode:>9} {spans:>6} {missed:>7} {np.mean(onsets) * 1000:>9.0f}ms {np.percentile(onsets, 95) * 1000:>8.0f}ms "
+              f"{np.mean(releases) * 1000:>11.0f}ms")
+
+    print(f"\nAnalyzer cost (speech on every mic, {rate} Hz devices)")
+    print(f"{'mode':>9} {'bleed':>6} {'mics':>5} {'ms/round':>9} {'% core/mic':>11}")
+    for mode in modes:
+        for bleed in (False, True):
+            for mics in [int(m) for m in args.mics.split(",")]:
+                per_round, share = bench_cost(mics, rate, mode, bleed)
+                print(f"{mode:>9} {'on' if bleed else 'off':>6} {mics:>5} {per_round * 1000:>9.3f} {share * 100:>10.2f}%")
+
+
+if __name__ == "__main__":
+    main()
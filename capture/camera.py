@@ -1,10 +1,18 @@
 import cv2
+import numpy as np
 import time
 import threading
 
+from capture.sources import create_source
+from capture.frame_pool import FramePool, FrameLease
+
 class Camera:
-    def __init__(self, camera_id=0):
-        self.cap = cv2.VideoCapture(camera_id)
+    def __init__(self, camera_id=0, source=None, on_frame=None, pool_size=4):
+        # source: a FrameSource, a source spec dict/path (see create_source),
+        # or None for the live device at camera_id
+        if source is None or isinstance(source, (dict, str)):
+            source = create_source(source, camera_id)
+        self.cap = source
         if not self.cap.isOpened():
             raise RuntimeError(f"Failed to open camera {camera_id}")
         self.prev_time = 0
@@ -14,9 +22,31 @@ class Camera:
         self.ret = False
         self.frame = None
         self.lock = threading.Lock()
+        # Signalled every time a new frame is published (see read_new)
+        self.new_frame = threading.Condition(self.lock)
+        # Optional hook (e.g. threading.Event.set) so one consumer can wait on many cameras
+        self.on_frame = on_frame
+        
+        # Every successfully captured frame gets a monotonically increasing
+        # sequence number and its capture time (time.monotonic() at exposure,
+        # i.e. read time minus the source's latency estimate).
+        self.seq = 0
+        self.timestamp = None
+        self.latency = 0.0
+        self.last_read_seq = 0
+        
+        # Frames are captured into a ring of preallocated buffers instead of a
+        # fresh ndarray per read. self.buffer is the published one. read(),
+        # read_stamped() and read_new() return a copy the caller may keep;
+        # lease() / lease_new() give zero-copy access until released.
+        self.pool = FramePool(pool_size)
+        self.buffer = None
+        self.frame_format = None # (shape, dtype) once the first frame arrived
+        self.scratch = None      # Sink for frames we have to drop
+        self.dropped_frames = 0
         
         # Read first frame to ensure we have something
-        self.ret, self.frame = self.cap.read()
+        self._capture()
             
         self.thread = threading.Thread(target=self._update, args=())
         self.thread.daemon = True
@@ -27,24 +57,120 @@ class Camera:
             if self.stopped:
                 break
                 
-            ret, frame = self.cap.read()
-            
-            with self.lock:
-                self.ret = ret
-                self.frame = frame
+            self._capture()
             
             # Small sleep to yield CPU if camera is slow, 
             # though usually read() blocks so this might be redundant but safe.
             # time.sleep(0.001) 
 
+    def _capture(self):
+        buf = None
+        if self.frame_format is not None:
+            buf = self.pool.acquire(*self.frame_format)
+            if buf is None and self.scratch is None:
+                self.scratch = np.empty(*self.frame_format)
+        target = buf.array if buf is not None else self.scratch
+
+        ret, frame = self.cap.read(target)
+        self.latency = getattr(self.cap, "latency", 0.0)
+        timestamp = time.monotonic() - self.latency
+
+        if not ret:
+            if buf is not None:
+                buf.release()
+            self._publish(False, None, timestamp)
+            return
+
+        if buf is None and self.frame_format is not None:
+            # Every buffer is still leased by a slow reader: drop this frame
+            # rather than allocating a new one.
+            self.dropped_frames += 1
+            return
+
+        if frame is not target:
+            # First frame, or the source changed resolution / couldn't fill
+            # our buffer in place. Adopt the new format (one-off copy).
+            self.frame_format = (frame.shape, frame.dtype)
+            self.scratch = None
+            if buf is not None:
+                buf.release()
+            buf = self.pool.acquire(*self.frame_format)
+            if buf is None:
+                self.dropped_frames += 1
+                return
+            np.copyto(buf.array, frame)
+
+        self._publish(True, buf, timestamp)
+
+    def _publish(self, ret, buf, timestamp):
+        old = None
+        with self.new_frame:
+            self.ret = ret
+            if ret:
+                # The writer's reference on buf becomes the "published" reference
+                old = self.buffer
+                self.buffer = buf
+                self.frame = buf.array
+                self.seq += 1
+                self.timestamp = timestamp
+            self.new_frame.notify_all()
+        
+        if old is not None:
+            old.release()
+        if ret and self.on_frame:
+            self.on_frame()
+
     def read(self):
+        """Returns (ret, frame) with a copy of the latest frame (pooled buffers are recycled)"""
+        ret, frame, _, _ = self.read_stamped()
+        return ret, frame
+
+    def read_stamped(self):
+        """Returns (ret, frame, seq, timestamp) for the latest frame without blocking"""
+        return self._copied(self.lease())
+
+    def read_new(self, timeout=None, last_seq=None):
+        """
+        Blocks until a frame newer than last_seq exists (default: the last frame
+        handed out by read_new) and returns (ret, frame, seq, timestamp).
+        On timeout or after release() returns (False, None, last_seq, None).
+        """
+        lease = self.lease_new(timeout, last_seq)
+        if lease is None:
+            return False, None, last_seq, None
+        return self._copied(lease)
+
+    def lease(self):
+        """Returns a FrameLease on the latest frame (frame is None if nothing captured yet)"""
         with self.lock:
-            # Return a copy to avoid threading race conditions if caller modifies it
-            # actually copy might be expensive, let's just return reference 
-            # as long as we don't write to it while reading.
-            # But standard practice for robustness might be copy or just return.
-            # For performance, returning reference is better.
-            return self.ret, self.frame
+            return FrameLease(self.buffer, self.ret, self.seq, self.timestamp)
+
+    def lease_new(self, timeout=None, last_seq=None):
+        """Like read_new() but returns a FrameLease, or None on timeout"""
+        with self.new_frame:
+            if not self._wait_fresh(timeout, last_seq):
+                return None
+            return FrameLease(self.buffer, self.ret, self.seq, self.timestamp)
+
+    @staticmethod
+    def _copied(lease):
+        # Copied outside the lock; the lease keeps the buffer from being refilled meanwhile
+        with lease:
+            frame = lease.frame.copy() if lease.frame is not None else None
+            return lease.ret, frame, lease.seq, lease.timestamp
+
+    def _wait_fresh(self, timeout, last_seq):
+        # Caller holds self.new_frame
+        if last_seq is None:
+            last_seq = self.last_read_seq
+        fresh = self.new_frame.wait_for(lambda: self.seq > last_seq or self.stopped, timeout)
+        if not fresh or self.seq <= last_seq:
+            return False
+        self.last_read_seq = self.seq
+        return True
+
+    def isOpened(self):
+        return self.cap.isOpened()
 
     def draw_fps(self, frame):
         current_time = time.time()
@@ -65,6 +191,8 @@ class Camera:
 
     def release(self):
         self.stopped = True
+        with self.new_frame:
+            self.new_frame.notify_all() # Wake up anyone blocked in read_new
         if self.thread.is_alive():
             self.thread.join()
         self.cap.release()
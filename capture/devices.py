@@ -0,0 +1,252 @@
+import cv2
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from capture.sources import live_camera_id
+
+# One place that knows which cameras and microphones are present.
+# Camera probes (the slow part: opening cv2.VideoCapture can take a second or
+# more per index on Windows) run concurrently with the audio query, each with
+# its own timeout. The result is cached on disk keyed by a fingerprint of the
+# hardware we can enumerate cheaply, so warm starts skip re-probing. Probes
+# run on daemon threads: one that never returns is abandoned and can't hold
+# up interpreter exit.
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".autodirector", "devices.json")
+CACHE_VERSION = 2 # 2: live sources are probed too
+
+
+def match_microphone(patterns, devices, host_apis):
+    """
+    Picks the input device for a camera. Patterns are tried in order; within a
+    pattern an MME device wins (most reliable on Windows), otherwise the first match.
+    Returns (device_index, device_info) or (None, None).
+    """
+    for pattern in patterns:
+        matches = [(i, dev) for i, dev in enumerate(devices)
+                   if dev['max_input_channels'] > 0 and pattern in dev['name']]
+
+        # Priority 1: MME
+        for i, dev in matches:
+            try:
+                if "MME" in host_apis[dev['hostapi']]['name']:
+                    return i, dev
+            except (IndexError, KeyError):
+                pass
+
+        # Priority 2: Any match
+        if matches:
+            return matches[0]
+    return None, None
+
+
+def probe_camera(idx):
+    """Opens camera idx and grabs one frame. Returns True if it works."""
+    try:
+        cap = cv2.VideoCapture(idx)
+        try:
+            if not cap.isOpened():
+                return False
+            ret, _ = cap.read()
+            return bool(ret)
+        finally:
+            cap.release()
+    except Exception:
+        return False
+
+
+class _Background:
+    """fn(*args) on a daemon thread"""
+
+    def __init__(self, fn, *args):
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, args=(fn, args), daemon=True)
+        self.thread.start()
+
+    def _run(self, fn, args):
+        try:
+            self.result = fn(*args)
+        except Exception as e:
+            self.error = e
+
+    def wait(self, timeout):
+        """fn's result (or its exception); TimeoutError if it is still running after timeout"""
+        self.thread.join(max(0.0, timeout))
+        if self.thread.is_alive():
+            raise TimeoutError
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class DeviceRegistry:
+    def __init__(self, camera_config, indices=range(4), probe_timeout=3.0,
+                 cache_path=DEFAULT_CACHE_PATH, max_cache_age=24 * 3600):
+        self.camera_config = camera_config
+        self.indices = list(indices)
+        self.probe_timeout = probe_timeout
+        self.cache_path = cache_path
+        self.max_cache_age = max_cache_age
+
+        self.audio_devices = []
+        self.host_apis = []
+        self.devices = {}       # {idx: entry}, see _build_entry
+        self.from_cache = False
+
+    def scan(self, use_cache=True):
+        """
+        Probes cameras and microphones (or loads them from the cache if the
+        hardware fingerprint is unchanged). Returns {idx: entry}.
+        """
+        start = time.time()
+        audio_probe = _Background(self._query_audio)
+        # Without a fresh cache on disk the cameras get probed anyway: start
+        # them next to the audio query instead of after it
+        cam_probes = None if use_cache and self._read_cache() is not None else self._probe_cameras()
+
+        # Audio enumeration is cheap and part of the fingerprint, so wait for it
+        # before deciding whether the camera probes are needed at all.
+        try:
+            self.audio_devices, self.host_apis = audio_probe.wait(self.probe_timeout)
+        except Exception as e:
+            print(f"Audio device query failed: {e!r}")
+            self.audio_devices, self.host_apis = [], []
+
+        fingerprint = self.fingerprint()
+        cached = self._load_cache(fingerprint) if use_cache else None
+        if cached is not None:
+            self.devices = cached
+            self.from_cache = True
+            print(f"Device registry loaded from cache ({time.time() - start:.2f}s)")
+            return self.devices
+        if cam_probes is None:
+            cam_probes = self._probe_cameras()
+
+        cam_found = {}
+        for idx in self.indices:
+            if idx not in cam_probes:
+                cam_found[idx] = True # File / synthetic source
+                continue
+            probe, deadline = cam_probes[idx]
+            try:
+                cam_found[idx] = probe.wait(deadline - time.time())
+            except TimeoutError:
+                # Left running on its daemon thread
+                print(f"Camera {idx} probe timed out after {self.probe_timeout:.1f}s")
+                cam_found[idx] = False
+
+        self.devices = {}
+        for idx in self.indices:
+            entry = self._build_entry(idx, cam_found[idx])
+            if entry is not None:
+                self.devices[idx] = entry
+        self.from_cache = False
+        self._save_cache(fingerprint)
+        print(f"Device scan finished in {time.time() - start:.2f}s")
+        return self.devices
+
+    def get(self, idx):
+        return self.devices.get(idx)
+
+    def _probe_cameras(self):
+        """Starts a probe per live camera: {idx: (probe, deadline)}"""
+        deadline = time.time() + self.probe_timeout
+        probes = {}
+        for idx in self.indices:
+            camera_id = live_camera_id(self.camera_config.get(idx, {}).get("source"), idx)
+            if camera_id is not None: # File / synthetic sources don't need a device probe
+                probes[idx] = (_Background(probe_camera, camera_id), deadline)
+        return probes
+
+    def invalidate(self):
+        """Drops the on-disk cache, e.g. after a cached device failed to open."""
+        try:
+            os.remove(self.cache_path)
+        except OSError:
+            pass
+
+    def _needs_mics(self):
+        """Whether any camera takes its audio from a device (has no "audio_source")"""
+        return any(config.get("audio_source") is None for config in self.camera_config.values())
+
+    def _query_audio(self):
+        if not self._needs_mics():
+            return [], [] # Headless runs work without PortAudio installed
+        import sounddevice as sd
+        return list(sd.query_devices()), list(sd.query_hostapis())
+
+    def _build_entry(self, idx, cam_found):
+        config = self.camera_config.get(idx, {})
+        mic_index, mic_info = (None, None)
+        if config:
+            mic_index, mic_info = match_microphone(config.get("mic_patterns", []), self.audio_devices, self.host_apis)
+        mic_found = mic_index is not None
+
+        # If no config, we only add if Camera is found (can't guess Mic)
+        if not (cam_found or (config and mic_found)):
+            return None
+        return {
+            'role': config.get('role', f"Camera {idx}"),
+            'cam_found': cam_found,
+            'mic_found': mic_found,
+            'mic_name': mic_info['name'] if mic_found else "Default/None",
+            'mic_index': mic_index,
+            'mic_samplerate': int(mic_info.get('default_samplerate', 16000)) if mic_found else None,
+        }
+
+    def fingerprint(self):
+        """Hash of everything that could change the scan result without probing cameras."""
+        audio = [(d['name'], d['hostapi'], d['max_input_channels'], d.get('default_samplerate'))
+                 for d in self.audio_devices]
+        config = {str(k): {"role": v.get("role"), "patterns": v.get("mic_patterns", []), "source": v.get("source")}
+                  for k, v in self.camera_config.items()}
+        payload = {
+            "platform": sys.platform,
+            "audio": audio,
+            "host_apis": [api['name'] for api in self.host_apis],
+            "config": config,
+            "indices": self.indices,
+            # Cheap camera enumeration where the OS offers it (Linux/V4L2)
+            "video_nodes": sorted(glob.glob("/dev/video*")),
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha1(blob).hexdigest()
+
+    def _read_cache(self):
+        """The cache file's contents if it is of this version and not expired, else None"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CACHE_VERSION:
+            return None
+        if self.max_cache_age is not None and time.time() - data.get("created", 0) > self.max_cache_age:
+            return None
+        return data
+
+    def _load_cache(self, fingerprint):
+        data = self._read_cache()
+        if data is None or data.get("fingerprint") != fingerprint:
+            return None
+        return {int(k): v for k, v in data.get("devices", {}).items()}
+
+    def _save_cache(self, fingerprint):
+        data = {
+            "version": CACHE_VERSION,
+            "fingerprint": fingerprint,
+            "created": time.time(),
+            "devices": {str(k): v for k, v in self.devices.items()},
+        }
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            print(f"Could not write device cache: {e}")
@@ -0,0 +1,94 @@
+import numpy as np
+import threading
+
+# A small ring of preallocated frame buffers that a capture thread fills in
+# place. Buffers are reference counted: the camera holds one reference on the
+# frame it currently publishes and every FrameLease holds another, so a buffer
+# only goes back into rotation once nobody is looking at it anymore.
+
+
+class FrameBuffer:
+    def __init__(self, pool, array):
+        self.pool = pool
+        self.array = array
+        self.refcount = 0
+
+    def retain(self):
+        with self.pool.lock:
+            self.refcount += 1
+
+    def release(self):
+        with self.pool.lock:
+            self.refcount -= 1
+            if self.refcount < 0:
+                raise RuntimeError("FrameBuffer released more times than it was retained")
+
+
+class FramePool:
+    def __init__(self, size=4):
+        # size: number of buffers per camera. One is being written, one is
+        # published; the rest cover readers that hold leases across a tick.
+        self.size = size
+        self.lock = threading.Lock()
+        self.buffers = []
+        self.shape = None
+        self.dtype = None
+        self.misses = 0 # acquire() calls that found every buffer in use
+
+    def acquire(self, shape, dtype=np.uint8):
+        """
+        Returns a free FrameBuffer (already retained once for the writer),
+        or None if every buffer is still leased.
+        """
+        with self.lock:
+            if shape != self.shape or dtype != self.dtype:
+                # Resolution changed: drop the free buffers, in-use ones are
+                # simply not recycled (they fail the shape check below).
+                self.buffers = [b for b in self.buffers if b.refcount > 0]
+                self.shape = shape
+                self.dtype = dtype
+
+            for buf in self.buffers:
+                if buf.refcount == 0 and buf.array.shape == shape:
+                    buf.refcount = 1
+                    return buf
+
+            if len(self.buffers) < self.size:
+                buf = FrameBuffer(self, np.empty(shape, dtype=dtype))
+                buf.refcount = 1
+                self.buffers.append(buf)
+                return buf
+
+            self.misses += 1
+            return None
+
+    def in_use(self):
+        with self.lock:
+            return sum(1 for b in self.buffers if b.refcount > 0)
+
+
+class FrameLease:
+    """
+    Read access to one captured frame. The buffer won't be refilled until
+    release() is called (or the `with` block exits). Releasing twice is a no-op.
+    """
+
+    def __init__(self, buffer, ret, seq, timestamp):
+        self.buffer = buffer
+        self.ret = ret
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = buffer.array if buffer is not None else None
+        if buffer is not None:
+            buffer.retain()
+
+    def release(self):
+        if self.buffer is not None:
+            self.buffer.release()
+            self.buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
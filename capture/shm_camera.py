@@ -0,0 +1,279 @@
+import numpy as np
+import time
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+from capture.camera import Camera
+
+# Process-per-camera capture. A child process owns the device and writes frames
+# straight into a multiprocessing.shared_memory ring; the engine process maps the
+# slots as numpy views (no copy, no pickling) and sees the same read()/lease()
+# surface as the threaded Camera, so DirectorEngine.run doesn't care which one
+# it got.
+#
+# Shared memory layout (int64 header, float64 timestamps, then frame slots):
+#   ints[0]                   latest published slot (-1 = none yet)
+#   ints[1]                   sequence number of the latest frame
+#   ints[2 : 2+S]             sequence number stored in each slot
+#   ints[2+S : 2+2S]          reader reference count per slot
+#   stamps[0 : S]             capture time (time.monotonic()) per slot
+#   stamps[S]                 the source's latency estimate (s)
+# Everything in the header is only touched while holding the shared lock.
+
+HEADER_ALIGN = 64
+
+
+def _layout(slots, frame_nbytes):
+    ints_bytes = 8 * (2 + 2 * slots)
+    stamps_offset = ints_bytes
+    data_offset = stamps_offset + 8 * (slots + 1)
+    data_offset = (data_offset + HEADER_ALIGN - 1) // HEADER_ALIGN * HEADER_ALIGN
+    return stamps_offset, data_offset, data_offset + slots * frame_nbytes
+
+
+class _SharedRing:
+    def __init__(self, shm, slots, shape, dtype):
+        self.shm = shm
+        self.slots = slots
+        dtype = np.dtype(dtype)
+        frame_nbytes = int(np.prod(shape)) * dtype.itemsize
+        stamps_offset, data_offset, _ = _layout(slots, frame_nbytes)
+
+        self.ints = np.ndarray((2 + 2 * slots,), dtype=np.int64, buffer=shm.buf)
+        self.stamps = np.ndarray((slots + 1,), dtype=np.float64, buffer=shm.buf, offset=stamps_offset)
+        self.frames = [
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=data_offset + i * frame_nbytes)
+            for i in range(slots)
+        ]
+
+    def refs(self, slot):
+        return self.ints[2 + self.slots + slot]
+
+    def add_ref(self, slot, delta):
+        self.ints[2 + self.slots + slot] += delta
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.ints = self.stamps = self.frames = None
+        self.shm.close()
+
+
+def _capture_main(camera_id, source_spec, slots, conn, lock, cond, stop_event):
+    """Child process: owns the capture device and fills the shared ring."""
+    from capture.sources import create_source
+
+    try:
+        source = create_source(source_spec, camera_id)
+        ret, frame = source.read() if source.isOpened() else (False, None)
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+    if not ret:
+        conn.send(("error", f"Failed to open camera {camera_id}"))
+        source.release()
+        return
+
+    conn.send(("format", frame.shape, frame.dtype.str))
+    # The parent creates and unlinks the segment; spawned children share the
+    # parent's resource tracker so attaching here doesn't take ownership.
+    ring = _SharedRing(shared_memory.SharedMemory(name=conn.recv()), slots, frame.shape, frame.dtype)
+    scratch = np.empty_like(frame)
+    seq = 0
+
+    def publish(slot, timestamp):
+        nonlocal seq
+        seq += 1
+        with cond:
+            ring.ints[2 + slot] = seq
+            ring.stamps[slot] = timestamp
+            ring.stamps[slots] = source.latency
+            ring.ints[0] = slot
+            ring.ints[1] = seq
+            cond.notify_all()
+
+    np.copyto(ring.frames[0], frame)
+    publish(0, time.monotonic() - source.latency)
+    conn.send(("ready",))
+
+    try:
+        while not stop_event.is_set():
+            # Pick a slot that is neither the latest frame nor leased by a reader
+            slot = None
+            with lock:
+                latest = ring.ints[0]
+                for i in range(slots):
+                    if i != latest and ring.refs(i) == 0:
+                        slot = i
+                        break
+
+            if slot is None:
+                # Readers are holding every slot: keep the device drained, drop the frame
+                source.read(scratch)
+                continue
+
+            target = ring.frames[slot]
+            ret, frame = source.read(target)
+            timestamp = time.monotonic() - source.latency
+            if not ret:
+                time.sleep(0.01)
+                continue
+            if frame is not target:
+                if frame.shape != target.shape:
+                    continue # Resolution changed mid-session; not supported by the ring
+                np.copyto(target, frame)
+            publish(slot, timestamp)
+    finally:
+        source.release()
+        try:
+            ring.close()
+        except BufferError:
+            pass # Process is exiting anyway, the OS unmaps it
+
+
+class _SlotRef:
+    """FrameBuffer look-alike for a shared-memory slot (see capture.frame_pool)."""
+
+    def __init__(self, camera, slot):
+        self.camera = camera
+        self.slot = slot
+        self.array = camera.ring.frames[slot]
+
+    def retain(self):
+        with self.camera.shared_lock:
+            self.camera.ring.add_ref(self.slot, 1)
+
+    def release(self):
+        with self.camera.shared_lock:
+            if self.camera.ring is not None:
+                self.camera.ring.add_ref(self.slot, -1)
+
+
+class SharedMemoryCamera(Camera):
+    """
+    Drop-in replacement for Camera that captures in its own process.
+    source must be picklable (None for a live device, or a source spec dict/path).
+    """
+
+    def __init__(self, camera_id=0, source=None, on_frame=None, slots=5, start_timeout=10.0):
+        ctx = mp.get_context("spawn")
+        self.camera_id = camera_id
+        self.prev_time = 0
+
+        self.stopped = False
+        self.ret = False
+        self.frame = None
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self.on_frame = on_frame
+        self.seq = 0
+        self.timestamp = None
+        self.latency = 0.0
+        self.last_read_seq = 0
+        self.buffer = None
+        self.dropped_frames = 0
+        self.cap = None
+        self.ring = None
+        self.shm = None
+        self.child_seq = None # Latest child sequence number we relayed
+
+        self.shared_lock = ctx.Lock()
+        self.shared_cond = ctx.Condition(self.shared_lock)
+        self.stop_event = ctx.Event()
+        conn, child_conn = ctx.Pipe()
+
+        self.process = ctx.Process(
+            target=_capture_main,
+            args=(camera_id, source, slots, child_conn, self.shared_lock, self.shared_cond, self.stop_event),
+            daemon=True
+        )
+        self.process.start()
+
+        try:
+            if not conn.poll(start_timeout):
+                raise RuntimeError(f"Camera {camera_id} capture process did not start")
+            msg = conn.recv()
+            if msg[0] == "error":
+                raise RuntimeError(msg[1])
+            _, shape, dtype = msg
+
+            _, _, size = _layout(slots, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.ring = _SharedRing(self.shm, slots, shape, dtype)
+            self.ring.ints[:] = 0
+            self.ring.ints[0] = -1
+            conn.send(self.shm.name)
+
+            if not conn.poll(start_timeout) or conn.recv()[0] != "ready":
+                raise RuntimeError(f"Camera {camera_id} capture process failed to start")
+        except Exception:
+            self._shutdown()
+            raise
+
+        self._pull()
+        self.thread = threading.Thread(target=self._update, args=())
+        self.thread.daemon = True
+        self.thread.start()
+
+    def isOpened(self):
+        return self.process.is_alive()
+
+    def _update(self):
+        # Relay frames published by the child into the Camera signalling
+        # (condition variable, sequence number, on_frame hook).
+        while not self.stopped:
+            with self.shared_cond:
+                if self.ring.ints[1] == self.child_seq:
+                    self.shared_cond.wait(0.1)
+            if not self.process.is_alive():
+                self._publish(False, None, time.monotonic())
+                break
+            self._pull()
+
+    def _pull(self):
+        with self.shared_lock:
+            slot = int(self.ring.ints[0])
+            seq = int(self.ring.ints[1])
+            if slot < 0 or seq == self.child_seq:
+                return
+            # Our "published" reference, same as Camera's pool buffer
+            self.ring.add_ref(slot, 1)
+            timestamp = float(self.ring.stamps[slot])
+            self.latency = float(self.ring.stamps[self.ring.slots])
+        if self.child_seq is not None:
+            self.dropped_frames += max(0, seq - self.child_seq - 1)
+        self.child_seq = seq
+        self._publish(True, _SlotRef(self, slot), timestamp)
+
+    def release(self):
+        self.stopped = True
+        with self.new_frame:
+            self.new_frame.notify_all() # Wake up anyone blocked in read_new
+        if self.thread.is_alive():
+            self.thread.join()
+        self._shutdown()
+
+    def _shutdown(self):
+        self.stop_event.set()
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        with self.new_frame:
+            self.frame = None
+            self.buffer = None
+        if self.ring is not None:
+            with self.shared_lock:
+                ring, self.ring = self.ring, None
+            ring.ints = ring.stamps = ring.frames = None
+        if self.shm is not None:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                self.shm.close()
+            except BufferError:
+                # Someone still holds a view (outstanding lease); the mapping
+                # goes away with the last reference.
+                pass
+            self.shm = None
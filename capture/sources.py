@@ -0,0 +1,241 @@
+import cv2
+import numpy as np
+import time
+import glob
+import os
+
+# Frame sources mimic the small part of the cv2.VideoCapture interface that
+# Camera relies on (isOpened / read / release), so a live device, a recorded
+# file and a procedural generator are interchangeable behind Camera.
+# Like cv2.VideoCapture.read(image), read() fills `image` in place when it has
+# the right shape and returns it, otherwise it returns a new array.
+# `latency` is the source's estimate of how long before read() returns a
+# frame was exposed; Camera subtracts it so frames carry their capture time.
+
+
+class FrameSource:
+    """Base class for anything Camera can pull frames from."""
+
+    latency = 0.0 # Seconds from exposure to read() returning (generated frames: none)
+
+    def isOpened(self):
+        raise NotImplementedError
+
+    def read(self, image=None):
+        """Returns (ret, frame) just like cv2.VideoCapture.read()"""
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def _pace(self):
+        """Sleeps until the next frame is due (sources that set frame_interval)"""
+        now = time.time()
+        if self.next_frame_time is None:
+            self.next_frame_time = now
+        wait_time = self.next_frame_time - now
+        if wait_time > 0:
+            time.sleep(wait_time)
+        # If we fell behind by more than a frame, resync instead of bursting
+        self.next_frame_time = max(self.next_frame_time + self.frame_interval, time.time() - self.frame_interval)
+
+
+class LiveSource(FrameSource):
+    """
+    A physical camera (or virtual cam) opened through cv2.VideoCapture.
+    latency: fixed exposure-to-read delay (s), e.g. measured with a clap test.
+    By default it is measured from the driver's buffer timestamps where they
+    are on the monotonic clock (V4L2), otherwise assumed to be one frame.
+    """
+
+    def __init__(self, camera_id=0, latency=None):
+        self.camera_id = camera_id
+        self.cap = cv2.VideoCapture(camera_id)
+        self.fixed_latency = latency is not None
+        if latency is None:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+            latency = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        self.latency = latency
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        ret, frame = self.cap.read(image)
+        if ret and not self.fixed_latency:
+            age = time.monotonic() - self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if 0.0 < age < 1.0: # Other backends report stream positions, not clock times
+                self.latency += 0.1 * (age - self.latency)
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class FileSource(FrameSource):
+    """
+    Replays a recording (e.g. output/recording_*.avi).
+    rate:
+      - "native": paced at the FPS stored in the file
+      - "fixed":  paced at the given fps
+      - "fast":   no pacing, frames are returned as fast as they decode
+    """
+
+    RATES = ("native", "fixed", "fast")
+
+    def __init__(self, path, rate="native", fps=None, loop=True):
+        if rate not in self.RATES:
+            raise ValueError(f"Unknown replay rate '{rate}' (expected one of {self.RATES})")
+        if rate == "fixed" and not fps:
+            raise ValueError("FileSource with rate='fixed' needs an fps")
+
+        self.path = path
+        self.rate = rate
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+
+        if rate == "native":
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 15.0
+        self.fps = fps
+        self.frame_interval = (1.0 / fps) if rate != "fast" else 0.0
+        self.next_frame_time = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        ret, frame = self.cap.read(image)
+        if not ret and self.loop:
+            # Rewind and keep going so long benchmarks don't run dry
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image)
+
+        if self.frame_interval:
+            self._pace()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource(FrameSource):
+    """
+    Procedural test pattern: a noisy background with a few face-like patches
+    (skin ellipse, eyes, mouth) drifting around. Deterministic for a given seed.
+    fps=None generates as fast as possible.
+    """
+
+    def __init__(self, width=640, height=480, fps=30.0, num_faces=2, seed=0, face_size=(0.22, 0.32)):
+        # face_size: (min, max) face height as a fraction of the shorter frame side
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_interval = (1.0 / fps) if fps else 0.0
+        self.next_frame_time = None
+        self.frame_index = 0
+        self.opened = True
+        self.last_boxes = [] # Ground truth [x, y, w, h] per face of the last frame
+
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+        # Per-face: base center, orbit radius, angular speed, phase, size
+        self.faces = []
+        for i in range(num_faces):
+            self.faces.append({
+                "cx": width * (i + 1) / (num_faces + 1),
+                "cy": height * rng.uniform(0.35, 0.6),
+                "rx": rng.uniform(10, width * 0.08),
+                "ry": rng.uniform(5, height * 0.05),
+                "speed": rng.uniform(0.02, 0.06),
+                "phase": rng.uniform(0, 2 * np.pi),
+                "size": min(width, height) * rng.uniform(*face_size),
+            })
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self, image=None):
+        if not self.opened:
+            return False, None
+
+        if image is not None and image.shape == self.background.shape and image.dtype == self.background.dtype:
+            frame = image
+            np.copyto(frame, self.background)
+        else:
+            frame = self.background.copy()
+        t = self.frame_index
+        self.last_boxes = []
+        for f in self.faces:
+            cx = int(f["cx"] + f["rx"] * np.cos(f["speed"] * t + f["phase"]))
+            cy = int(f["cy"] + f["ry"] * np.sin(f["speed"] * t * 1.3 + f["phase"]))
+            self._draw_face(frame, cx, cy, f["size"])
+            w, h = int(f["size"] * 0.75), int(f["size"])
+            self.last_boxes.append([cx - w // 2, cy - h // 2, w, h])
+        # Soften the hard drawing edges so it looks more like camera footage
+        cv2.GaussianBlur(frame, (5, 5), 0, dst=frame)
+        self.frame_index += 1
+
+        if self.frame_interval:
+            self._pace()
+        return True, frame
+
+    @staticmethod
+    def _draw_face(frame, cx, cy, size):
+        # Crude cartoon face (skin, hair, eyes, brows, nose, mouth). It's enough
+        # for YuNet to fire on, which is all the pipeline needs from it.
+        w = int(size * 0.75)
+        h = int(size)
+        cv2.ellipse(frame, (cx, cy), (w // 2, h // 2), 0, 0, 360, (120, 150, 200), -1)
+        cv2.ellipse(frame, (cx, cy - h // 3), (w // 2 + 4, h // 4), 0, 180, 360, (30, 30, 40), -1)
+        eye_y = cy - h // 10
+        eye_dx = w // 5
+        for side in (-1, 1):
+            ex = cx + side * eye_dx
+            cv2.ellipse(frame, (ex, eye_y), (w // 9, w // 18), 0, 0, 360, (245, 245, 245), -1)
+            cv2.circle(frame, (ex, eye_y), max(2, w // 22), (30, 20, 20), -1)
+            cv2.line(frame, (ex - w // 9, eye_y - h // 9), (ex + w // 9, eye_y - h // 9), (40, 40, 60), max(2, h // 40))
+        cv2.line(frame, (cx, eye_y + h // 20), (cx - w // 20, cy + h // 10), (90, 110, 160), max(1, h // 60))
+        cv2.ellipse(frame, (cx, cy + h // 4), (w // 6, h // 20), 0, 0, 360, (70, 70, 160), -1)
+
+    def release(self):
+        self.opened = False
+
+
+def create_source(spec=None, camera_id=0):
+    """
+    Builds a FrameSource from a CAMERA_CONFIG style "source" entry:
+      None / {"type": "live", "latency": 0.1}              -> LiveSource(camera_id, latency=None)
+      {"type": "file", "path": "output/x.avi", "rate": "native"|"fixed"|"fast", "fps": 15}
+      {"type": "synthetic", "width": 640, "height": 480, "fps": 30, "num_faces": 2, "seed": 0,
+       "face_size": [0.22, 0.32]}
+    A bare path string is treated as a file source at native rate.
+    """
+    if spec is None:
+        return LiveSource(camera_id)
+    if isinstance(spec, str):
+        spec = {"type": "file", "path": spec}
+
+    kind = spec.get("type", "live")
+    params = {k: v for k, v in spec.items() if k != "type"}
+
+    if kind == "live":
+        return LiveSource(params.get("camera_id", camera_id), params.get("latency"))
+    if kind == "file":
+        return FileSource(**params)
+    if kind == "synthetic":
+        return SyntheticSource(**params)
+    raise ValueError(f"Unknown frame source type '{kind}'")
+
+
+def live_camera_id(spec=None, camera_id=0):
+    """Device index a create_source() spec opens, or None for file / synthetic sources"""
+    if spec is None:
+        return camera_id
+    if isinstance(spec, str) or spec.get("type", "live") != "live":
+        return None
+    return spec.get("camera_id", camera_id)
+
+
+def find_recordings(output_dir="output"):
+    """Returns recorded sessions (oldest first), handy for picking replay inputs."""
+    return sorted(glob.glob(os.path.join(output_dir, "recording_*.avi")))
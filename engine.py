@@ -1,32 +1,129 @@
 import cv2
 import numpy as np
 import time
-import sounddevice as sd
 import traceback
 import os
+import threading
+import random
 from datetime import datetime
 
 from capture.camera import Camera
-from visionai.face_detect import FaceDetector
+from capture.shm_camera import SharedMemoryCamera
+from capture.devices import DeviceRegistry
+from visionai.face_detect import FaceDetector, FaceDetectorPool, make_analysis_frame
 from visionai.emotion_detect import EmotionDetector
+from visionai.analysis import AnalysisStage
 from audioai.vad import VoiceActivityDetector
+from audioai.analysis import AudioAnalyzer
+from audioai.recorder import AudioRecorder, mux
 from fusion.director import AutoDirector
+from fusion.simulator import TickLogger
+from fusion.delay import FrameDelayBuffer, ProgramTimeline
 
 class DirectorEngine:
     def __init__(self, state):
         self.state = state
         self.active_cameras = {}
         self.vads = {}
+        self.audio = None # AudioAnalyzer: speech detection for all mics in one worker
         self.detector = None
+        self.detector_pool = None # Per-camera detection in parallel (one YuNet per worker)
         self.emotion_detector = None
         self.director = None
+        self.registry = None # DeviceRegistry from the last scan_devices()
+        # Set by every camera when it publishes a frame; the loop sleeps on it
+        self.frame_event = threading.Event()
         
         # Config
         self.CAMERA_CONFIG = {
             0: {"role": "HOST", "mic_patterns": ["Realtek", "Array", "Intel"]},
             1: {"role": "GUEST", "mic_patterns": ["DroidCam", "Virtual", "Input"]},
             # Add more here if needed
+            # Optional "source" replaces the live device, e.g. for headless runs:
+            #   "source": {"type": "file", "path": "output/recording_x.avi", "rate": "native"}
+            #   "source": {"type": "synthetic", "fps": 30, "num_faces": 2}
+            #   "source": {"type": "live", "latency": 0.12}  (fixed exposure-to-read delay, s)
+            # Optional "audio_source" replaces the camera's mic (audioai/sources.py):
+            #   "audio_source": {"type": "wav", "path": "talk.wav", "rate": "native"}
+            #   "audio_source": {"type": "synthetic", "script": [["talk", 3.0], ["silence", 2.0]]}
         }
+        self.TARGET_FPS = 15.0 # Output (recording) frame rate
+        # "thread": capture thread per camera in this process (default)
+        # "process": capture process per camera publishing into shared memory,
+        #            keeps capture off our GIL (per-camera "capture" key overrides)
+        self.CAPTURE_MODE = "thread"
+        # Long side (px) of the downscaled copy that face/emotion analysis runs
+        # on; results are mapped back to full-res for framing and drawing.
+        # None = analyse at capture resolution. Per-camera "analysis_size" overrides.
+        self.ANALYSIS_SIZE = 320
+        # Detection worker threads (None = one per camera, capped by CPU count)
+        self.DETECTION_WORKERS = None
+        # Seconds an analysis round waits for face detection; a camera whose
+        # detection is later keeps its tracked faces (visionai/analysis.py)
+        self.DETECTION_TIMEOUT = 0.1
+        # OpenCV DNN settings per model: backend ("default", "opencv", "openvino"),
+        # target ("cpu", "cpu_fp16", "opencl", ...) and cv2.setNumThreads budget
+        # (None = OpenCV default). `python bench_inference.py` compares them.
+        self.INFERENCE = {
+            "face": {"backend": "default", "target": "cpu", "threads": None},
+            "emotion": {"backend": "default", "target": "cpu", "threads": None},
+        }
+        self.WARMUP = True # Run the models once on dummy input during initialize()
+        # Faces are tracked between detector passes; a full detection runs when
+        # tracking confidence drops or at least every TRACKER_DETECT_EVERY frames
+        self.TRACKER_DETECT_EVERY = 10
+        self.TRACKER_MIN_CONFIDENCE = 0.5
+        # Once every track of a camera has been confirmed ROI_STABLE_PASSES times,
+        # detector passes only look at padded crops around the tracked faces.
+        # Every ROI_FULL_SWEEP_EVERY-th pass still scans the whole frame for newcomers.
+        self.ROI_DETECTION = True
+        self.ROI_STABLE_PASSES = 3
+        self.ROI_FULL_SWEEP_EVERY = 4
+        # Tiled detection for wide / high-res cameras (per-camera "tiling": True
+        # or a dict overriding these): the frame is downscaled to frame_size,
+        # cut into overlapping tiles and tiles_per_pass of them are scanned per
+        # detector pass, recently busy tiles more often (see visionai/tiling.py)
+        self.TILING_DEFAULTS = {"frame_size": 1920, "tile_size": 640, "overlap": 0.25, "tiles_per_pass": 2}
+        # Emotion results are cached per face track and re-scored once they are
+        # EMOTION_TTL seconds old or the face's landmarks/histogram changed
+        self.EMOTION_TTL = 1.5
+        # Skip detection/emotion on frames that barely differ from the last
+        # analysed one (fraction of changed pixels in a small gray thumbnail), but refresh
+        # at least every MOTION_MAX_AGE seconds
+        self.MOTION_GATE = True
+        self.MOTION_THRESHOLD = 0.01
+        self.MOTION_MAX_AGE = 1.0
+        # "energy": hop level above the Audio Threshold slider (default);
+        # "spectral": speech-band share, spectral flatness and an adaptive noise
+        # floor, ignores HVAC/keyboard noise and needs no threshold tuning
+        # (`python bench_vad.py` compares them)
+        self.VAD_MODE = "energy"
+        # Estimate how much of each mic is other speakers' bleed (FFT cross-
+        # correlation, audioai/bleed.py) and compare mics by their own speech.
+        # Off by default: a quieter speaker loses dominance while a louder one
+        # also talks (see audioai/analysis.py)
+        self.BLEED_ESTIMATION = False
+        # Record the mics with the session: "mix" (one track), "tracks" (one per
+        # mic) or None. Written as a WAV sidecar aligned to the video's frame
+        # capture times, and muxed into a .mkv when ffmpeg is installed
+        self.AUDIO_RECORDING = "mix"
+        # Log every tick's director inputs next to the recording
+        # (recording_<ts>_ticks.jsonl) for replaying sessions offline with
+        # other director settings (fusion/simulator.py, bench_director.py)
+        self.TICK_LOG = True
+        # Seed of the director's random picks (None = a new one per session, logged)
+        self.DIRECTOR_SEED = None
+        # Delayed broadcast (fusion/delay.py): with AppState.broadcast_delay > 0
+        # (set per session) the program trails the cameras by that many seconds
+        # and cuts to a new speaker land DELAY_PRE_ROLL before their speech
+        # onset (moved back by at most DELAY_MAX_SHIFT). Frames wait as JPEGs
+        # (AppState.delay_quality), all cameras together in at most
+        # DELAY_MEMORY_MB; past that the delay shrinks.
+        self.DELAY_MEMORY_MB = 256
+        self.DELAY_PRE_ROLL = 0.15
+        self.DELAY_MAX_SHIFT = 0.75
+        # Face/emotion inference of the current/last run (visionai/analysis.py)
+        self.analysis = None
 
     def initialize(self):
         # We don't initialize here anymore if we want to scan first.
@@ -34,82 +131,24 @@ class DirectorEngine:
         # We need a separate 'scan' method called by UI before showing window.
         pass
 
-    def scan_devices(self):
+    def scan_devices(self, use_cache=True):
         """
         Checks which devices are actually connected by scanning indices 0-3.
         Merges with config if available, otherwise creates default entry.
         Returns a dict of available indices and their metadata.
+        Camera probes run in parallel and the result is cached per hardware
+        fingerprint (see capture/devices.py); initialize() reuses it.
         """
-        available = {}
         print("Scanning devices...")
+        self.registry = DeviceRegistry(self.CAMERA_CONFIG)
+        available = self.registry.scan(use_cache=use_cache)
         
-        # Audio Devices Scan
-        all_audio_devices = sd.query_devices()
-        host_apis = sd.query_hostapis()
-
+        host_apis = self.registry.host_apis
         print("\n--- DEBUG: All Detected Audio Devices ---")
-        for i, d in enumerate(all_audio_devices):
+        for i, d in enumerate(self.registry.audio_devices):
             if d['max_input_channels'] > 0:
                 print(f"[{i}] {d['name']} (API: {host_apis[d['hostapi']]['name']})")
         print("------------------------------------------\n")
-
-        
-        # Scan range of camera indices (e.g., 0 to 3)
-        for idx in range(4):
-            # 1. Check Camera Availability
-            cam_found = False
-            try:
-                cap = cv2.VideoCapture(idx)
-                if cap.isOpened():
-                    cam_found = True
-                    cap.read() # Try reading a frame to be sure
-                    cap.release()
-            except:
-                pass
-            
-            # 2. Check Microphone Availability (Only if config exists for this idx)
-            mic_found = False
-            mic_name = "Unknown"
-            config = self.CAMERA_CONFIG.get(idx, {})
-            
-            if config:
-                patterns = config.get("mic_patterns", [])
-                
-                # Search for Mic
-                matches = []
-                for i, dev in enumerate(all_audio_devices):
-                    if dev['max_input_channels'] > 0:
-                        # Check match
-                        for p in patterns:
-                            if p in dev['name']:
-                                matches.append((i, dev))
-                                break
-                
-                # Priority 1: MME
-                for i, dev in matches:
-                    try:
-                        api_name = host_apis[dev['hostapi']]['name']
-                        if "MME" in api_name:
-                            mic_found = True
-                            mic_name = dev['name']
-                            break
-                    except: pass
-                
-                # Priority 2: Any match
-                if not mic_found and matches:
-                    mic_found = True
-                    mic_name = matches[0][1]['name']
-            
-            # 3. Add to available if EITHER is found
-            # If no config, we only add if Camera is found (can't guess Mic)
-            if cam_found or (config and mic_found):
-                 role = config.get('role', f"Camera {idx}")
-                 available[idx] = {
-                     'role': role,
-                     'cam_found': cam_found,
-                     'mic_found': mic_found,
-                     'mic_name': mic_name if mic_found else "Default/None"
-                 }
                  
         return available
 
@@ -120,14 +159,21 @@ class DirectorEngine:
         # Initialize Face Detector
         if self.detector is None:
              self.detector = FaceDetector()
+        if self.detector_pool is None:
+             workers = self.DETECTION_WORKERS or max(1, min(len(self.CAMERA_CONFIG), os.cpu_count() or 1))
+             self.detector_pool = FaceDetectorPool(workers=workers, **self.INFERENCE["face"])
         
         # Initialize Emotion Detector
         if self.emotion_detector is None:
              try:
-                self.emotion_detector = EmotionDetector()
+                self.emotion_detector = EmotionDetector(**self.INFERENCE["emotion"])
              except Exception as e:
                 print(f"Failed to init EmotionDetector: {e}")
 
+        # Reuse the device scan from the Control Panel (cached on disk)
+        if self.registry is None:
+            self.scan_devices()
+
         # Initialize Cameras
         # We only init cameras that are ENABLED in state (or init all and ignore them later?)
         # Better to init all available so we can toggle them live?
@@ -136,84 +182,99 @@ class DirectorEngine:
         for idx in self.CAMERA_CONFIG.keys():
             if idx in self.active_cameras: continue # Already active
             
+            # The scan (possibly cached for a day) is only a hint: a camera it
+            # missed may have been plugged in since or been slow to probe
+            entry = self.registry.get(idx)
+            expected = entry is not None and entry['cam_found']
+
             try:
-                c = Camera(idx)
+                config = self.CAMERA_CONFIG[idx]
+                capture_mode = config.get("capture", self.CAPTURE_MODE)
+                camera_cls = SharedMemoryCamera if capture_mode == "process" else Camera
+                c = camera_cls(idx, source=config.get("source"), on_frame=self._on_frame)
                 # Check directly if read works or isOpened
-                if c.cap.isOpened():
+                if c.isOpened():
                     self.active_cameras[idx] = c
                     print(f"Initialized Camera {idx} ({self.CAMERA_CONFIG[idx]['role']})")
+                    if not expected:
+                        # The scan said it's missing: re-probe next time
+                        self.registry.invalidate()
                 else:
                     print(f"Camera {idx} failed to open.")
+                    if expected and self.registry.from_cache:
+                        # The cached scan is stale, re-probe next time
+                        self.registry.invalidate()
             except Exception as e:
                 print(f"Camera {idx} initialization error: {e}")
+                if expected and self.registry.from_cache:
+                    self.registry.invalidate()
+
+        if self.WARMUP:
+            self.warmup()
 
         # Initialize Director
         valid_config = {k: v for k, v in self.CAMERA_CONFIG.items() if k in self.active_cameras}
         if self.director is None:
              self.director = AutoDirector(camera_config=valid_config)
         
-        # Initialize Audio (VADs)
-        all_devices = sd.query_devices()
-        
+        # Initialize Audio (VADs). Mic callbacks only buffer PCM, one worker analyses all mics
+        if self.audio is None:
+            self.audio = AudioAnalyzer(bleed=self.BLEED_ESTIMATION)
+        self.audio.start()
         for cam_idx in valid_config.keys():
             if cam_idx in self.vads: continue
             
             config = valid_config[cam_idx]
-            patterns = config.get("mic_patterns", [])
+            entry = self.registry.get(cam_idx) or {}
+            mic_index = entry.get('mic_index')
+            mic_name = entry.get('mic_name', "Unknown")
             
-            mic_index = None
-            mic_name = "Unknown"
-            
-            host_apis = sd.query_hostapis()
-            found = False
-            for pattern in patterns:
-                matches = []
-                for i, dev in enumerate(all_devices):
-                    if dev['max_input_channels'] > 0 and pattern in dev['name']:
-                        matches.append((i, dev))
-                
-                # Priority 1: MME
-                for i, dev in matches:
-                    api_name = host_apis[dev['hostapi']]['name']
-                    if "MME" in api_name:
-                        mic_index = i
-                        mic_name = dev['name']
-                        found = True
-                        break
-                if found: break
-
-                # Priority 2: Any match
-                if matches:
-                    mic_index = matches[0][0]
-                    mic_name = matches[0][1]['name']
-                    found = True
-                    break
-            
-            if mic_index is not None:
+            if config.get("audio_source") is not None:
+                # Recorded / scripted audio instead of a device
+                try:
+                    v = VoiceActivityDetector(
+                        source=config["audio_source"],
+                        speech_threshold=self.state.audio_threshold,
+                        silence_hold_time=self.state.silence_hold,
+                        mode=self.VAD_MODE,
+                        analyzer=self.audio,
+                        key=cam_idx
+                    )
+                    v.start()
+                    self.vads[cam_idx] = v
+                except Exception as e:
+                    print(f"❌ Failed to start audio source for Camera {cam_idx}: {e}")
+            elif mic_index is not None:
                 print(f"Assigning Mic '{mic_name}' to Camera {cam_idx} ({config['role']})")
                 try:
-                    # Get device sample rate
-                    dev_info = sd.query_devices(mic_index)
-                    sr = int(dev_info.get('default_samplerate', 16000))
+                    # Device sample rate (recorded by the scan)
+                    sr = entry.get('mic_samplerate') or 16000
                     
                     # Initial params from state
                     v = VoiceActivityDetector(
                         device_index=mic_index, 
                         sample_rate=sr,
                         speech_threshold=self.state.audio_threshold,
-                        silence_hold_time=self.state.silence_hold
+                        silence_hold_time=self.state.silence_hold,
+                        mode=self.VAD_MODE,
+                        analyzer=self.audio,
+                        key=cam_idx
                     )
                     v.start()
                     self.vads[cam_idx] = v
                     print(f"Started VAD for Camera {cam_idx} w/ Sample Rate {sr}Hz")
                 except Exception as e:
                     print(f"Failed to start specific VAD for Camera {cam_idx}: {e}")
+                    self.registry.invalidate()
                     print(f"⚠️ Attempting fallback to System Default Microphone...")
                     try:
                         v = VoiceActivityDetector(
                             device_index=None, # Uses default
                             speech_threshold=self.state.audio_threshold,
-                            silence_hold_time=self.state.silence_hold
+                            silence_hold_time=self.state.silence_hold,
+                            mode=self.VAD_MODE,
+                            analyzer=self.audio,
+                            key=cam_idx
                         )
                         v.start()
                         self.vads[cam_idx] = v
@@ -225,14 +286,52 @@ class DirectorEngine:
             else:
                 print(f"No matching microphone found for Camera {cam_idx}")
 
-    def run(self, frame_callback=None):
+    def tiling_config(self, idx):
+        """Tiled detection settings of a camera, or None if it isn't tiled"""
+        tiling = self.CAMERA_CONFIG.get(idx, {}).get("tiling")
+        if not tiling:
+            return None
+        return {**self.TILING_DEFAULTS, **(tiling if isinstance(tiling, dict) else {})}
+
+    def warmup(self):
+        """
+        Runs every model once on dummy input shaped like the cameras' analysis
+        frames, so the first frames after START don't pay for graph setup.
+        """
+        start = time.time()
+        shapes = set()
+        for idx, cam in self.active_cameras.items():
+            with cam.lease() as lease: # Only the shape is needed, no copy
+                if not lease.ret or lease.frame is None:
+                    continue
+                tiling = self.tiling_config(idx)
+                if tiling:
+                    shapes.add((tiling["tile_size"], tiling["tile_size"], lease.frame.shape[2]))
+                    continue
+                analysis_size = self.CAMERA_CONFIG.get(idx, {}).get("analysis_size", self.ANALYSIS_SIZE)
+                shapes.add(make_analysis_frame(lease.frame, analysis_size)[0].shape)
+        try:
+            self.detector_pool.warmup(sorted(shapes) or [(240, 320, 3)])
+            if self.emotion_detector:
+                self.emotion_detector.warmup()
+        except Exception as e:
+            print(f"Model warm-up failed: {e}")
+            return
+        print(f"🔥 Models warmed up in {time.time() - start:.2f}s")
+
+    def _on_frame(self):
+        """Camera hook: wakes the render loop and the analysis stage"""
+        self.frame_event.set()
+        if self.analysis is not None:
+            self.analysis.wake()
+
+    def run(self, frame_callback=None, output_dir="output"):
         """Main Processing Loop"""
         print("Starting Engine Loop...")
         frame_count = 0
         
         # Initialize Video Writer
         # Ensure output folder exists
-        output_dir = "output"
         os.makedirs(output_dir, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -240,10 +339,36 @@ class DirectorEngine:
         
         fourcc = cv2.VideoWriter_fourcc(*'XVID')
         # Typical webcam res is 640x480, verify active_cam resolution if possible or default
-        TARGET_FPS = 15.0
+        TARGET_FPS = self.TARGET_FPS
         out = cv2.VideoWriter(filename, fourcc, TARGET_FPS, (640, 480))
         print(f"🎥 Recording started: {filename} (@ {TARGET_FPS} FPS)")
         
+        # Session audio: drained from the mic rings by its own thread
+        recorder = None
+        if self.AUDIO_RECORDING and self.vads:
+            recorder = AudioRecorder(self.vads, filename[:-4], mode=self.AUDIO_RECORDING)
+            recorder.start()
+            print(f"🔊 Audio recording started ({self.AUDIO_RECORDING}, {len(self.vads)} mic(s))")
+        frame_times = []    # Capture time of every written frame
+        
+        seed = self.DIRECTOR_SEED if self.DIRECTOR_SEED is not None else random.randrange(2 ** 32)
+        self.director.rng.seed(seed)
+        tick_log = TickLogger(filename[:-4] + "_ticks.jsonl", self.director, seed) if self.TICK_LOG else None
+        
+        # Delayed broadcast: per-camera JPEG rings and the (retroactively cut) program timeline
+        broadcast_delay = self.state.broadcast_delay
+        program = None
+        delay_buffers = {}
+        delay_stats = [0.0, 0, 0.0] # Output delay [sum, count, max] (s)
+        last_delayed = None
+        if broadcast_delay > 0:
+            program = ProgramTimeline(self.director.active_camera_index, time.monotonic(),
+                                      pre_roll=self.DELAY_PRE_ROLL, max_shift=self.DELAY_MAX_SHIFT)
+            delay_quality = int(self.state.delay_quality)
+            delay_cap = self.DELAY_MEMORY_MB * 2 ** 20 / max(1, len(self.active_cameras))
+            print(f"⏳ Delayed broadcast: {broadcast_delay:.1f}s behind live, JPEG quality {delay_quality}, {self.DELAY_MEMORY_MB} MB cap")
+        mic_enabled = {idx: [] for idx in self.vads}
+        
         # Smooth Zoom & Pan parameters
         current_zoom = 1.0
         target_zoom = 1.0
@@ -259,10 +384,10 @@ class DirectorEngine:
         
         # {cam_idx: total_speech_frames}
         speech_stats = {idx: 0 for idx in self.active_cameras}
-        # {cam_idx: {emotion: count}}
-        emotion_stats = {idx: {} for idx in self.active_cameras}
-        # {cam_idx: {emotion: count}}
-        emotion_stats = {idx: {} for idx in self.active_cameras}
+        # {cam_idx: [sum, count, max]} of how far face results lag the rendered frame (s)
+        lag_stats = {}
+        # {cam_idx: [sum, count, max]} of |frame capture time - audio capture time| behind each decision (s)
+        skew_stats = {}
         # {cam_idx: {count_val: frequency}} -> Histogram
         face_stats = {idx: {} for idx in self.active_cameras}
         
@@ -272,116 +397,200 @@ class DirectorEngine:
         
         last_loop_time = time.time()
         
+        # Sequence number of the last frame we processed per camera, so a
+        # frame is never encoded twice
+        last_seqs = {}
+        leases = {} # {cam_idx: FrameLease} held for the duration of one tick
+        next_output_time = time.monotonic()
+        
+        # Face/emotion inference runs in the background on the newest frames;
+        # this loop only picks up its latest results and never waits for it
+        self.analysis = AnalysisStage(self)
+        self.analysis.start()
+        
         while self.state.running:
-            loop_start = time.time()
+            # --- FPS LIMITING ---
+            # Don't start the next output frame before its slot, then wake as
+            # soon as any camera has published a frame we haven't seen yet.
+            wait_time = next_output_time - time.monotonic()
+            if wait_time > 0:
+                time.sleep(wait_time)
+            self.frame_event.wait(timeout=0.1)
+            self.frame_event.clear()
+            tick_start = time.monotonic()
+            
             # Update dynamic parameters from State
             self.director.MIN_SHOT_DURATION = self.state.min_shot_duration
             self.director.FACE_LOSS_THRESHOLD = self.state.grace_period
             
-            for vad in self.vads.values():
+            for idx, vad in self.vads.items():
                 vad.speech_threshold = self.state.audio_threshold
                 vad.silence_hold_time = self.state.silence_hold
+                self.audio.set_enabled(idx, self.state.get_mic_enabled(idx))
+                
+            # Hand last tick's frame buffers back to the camera pools
+            for lease in leases.values():
+                lease.release()
+            leases = {}
                 
             # 1. Capture from ALL ENABLED cameras
             frames = {}
+            new_frames = set() # Cameras whose frame is fresh this tick
             for idx, cam in self.active_cameras.items():
                 # Check if disabled in UI
                 if not self.state.get_cam_enabled(idx):
                     frames[idx] = None
                     continue
-                    
-                ret, frame = cam.read()
-                if ret:
-                    frames[idx] = frame
+                
+                # Lease the buffer so it isn't refilled while we render on it
+                lease = cam.lease()
+                if lease.ret and lease.frame is not None:
+                    leases[idx] = lease
+                    frames[idx] = lease.frame
+                    if lease.seq != last_seqs.get(idx):
+                        new_frames.add(idx)
+                        last_seqs[idx] = lease.seq
                 else:
+                    lease.release()
                     frames[idx] = None
             
             # If no frames, wait a bit
             if not any(f is not None for f in frames.values()):
                 time.sleep(0.1)
                 continue
+            
+            # Woken up but nothing new (e.g. only a disabled camera ticked)
+            if not new_frames:
+                continue
                 
             frame_count += 1
             
-            # 2. Detect Faces & Emotions on ALL valid frames
-            if frame_count % 2 == 0:
-                current_faces_map = {}
-                current_emotions_map = {} # NEW: Track emotions for all cams
-                
-                for idx, frame in frames.items():
-                    if frame is not None:
-                        # Detect Faces
-                        faces = self.detector.detect(frame)
-                        current_faces_map[idx] = faces
-                        
-                        # Update Face Stats Histogram
-                        if faces is not None:
-                            count = len(faces)
-                            # Initialize if needed (dynamic camera add?)
-                            if idx not in face_stats: face_stats[idx] = {}
-                            face_stats[idx][count] = face_stats[idx].get(count, 0) + 1
-                        
-                        # Detect Emotions (if faces found)
-                        if self.emotion_detector and faces is not None and len(faces) > 0:
-                            # Optimize: Only detect periodically
-                            if frame_count % 6 == 0: 
-                                emotion = self.emotion_detector.detect_emotion(frame, faces[0][:4])
-                                current_emotions_map[idx] = emotion
-                                
-                                # Log Emotion Stat
-                                if idx not in emotion_stats: emotion_stats[idx] = {}
-                                emotion_stats[idx][emotion] = emotion_stats[idx].get(emotion, 0) + 1
-                                
-                                # Cache it for stability
-                                if not hasattr(self, 'emotion_cache'): self.emotion_cache = {}
-                                self.emotion_cache[idx] = emotion
-                            else:
-                                # Use cached value
-                                if hasattr(self, 'emotion_cache'):
-                                    current_emotions_map[idx] = self.emotion_cache.get(idx, "Neutral")
-
-                last_faces_map = current_faces_map
-                last_emotions_map = current_emotions_map
-            else:
-                 if 'last_faces_map' in locals():
-                    current_faces_map = last_faces_map
-                    current_emotions_map = last_emotions_map
-                 else:
-                    current_faces_map = {}
-                    current_emotions_map = {}
+            # 2. Latest Faces & Emotions (cameras that are disabled or lost have none)
+            results = {idx: r for idx, r in self.analysis.latest().items() if frames.get(idx) is not None}
+            current_faces_map = {idx: r.faces for idx, r in results.items()}
+            current_emotions_map = {idx: r.emotion for idx, r in results.items() if r.emotion is not None}
+            
+            # How much older each result is than the frame it's rendered with (end-to-end staleness)
+            for idx in new_frames:
+                if idx in results:
+                    lag = results[idx].age(leases[idx].timestamp)
+                    stats = lag_stats.setdefault(idx, [0.0, 0, 0.0])
+                    stats[0] += lag
+                    stats[1] += 1
+                    stats[2] = max(stats[2], lag)
+            
+            # Update Face Stats Histogram (tracked faces, every fresh frame)
+            for idx in new_frames:
+                faces = current_faces_map.get(idx)
+                if faces is not None:
+                    count = len(faces)
+                    # Initialize if needed (dynamic camera add?)
+                    if idx not in face_stats: face_stats[idx] = {}
+                    face_stats[idx][count] = face_stats[idx].get(count, 0) + 1
             
             # 3. Director Decision
+            # Each camera's mic is read from the audio snapshot covering that
+            # camera's frame capture time, so speech is judged at the instant
+            # the frame shows (all mics of a snapshot come from the same round;
+            # its dominance flags already drop mics that mostly carry bleed)
+            audio = self.audio.latest()
+            audio_at = {}
             speaking_map = {}
             volume_map = {}
             for idx in self.vads:
+                lease = leases.get(idx)
+                snapshot = audio_at[idx] = self.audio.snapshot_at(lease.timestamp) if lease else audio
+                if lease and idx in new_frames and np.isfinite(snapshot.capture_time):
+                    # > 0: the audio behind this decision was captured before the frame
+                    skew = lease.timestamp - snapshot.capture_time
+                    stats = skew_stats.setdefault(idx, [0.0, 0, 0.0])
+                    stats[0] += abs(skew)
+                    stats[1] += 1
+                    stats[2] = max(stats[2], abs(skew))
                 # Check if mic disabled
                 if not self.state.get_mic_enabled(idx):
                     speaking_map[idx] = False
                     volume_map[idx] = 0.0
                 else:
-                    speaking_map[idx] = self.vads[idx].is_speaking
-                    volume_map[idx] = self.vads[idx].current_volume
+                    speaking_map[idx] = snapshot.dominant.get(idx, False)
+                    volume_map[idx] = snapshot.own_volume.get(idx, 0.0)
                     
                     # Log Speech Stat
                     if speaking_map[idx]:
                         speech_stats[idx] = speech_stats.get(idx, 0) + 1
                 
-            active_cam_idx = self.director.update(speaking_map, current_faces_map, volume_map, current_emotions_map)
-            
-            # Ensure valid active camera (fallback if active is disabled or lost)
-            if active_cam_idx not in frames or frames[active_cam_idx] is None:
-                available = [k for k, v in frames.items() if v is not None]
-                if available:
-                    active_cam_idx = available[0]
-                else:
-                    # No cameras available
-                    cv2.imshow("AutoDirector", np.zeros((480, 640, 3), dtype=np.uint8))
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        self.stop()
-                    continue
-            
-            active_frame = frames[active_cam_idx]
-            if active_frame is None: continue
+            active_cam_idx = self.director.update(speaking_map, current_faces_map, volume_map, current_emotions_map,
+                                                  now=tick_start)
+            if tick_log:
+                tick_log.log(tick_start, speaking_map, current_faces_map, volume_map, current_emotions_map,
+                             active_cam_idx, self.director)
+            
+            if program is None:
+                # Ensure valid active camera (fallback if active is disabled or lost)
+                if active_cam_idx not in frames or frames[active_cam_idx] is None:
+                    available = [k for k, v in frames.items() if v is not None]
+                    if available:
+                        active_cam_idx = available[0]
+                    else:
+                        # No cameras available
+                        cv2.imshow("AutoDirector", np.zeros((480, 640, 3), dtype=np.uint8))
+                        if cv2.waitKey(1) & 0xFF == ord('q'):
+                            self.stop()
+                        continue
+                
+                active_frame = frames[active_cam_idx]
+                if active_frame is None: continue
+                
+                # Only fresh frames of the program camera get rendered and encoded
+                if active_cam_idx not in new_frames: continue
+                faces = current_faces_map.get(active_cam_idx, None)
+                is_active_speaking = audio_at.get(active_cam_idx, audio).speaking.get(active_cam_idx, False)
+                active_emotion = current_emotions_map.get(active_cam_idx)
+                frame_time = leases[active_cam_idx].timestamp
+            else:
+                # Buffer the fresh frames with what rendering them needs
+                for idx in new_frames:
+                    buffer = delay_buffers.get(idx)
+                    if buffer is None:
+                        buffer = delay_buffers[idx] = FrameDelayBuffer(delay_cap, broadcast_delay + 1.0, delay_quality)
+                    buffer.push(leases[idx].timestamp, frames[idx], current_faces_map.get(idx),
+                                current_emotions_map.get(idx), audio_at.get(idx, audio).speaking.get(idx, False))
+                
+                # Hindsight: a cut to a new speaker starts at their speech onset
+                if self.director.last_cut and self.director.last_cut[0] == tick_start:
+                    _, cut_idx, reason = self.director.last_cut
+                    onset = None
+                    if reason in ("speaker", "rotation") and cut_idx in audio_at:
+                        onset = audio_at[cut_idx].onset.get(cut_idx)
+                    program.cut(leases[cut_idx].timestamp if cut_idx in leases else tick_start, cut_idx, onset)
+                
+                # Output the program camera's frame from `broadcast_delay` ago
+                program_time = time.monotonic() - broadcast_delay
+                active_cam_idx = program.camera_at(program_time)
+                buffer = delay_buffers.get(active_cam_idx)
+                if buffer is None or not buffer.frames:
+                    # Program camera disabled / lost: any camera with frames
+                    buffer = next((b for b in delay_buffers.values() if b.frames), None)
+                    if buffer is None: continue
+                    active_cam_idx = next(k for k, b in delay_buffers.items() if b is buffer)
+                delayed = buffer.at(program_time)
+                # Still filling up (unless the memory cap keeps the buffer shorter than the delay)
+                if delayed.timestamp > program_time and not buffer.evicted: continue
+                if last_delayed is not None and delayed.timestamp <= last_delayed.timestamp: continue
+                program.emit(delayed.timestamp)
+                last_delayed = delayed
+                
+                active_frame = delayed.decode()
+                if active_frame is None: continue
+                faces = delayed.faces
+                is_active_speaking = delayed.speaking
+                active_emotion = delayed.emotion
+                frame_time = delayed.timestamp
+                output_delay = time.monotonic() - delayed.timestamp
+                delay_stats[0] += output_delay
+                delay_stats[1] += 1
+                delay_stats[2] = max(delay_stats[2], output_delay)
+            next_output_time = tick_start + 1.0 / TARGET_FPS
 
             # --- RENDERING (Zoom/Pan) ---
             orig_h, orig_w = active_frame.shape[:2]
@@ -402,12 +611,7 @@ class DirectorEngine:
                 current_cx, current_cy = orig_w / 2, orig_h / 2
                 target_cx, target_cy = orig_w / 2, orig_h / 2
             
-            faces = current_faces_map.get(active_cam_idx, None)
-            
             # Target Zoom logic
-            active_vad = self.vads.get(active_cam_idx)
-            is_active_speaking = active_vad.is_speaking if active_vad else False
-            
             # Default Zoom
             target_zoom = 1.0 
             
@@ -416,7 +620,6 @@ class DirectorEngine:
                 target_zoom = 1.2
                 
                 # If HIGH EMOTION, zoom in MORE (1.5)
-                active_emotion = current_emotions_map.get(active_cam_idx, "Neutral")
                 if active_emotion in ["Surprise", "Happy"]:
                     target_zoom = 1.5
             
@@ -445,7 +648,8 @@ class DirectorEngine:
             if ix2 > ix1 and iy2 > iy1:
                 display_frame = cv2.resize(active_frame[iy1:iy2, ix1:ix2], (orig_w, orig_h))
             else:
-                display_frame = active_frame
+                # Copy: we draw overlays on it and the pooled buffer gets recycled
+                display_frame = active_frame.copy()
 
             # Transform Face Coordinates for Drawing
             display_faces = []
@@ -480,11 +684,13 @@ class DirectorEngine:
                         status = "DISABLED"
                         clr = (128, 128, 128)
                     else:
-                        status = "SPEAK" if v.is_speaking else "SILENT"
-                        clr = (0, 255, 0) if v.is_speaking else (0, 0, 255)
+                        snapshot = audio_at.get(vid, audio)
+                        speaking = snapshot.speaking.get(vid, False)
+                        status = "SPEAK" if speaking else "SILENT"
+                        clr = (0, 255, 0) if speaking else (0, 0, 255)
                         
                         # Volume Visualization
-                        vol_pct = int((v.current_volume / 25.0) * 100) # Assuming max ~25
+                        vol_pct = int((snapshot.volume.get(vid, 0.0) / 25.0) * 100) # Assuming max ~25
                         vol_pct = max(0, min(100, vol_pct))
                         
                     rname = self.CAMERA_CONFIG.get(vid, {}).get('role', f"CAM {vid}")
@@ -494,7 +700,7 @@ class DirectorEngine:
                 
                 cv2.putText(display_frame, f"{role_name} (CAM {active_cam_idx})", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
                 
-                emotion_text = current_emotions_map.get(active_cam_idx, "Analyzing...")
+                emotion_text = active_emotion or "Analyzing..."
                 
                 # Draw on Top Right
                 text_size = cv2.getTextSize(emotion_text, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)[0]
@@ -502,12 +708,40 @@ class DirectorEngine:
                 text_y = 40
                 
                 cv2.putText(display_frame, f"Emotion: {emotion_text}", (text_x - 120, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 255), 2)
+                
+                gate = self.analysis.motion_gates.get(active_cam_idx)
+                if gate is not None:
+                    cv2.putText(display_frame, f"Motion {gate.energy * 100:.1f}% | skipped {gate.hit_rate * 100:.0f}%",
+                                (text_x - 120, text_y + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 1)
+                
+                result = results.get(active_cam_idx)
+                if result is not None and active_cam_idx in leases:
+                    cv2.putText(display_frame, f"Analysis lag: {result.age(leases[active_cam_idx].timestamp) * 1000:.0f} ms",
+                                (text_x - 120, text_y + 55), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 1)
+                
+                # A/V skew of the decision (frame vs. audio capture time) and the per-device latency estimates
+                snapshot = audio_at.get(active_cam_idx)
+                if snapshot is not None and active_cam_idx in leases and np.isfinite(snapshot.capture_time):
+                    skew = leases[active_cam_idx].timestamp - snapshot.capture_time
+                    cam_latency = self.active_cameras[active_cam_idx].latency
+                    mic_latency = self.vads[active_cam_idx].latency
+                    cv2.putText(display_frame, f"A/V skew: {skew * 1000:+.0f} ms (cam {cam_latency * 1000:.0f} / mic {mic_latency * 1000:.0f} ms)",
+                                (text_x - 120, text_y + 80), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 1)
+                
+                if program is not None:
+                    buffered = sum(b.nbytes for b in delay_buffers.values())
+                    cv2.putText(display_frame, f"Program delay: {output_delay * 1000:.0f} ms | buffer {buffered / 2 ** 20:.1f} MB",
+                                (text_x - 120, text_y + 105), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 1)
 
             # cv2.imshow("AutoDirector", display_frame)
             
             # Write to file
             if out.isOpened():
                 out.write(display_frame)
+                if recorder:
+                    frame_times.append(frame_time)
+                    for idx, flags in mic_enabled.items():
+                        flags.append(self.state.get_mic_enabled(idx))
             
             # Send to GUI
             if frame_callback:
@@ -517,19 +751,33 @@ class DirectorEngine:
             # but without imshow waitKey might not work as expected for window events.
             # since we are headless (no opencv window), we rely on GUI stop button.
             
-            # --- FPS LIMITING ---
-            proc_time = time.time() - loop_start
-            wait_time = (1.0 / TARGET_FPS) - proc_time
-            if wait_time > 0:
-                time.sleep(wait_time)
-            
             # FPS Calculation (Smoothing)
             # real_fps = 1.0 / (time.time() - last_loop_time)
             # last_loop_time = time.time()
             # print(f"FPS: {real_fps:.1f}", end='\r')
 
         print("Engine Loop Stopped.")
+        self.analysis.stop()
+        for lease in leases.values():
+            lease.release()
         if out: out.release()
+        if tick_log:
+            tick_log.close()
+        
+        if recorder:
+            try:
+                recorder.stop()
+                audio_paths = recorder.build(frame_times, TARGET_FPS, mic_enabled)
+                for path in audio_paths:
+                    print(f"🔊 Audio saved: {path}")
+                muxed = mux(filename, audio_paths, filename[:-4] + ".mkv")
+                if muxed:
+                    print(f"🎞️ Muxed recording: {muxed}")
+                elif audio_paths:
+                    print("⚠️ ffmpeg not found, audio kept as WAV sidecar")
+            except Exception as e:
+                print(f"❌ Failed to save session audio: {e}")
+                traceback.print_exc()
         
         # --- GENERATE SUMMARY REPORT ---
         try:
@@ -540,7 +788,23 @@ class DirectorEngine:
                 f.write(f"AutoDirector Session Summary\n")
                 f.write(f"==========================\n")
                 f.write(f"Date: {start_dt.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Duration: {duration_sec:.2f} seconds\n\n")
+                f.write(f"Duration: {duration_sec:.2f} seconds\n")
+                if self.emotion_detector:
+                    cache = self.analysis.emotion_cache
+                    f.write(f"Emotion Cache: {cache.hits} of {cache.hits + cache.misses} face checks reused ({cache.hit_rate * 100:.1f}%)\n")
+                for (src, dst), (gain, delay) in self.audio.latest().bleed.items():
+                    src_role = self.CAMERA_CONFIG.get(src, {}).get('role', f"CAM {src}")
+                    dst_role = self.CAMERA_CONFIG.get(dst, {}).get('role', f"CAM {dst}")
+                    f.write(f"Mic Bleed: {src_role} -> {dst_role} mic, gain {gain:.2f}, delay {delay * 1000:.1f} ms\n")
+                if program is not None and delay_stats[1]:
+                    shifts = [x for x in program.shifts if x > 0]
+                    peak = sum(b.peak_bytes for b in delay_buffers.values())
+                    evicted = sum(b.evicted for b in delay_buffers.values())
+                    f.write(f"Delayed Broadcast: target {broadcast_delay:.1f}s, measured mean {delay_stats[0] / delay_stats[1]:.2f}s, "
+                            f"max {delay_stats[2]:.2f}s; {len(shifts)} of {len(program.shifts)} cuts moved to the speech onset "
+                            f"(mean {np.mean(shifts) * 1000 if shifts else 0:.0f} ms earlier); buffers peaked at {peak / 2 ** 20:.1f} MB"
+                            f"{f', {evicted} frames dropped by the memory cap' if evicted else ''}\n")
+                f.write("\n")
                 
                 f.write(f"Participant Statistics\n")
                 f.write(f"----------------------\n")
@@ -571,7 +835,7 @@ class DirectorEngine:
                     
                     # 3. Emotions
                     f.write(f"  - Observed Emotions:\n")
-                    e_counts = emotion_stats.get(idx, {})
+                    e_counts = self.analysis.emotion_stats.get(idx, {})
                     if e_counts:
                         total_emotions = sum(e_counts.values())
                         # Sort by count
@@ -581,6 +845,23 @@ class DirectorEngine:
                             f.write(f"    * {emo}: {pct:.1f}%\n")
                     else:
                         f.write(f"    * (None detected)\n")
+                    
+                    # 4. Inference saved by the motion gate
+                    gate = self.analysis.motion_gates.get(idx)
+                    if gate is not None:
+                        f.write(f"  - Motion Gate: skipped {gate.skips} of {gate.checks} analysis passes ({gate.hit_rate * 100:.1f}%)\n")
+                    
+                    # 5. Staleness of the face/emotion results behind the rendered frames
+                    lag_sum, lag_count, lag_max = lag_stats.get(idx, (0.0, 0, 0.0))
+                    if lag_count:
+                        f.write(f"  - Analysis Lag: mean {lag_sum / lag_count * 1000:.0f} ms, max {lag_max * 1000:.0f} ms\n")
+                    
+                    # 6. Audio/video alignment of the director's decisions
+                    skew_sum, skew_count, skew_max = skew_stats.get(idx, (0.0, 0, 0.0))
+                    if skew_count:
+                        f.write(f"  - A/V Skew: mean {skew_sum / skew_count * 1000:.0f} ms, max {skew_max * 1000:.0f} ms "
+                                f"(camera latency {self.active_cameras[idx].latency * 1000:.0f} ms, "
+                                f"mic latency {self.vads[idx].latency * 1000:.0f} ms)\n")
 
             print(f"📄 Report generated: {report_file}")
             
@@ -600,6 +881,8 @@ class DirectorEngine:
                 c.release()
             for v in self.vads.values():
                 v.stop()
+            if self.audio is not None:
+                self.audio.stop()
             cv2.destroyAllWindows()
             # Clear them so they can be re-inited if needed
             self.active_cameras = {}
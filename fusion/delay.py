@@ -0,0 +1,103 @@
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Delayed broadcast. The program output trails the cameras by a fixed delay;
+# meanwhile every camera's frames wait in a JPEG-compressed ring (bounded in
+# bytes, not frames) together with what the render needs (faces, emotion,
+# speaking). The director still decides on live inputs, but its cuts go into
+# a ProgramTimeline: a cut to a new speaker is moved back to that speaker's
+# speech onset (slightly before it), so the output shows the first syllables
+# on the right camera. A cut moves back at most max_shift (a speaker who
+# started during the previous shot's minimum duration still waits for most
+# of it), never before what has already been output, and never so far that
+# the previous shot gets shorter than min_shot.
+
+
+class DelayedFrame:
+    __slots__ = ("timestamp", "data", "faces", "emotion", "speaking")
+
+    def __init__(self, timestamp, data, faces, emotion, speaking):
+        self.timestamp = timestamp  # Capture time (time.monotonic())
+        self.data = data            # JPEG bytes
+        self.faces = faces
+        self.emotion = emotion
+        self.speaking = speaking
+
+    def decode(self):
+        return cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class FrameDelayBuffer:
+    """One camera's frames of the last max_age seconds, JPEG-encoded, capped at max_bytes"""
+
+    def __init__(self, max_bytes, max_age, quality=85):
+        self.max_bytes = int(max_bytes)
+        self.max_age = max_age
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        self.frames = deque()
+        self.nbytes = 0
+        self.peak_bytes = 0
+        self.evicted = 0 # Frames dropped by the memory cap before they were old enough
+
+    def push(self, timestamp, frame, faces=None, emotion=None, speaking=False):
+        ok, data = cv2.imencode(".jpg", frame, self.params)
+        if not ok:
+            return
+        data = data.tobytes()
+        self.frames.append(DelayedFrame(timestamp, data, faces, emotion, speaking))
+        self.nbytes += len(data)
+        while self.frames and self.frames[0].timestamp < timestamp - self.max_age:
+            self.nbytes -= len(self.frames.popleft().data)
+        while self.nbytes > self.max_bytes and len(self.frames) > 1:
+            self.nbytes -= len(self.frames.popleft().data)
+            self.evicted += 1
+        self.peak_bytes = max(self.peak_bytes, self.nbytes)
+
+    def at(self, t):
+        """Newest frame captured at or before t (the oldest one if all are newer, None if empty)"""
+        found = None
+        for frame in reversed(self.frames):
+            found = frame
+            if frame.timestamp <= t:
+                break
+        return found
+
+
+class ProgramTimeline:
+    """Which camera the delayed program shows when, as (start time, camera) segments"""
+
+    def __init__(self, camera, start, pre_roll=0.15, max_shift=0.75, min_shot=1.0):
+        self.segments = deque([(start, camera)])
+        self.pre_roll = pre_roll    # Seconds shown before a speaker's onset
+        self.max_shift = max_shift  # Furthest a cut moves back (s)
+        self.min_shot = min_shot    # A moved cut can't shorten the previous shot below this
+        self.emitted = start        # Newest program time already output
+        self.shifts = []            # Seconds each cut was moved back
+
+    def cut(self, t, camera, onset=None):
+        """The director cut to camera at capture time t; onset: the speech onset that caused it"""
+        if camera == self.segments[-1][1]:
+            return
+        start = t if onset is None else min(t, max(onset - self.pre_roll, t - self.max_shift))
+        start = max(start, self.emitted, self.segments[-1][0] + self.min_shot)
+        if start > t:
+            # Director cut sooner than min_shot after the last one: keep its timing
+            start = max(t, self.emitted)
+        self.segments.append((start, camera))
+        self.shifts.append(t - start)
+
+    def camera_at(self, t):
+        camera = self.segments[0][1]
+        for start, cam in self.segments:
+            if start > t:
+                break
+            camera = cam
+        return camera
+
+    def emit(self, t):
+        """Program time t was output; earlier segments can't change any more"""
+        self.emitted = max(self.emitted, t)
+        while len(self.segments) > 1 and self.segments[1][0] <= self.emitted:
+            self.segments.popleft()
@@ -1,205 +1,231 @@
 import time
 import random
 
+import numpy as np
+
+# Shot scoring. Every tick the director fills one row per camera of a feature
+# matrix (columns below), then scores all cameras at once as matrix @ weights
+# (plus time since each camera was last shown, from the director's own state).
+# The rules only decide which cameras may be cut to yet (faces, minimum shot
+# durations) and how much the shown camera is favoured:
+#   - the active camera keeps a HYSTERESIS bonus, so near-equal scores don't
+#     flicker; long silence or a shot over MAX_SHOT_DURATION drops it ("pacing")
+#   - time since a camera was last shown only counts while pacing, so
+#     silence and stale shots move to the camera not seen for longest
+#   - an expressive face (EMOTION) outweighs a speaker and may cut in after
+#     REACTION_MIN_SHOT, everything else waits for MIN_SHOT_DURATION
+#   - after FACE_LOSS_THRESHOLD without a face the active camera loses its score
+# A cut happens when the best allowed camera beats the active one; ties are
+# broken by the RNG. update() keeps the per-camera dicts and only fills the
+# matrix once a tick gets past the minimum-shot gate, so hold ticks (most of
+# them) never touch numpy; callers holding arrays already (fusion/simulator.py
+# converts a whole session once) pass them to decide() directly.
+
+SPEAKING, VOLUME, FACES, FACE_SIZE, EMOTION = range(5)
+
+# Emotions worth a reaction shot (EMOTION column)
+EMOTION_SALIENCE = {"Surprise": 1.0, "Happy": 1.0, "Fear": 1.0}
+
+
 class AutoDirector:
-    def __init__(self, camera_config):
+    # Tunables (see fusion/simulator.py for replaying sessions with other values)
+    PARAMS = ("MIN_SHOT_DURATION", "MAX_SHOT_DURATION", "REACTION_THRESHOLD", "FACE_LOSS_THRESHOLD",
+              "REACTION_MIN_SHOT", "DOMINANCE_RATIO", "HYSTERESIS", "SPEAKING_WEIGHT", "VOLUME_WEIGHT",
+              "FACE_COUNT_WEIGHT", "FACE_SIZE_WEIGHT", "EMOTION_WEIGHT", "UNSEEN_WEIGHT")
+    FEATURES = 5 # Columns of the feature matrix
+
+    def __init__(self, camera_config, clock=time.monotonic, rng=None, verbose=True):
+        # clock: seconds (only differences matter), used when update() gets no `now`
+        # rng: random.Random breaking ties between equally scored cameras; seed it for reproducible cuts
         self.camera_config = camera_config
         self.num_cameras = len(camera_config)
-        # Map logical index 0..N to keys in config if needed, or assume keys correspond to indices
-        # For simplicity, assuming keys are 0, 1, ...
         self.camera_indices = list(camera_config.keys())
+        self.positions = {key: i for i, key in enumerate(self.camera_indices)} # Camera key -> matrix row
         self.active_camera_index = self.camera_indices[0] if self.camera_indices else 0
-        self.last_switch_time = time.time()
-        
+        self.clock = clock
+        self.rng = rng if rng is not None else random.Random()
+        self.verbose = verbose
+        self.last_switch_time = clock()
+        self.now = self.last_switch_time # Time of the current update()
+        self.last_cut = None # (time, camera, reason) of the latest switch
+        self.features = np.zeros((self.num_cameras, self.FEATURES)) # Current tick's feature matrix (columns above)
+        self.last_shown = np.full(self.num_cameras, -np.inf) # When each camera was last cut away from
+        self.pending = None # update()'s per-camera dicts, until decide() needs the matrix
+
         # Configuration
         self.MIN_SHOT_DURATION = 4.0        # Minimum time to stay on one shot (prevent flicker)
         self.MAX_SHOT_DURATION = 15.0       # Maximum time before considering a switch (prevent boredom)
         self.REACTION_THRESHOLD = 2.0       # Time of silence before considering a reaction shot
         self.FACE_LOSS_THRESHOLD = 2.0      # Grace period for temporary face loss
-        
+        self.REACTION_MIN_SHOT = 2.0        # Minimum shot duration before an emotion reaction cut
+        self.DOMINANCE_RATIO = 0.7          # Speakers quieter than this share of the loudest count as bleed
+        self.HYSTERESIS = 1.0               # Score bonus of the active camera (outside pacing)
+        self.SPEAKING_WEIGHT = 4.0          # Feature weights of the shot score
+        self.VOLUME_WEIGHT = 1.0            # (volume and face size relative to the largest camera)
+        self.FACE_COUNT_WEIGHT = 0.25
+        self.FACE_SIZE_WEIGHT = 0.5
+        self.EMOTION_WEIGHT = 8.0
+        self.UNSEEN_WEIGHT = 1.0            # Per MAX_SHOT_DURATION not shown (capped at one)
+
         self.silence_start_time = None
         self.face_loss_start_time = None # Track when we lost face on active cam
 
-    def update(self, speaking_map, faces_map, volume_map=None, emotions_map=None):
+    def get_params(self):
+        return {name: getattr(self, name) for name in self.PARAMS}
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            if name not in self.PARAMS:
+                raise ValueError(f"Unknown director parameter '{name}' (expected one of {self.PARAMS})")
+            setattr(self, name, value)
+
+    def get_state(self):
+        """Everything besides the parameters and the RNG that the next decision depends on"""
+        return {
+            "active": self.active_camera_index,
+            "last_switch_time": self.last_switch_time,
+            "silence_start_time": self.silence_start_time,
+            "face_loss_start_time": self.face_loss_start_time,
+            "last_shown": [None if np.isinf(t) else float(t) for t in self.last_shown],
+        }
+
+    def set_state(self, state):
+        self.active_camera_index = state["active"]
+        self.last_switch_time = state["last_switch_time"]
+        self.silence_start_time = state["silence_start_time"]
+        self.face_loss_start_time = state["face_loss_start_time"]
+        if state.get("last_shown") is not None:
+            self.last_shown = np.array([-np.inf if t is None else t for t in state["last_shown"]], dtype=np.float64)
+
+    def update(self, speaking_map, faces_map, volume_map=None, emotions_map=None, now=None):
+        """
+        Decides which camera should be active. now: the tick's time (default: clock())
+        """
+        self.pending = (speaking_map, faces_map, volume_map, emotions_map)
+        return self.decide(now)
+
+    def fill_features(self, speaking_map, faces_map, volume_map=None, emotions_map=None, out=None):
         """
-        Decides which camera should be active.
+        Writes the per-camera inputs into out (an (N, FEATURES) array, default
+        self.features)
         """
-        # Resolve Dominant Speaker (Mic Bleed Handling)
-        if volume_map:
-            speaking_map = self._resolve_dominant_speakers(speaking_map, volume_map)
+        keys = self.camera_indices
+        X = self.features if out is None else out
+        X[:, SPEAKING] = [speaking_map.get(k, False) for k in keys]
+        X[:, VOLUME] = [volume_map.get(k, 0.0) for k in keys] if volume_map else 0.0
+        X[:, FACES] = [0.0 if (f := faces_map.get(k)) is None else min(len(f), 3) / 3 for k in keys] # Up to three count
+        X[:, EMOTION] = [EMOTION_SALIENCE.get(emotions_map.get(k), 0.0) for k in keys] if emotions_map else 0.0
+        # Largest box area, in float64 like a replayed tick log (not the detector's float32)
+        X[:, FACE_SIZE] = [max((float(box[2]) * float(box[3]) for box in f), default=0.0) if f is not None else 0.0
+                           for f in map(faces_map.get, keys)]
 
-        current_time = time.time()
+    def decide(self, now=None, features=None):
+        """
+        Scores the feature matrix and cuts if another camera wins; returns the
+        active camera. features: (N, FEATURES) array in camera_indices order
+        (default: update()'s inputs), not modified.
+        """
+        current_time = self.clock() if now is None else now
+        self.now = current_time
+        if not self.num_cameras:
+            return self.active_camera_index
+        pending = self.pending if features is None else None
+        self.pending = None
+        X = self.features if features is None else features
+        active = self.positions[self.active_camera_index]
         time_since_switch = current_time - self.last_switch_time
-        
-        # Determine global speaking state (is ANYONE speaking?)
-        is_anyone_speaking = any(speaking_map.values())
-        
+        if pending:
+            # Plain dict lookups until the gate below is passed
+            speaking_map, faces_map, _, emotions_map = pending
+            anyone_speaking = any(speaking_map.get(k, False) for k in self.camera_indices)
+            has_face = (f := faces_map.get(self.active_camera_index)) is not None and len(f) > 0
+            emotional = lambda: bool(emotions_map) and any(
+                EMOTION_SALIENCE.get(emotions_map.get(k)) for k in self.camera_indices)
+        else:
+            anyone_speaking = X[:, SPEAKING].any()
+            has_face = X[active, FACES] > 0
+            emotional = lambda: X[:, EMOTION].any()
+
         # Track silence duration
-        if not is_anyone_speaking:
+        if not anyone_speaking:
             if self.silence_start_time is None:
                 self.silence_start_time = current_time
         else:
             self.silence_start_time = None
-            
-        silence_duration = (current_time - self.silence_start_time) if self.silence_start_time else 0.0
-        
-        # --- Rule 1: Anti-Flicker (Minimum Shot Duration) ---
-        current_has_face = self._has_face(faces_map, self.active_camera_index)
-        
-        # Track face loss
-        if current_has_face:
+        silence_duration = (current_time - self.silence_start_time) if self.silence_start_time is not None else 0.0
+
+        # Track face loss on the active camera (the grace period counts as having a face)
+        if has_face:
             self.face_loss_start_time = None
-        else:
-            if self.face_loss_start_time is None:
-                self.face_loss_start_time = current_time
-        
-        face_loss_duration = (current_time - self.face_loss_start_time) if self.face_loss_start_time else 0.0
-        
-        # Determine if we REALLY need to switch due to face loss (grace period exceeded)
-        urgent_face_switch_needed = not current_has_face and face_loss_duration > self.FACE_LOSS_THRESHOLD
-        
-        # --- Rule 0: High Emotion Reaction Shot (NEW) ---
-        # If someone else is showing a strong emotion (Surprise, Happy), cut to them!
-        # But only if we aren't cutting away from an active speaker too fast (unless it's REALLY good)
-        if emotions_map and time_since_switch > 2.0: # Allow faster cuts for reactions
-            high_salience = ['Surprise', 'Happy', 'Fear']
-            
-            # Check other cameras
-            for idx in self.camera_indices:
-                if idx == self.active_camera_index: continue
-                
-                # Check emotion
-                emo = emotions_map.get(idx)
-                if emo in high_salience:
-                    # Switch!
-                    # But verify they have a face (implied by having an emotion, but good to check)
-                     if self._has_face(faces_map, idx):
-                        # print(f"😲 Reaction Shot to Cam {idx} due to {emo}!")
-                        self._switch_to(idx)
-                        return self.active_camera_index
-        
-        # --- Rule 2: Speaker Priority ---
-        # Identify who is speaking
-        speakers = [idx for idx, speaking in speaking_map.items() if speaking]
-        
-        if speakers:
-            # Someone is speaking.
-            
-            # If the current active camera IS one of the speakers (and has face OR within grace period), stay.
-            # We treat "within grace period" as "effectively has face" for retention purposes
-            if self.active_camera_index in speakers and not urgent_face_switch_needed:
-                 # Check staleness?
-                 if time_since_switch > self.MAX_SHOT_DURATION:
-                     # If there are OTHER speakers, switch to them?
-                     other_speakers = [s for s in speakers if s != self.active_camera_index]
-                     if other_speakers:
-                          # Switch to another speaker if they have a face
-                          for s in other_speakers:
-                              if self._has_face(faces_map, s):
-                                  self._switch_to(s)
-                                  return self.active_camera_index
-                     
-                     # Else maybe switch to reaction shot? No, keep focus on speaker.
-                 return self.active_camera_index
-            
-            # Check if we should switch to a speaker
-            # Only switch if we are allowed to (min duration passed) OR if we URGENTLY need to (face lost)
-            if time_since_switch > self.MIN_SHOT_DURATION or urgent_face_switch_needed:
-                # Find a speaker who has a face
-                # Prioritize: 
-                # 1. A speaker with a face
-                # 2. (Maybe) A speaker without a face? (Audio only? No, boring)
-                
-                # Check all speakers
-                for s in speakers:
-                     if self._has_face(faces_map, s):
-                         self._switch_to(s)
-                         return self.active_camera_index
-        
-        # --- Rule 3: Reaction / Pacing (Silence) ---
-        if not is_anyone_speaking and silence_duration > self.REACTION_THRESHOLD:
-            if time_since_switch > self.MIN_SHOT_DURATION:
-                best_alt = self._find_best_alternative(faces_map, self.active_camera_index)
-                if best_alt is not None:
-                    self._switch_to(best_alt)
-                    return self.active_camera_index
-
-        # --- Rule 4: Staleness / No Face ---
-        if urgent_face_switch_needed:
-             # Urgent switch needed because face is definitively gone
-             best_alt = self._find_best_alternative(faces_map, self.active_camera_index)
-             if best_alt is not None:
-                 self._switch_to(best_alt)
-        elif time_since_switch > self.MAX_SHOT_DURATION:
-             best_alt = self._find_best_alternative(faces_map, self.active_camera_index)
-             if best_alt is not None:
-                 self._switch_to(best_alt)
+        elif self.face_loss_start_time is None:
+            self.face_loss_start_time = current_time
+        face_loss_duration = (current_time - self.face_loss_start_time) if self.face_loss_start_time is not None else 0.0
+        urgent = self.face_loss_start_time is not None and face_loss_duration > self.FACE_LOSS_THRESHOLD
 
+        # Within the minimum shot only an emotion (or a lost face) can cut: most ticks end here
+        if not urgent and time_since_switch <= self.MIN_SHOT_DURATION and (
+                time_since_switch <= self.REACTION_MIN_SHOT or not emotional()):
+            return self.active_camera_index
+        if pending:
+            self.fill_features(*pending)
+
+        pacing = silence_duration > self.REACTION_THRESHOLD or time_since_switch > self.MAX_SHOT_DURATION
+        # Volume and face size count relative to the loudest / largest camera
+        loudest, largest = X[:, VOLUME].max(), X[:, FACE_SIZE].max()
+        weights = np.array([self.SPEAKING_WEIGHT, self.VOLUME_WEIGHT / loudest if loudest > 0 else 0.0,
+                            self.FACE_COUNT_WEIGHT, self.FACE_SIZE_WEIGHT / largest if largest > 0 else 0.0,
+                            self.EMOTION_WEIGHT])
+        scores = X @ weights
+
+        # Mic bleed: speakers much quieter than the loudest one are not speaking.
+        # The engine's inputs are already filtered by the AudioAnalyzer, so live
+        # this rarely changes anything (only across snapshots of different
+        # rounds); it is kept for raw inputs, e.g. synthetic sessions and tick
+        # logs replayed by fusion/simulator.py
+        speaking = X[:, SPEAKING] > 0
+        if speaking.sum() > 1:
+            volume = X[:, VOLUME]
+            bleed = speaking & (volume < volume[speaking].max() * self.DOMINANCE_RATIO)
+            speaking &= ~bleed
+            scores -= self.SPEAKING_WEIGHT * bleed
+
+        if pacing:
+            unseen = np.minimum((current_time - self.last_shown) / self.MAX_SHOT_DURATION, 1.0)
+            unseen[active] = 0.0
+            scores += self.UNSEEN_WEIGHT * unseen
+
+        # Who may be cut to now: a face, and the shot has lasted long enough (emotions wait less)
+        allowed = X[:, FACES] > 0
+        if not urgent and time_since_switch <= self.MIN_SHOT_DURATION:
+            allowed &= X[:, EMOTION] > 0
+        allowed[active] = False
+        hold = -np.inf if urgent else scores[active] + (0.0 if pacing else self.HYSTERESIS)
+        scores[~allowed] = -np.inf
+
+        best = int(scores.argmax())
+        if scores[best] > hold:
+            ties = np.flatnonzero(scores == scores[best])
+            if len(ties) > 1:
+                best = int(ties[self.rng.randrange(len(ties))])
+            if urgent:
+                reason = "face_loss"
+            elif speaking[best]:
+                reason = "rotation" if speaking[active] else "speaker"
+            elif X[best, EMOTION] > 0:
+                reason = "emotion"
+            elif silence_duration > self.REACTION_THRESHOLD:
+                reason = "silence"
+            else:
+                reason = "stale"
+            self._switch_to(self.camera_indices[best], reason)
         return self.active_camera_index
 
-    def _switch_to(self, index):
+    def _switch_to(self, index, reason):
         if index != self.active_camera_index:
+            self.last_shown[self.positions[self.active_camera_index]] = self.now
             self.active_camera_index = index
-            self.last_switch_time = time.time()
-            role = self.camera_config.get(index, {}).get("role", "UNKNOWN")
-            print(f"🎬 Director: CUT to Camera {index} ({role})")
-
-    def _has_face(self, faces_map, index):
-        faces = faces_map.get(index)
-        return faces is not None and len(faces) > 0
-
-    def _find_best_alternative(self, faces_map, exclude_index):
-        # Candidates from configured indices
-        candidates = [i for i in self.camera_indices if i != exclude_index]
-        random.shuffle(candidates) # Diversity
-        
-        for i in candidates:
-            if self._has_face(faces_map, i):
-                return i
-        return None
-
-    def _resolve_dominant_speakers(self, speaking_map, volume_map):
-        """
-        If multiple people are 'speaking' (according to VAD), but one is significantly louder,
-        assume the others are just bleed/crosstalk and mute them in the map.
-        """
-        # Identify who is currently marked as speaking
-        speakers = [idx for idx, is_speaking in speaking_map.items() if is_speaking]
-        
-        if len(speakers) <= 1:
-            return speaking_map
-            
-        # Compare volumes
-        # Find the loudest speaker
-        max_vol = -1.0
-        loudest_idx = None
-        
-        for idx in speakers:
-            vol = volume_map.get(idx, 0.0)
-            if vol > max_vol:
-                max_vol = vol
-                loudest_idx = idx
-        
-        if loudest_idx is None:
-            return speaking_map
-            
-        # Create a new map where only the loudest (or those close to it) remain
-        # For strict dominance: only keep the loudest.
-        # But maybe we want a margin? e.g. if volumes are very close (0.8 vs 0.79), keep both?
-        # Let's try strict dominance for now to solve the bleed issue aggressively.
-        
-        new_speaking_map = speaking_map.copy()
-        
-        # DOMINANCE_RATIO = 0.5 # If a mic is < 50% of the max volume, drop it.
-        # Actually, let's just pick the winner.
-        
-        for idx in speakers:
-            if idx != loudest_idx:
-                # If this speaker is significantly quieter than the max, mute them.
-                # Let's say if they are less than 70% of the max volume.
-                if volume_map.get(idx, 0.0) < (max_vol * 0.7):
-                    new_speaking_map[idx] = False
-                    # trigger print only occasionally or if state changed? 
-                    # For now just silent logic.
-                    
-        return new_speaking_map
+            self.last_switch_time = self.now
+            self.last_cut = (self.now, index, reason)
+            if self.verbose:
+                role = self.camera_config.get(index, {}).get("role", "UNKNOWN")
+                print(f"🎬 Director: CUT to Camera {index} ({role})")
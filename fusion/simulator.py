@@ -0,0 +1,292 @@
+import itertools
+import json
+import multiprocessing as mp
+import random
+
+import numpy as np
+
+from fusion.director import AutoDirector, SPEAKING
+
+# Offline director runs. During a session the engine writes every tick's
+# director inputs (speaking, volume, face boxes, emotions), the tick time and
+# the camera the director picked to a JSON-lines tick log; the first line is a
+# header with the cameras, the director's parameters, state and RNG seed.
+# simulate() feeds a log back through a fresh AutoDirector on the logged
+# clock, so a session replays as fast as the director can decide (and exactly
+# reproduces the live cuts with the logged parameters). sweep() does that for
+# every combination of a parameter grid over several sessions.
+#
+# Metrics (per session, or summed over sessions):
+#   cuts_per_minute   switches per minute of session
+#   mean_shot         average shot length (s)
+#   short_shots       shots shorter than 2 s
+#   time_on_speaker   share of the time someone speaks that the active camera's mic speaks
+#   reaction_shots    cuts to a camera whose mic isn't speaking at that moment
+#   live_agreement    share of ticks where the replay picked the logged camera
+
+
+class TickLogger:
+    """Writes a session's director inputs (see module comment). One line per tick."""
+
+    def __init__(self, path, director, seed=None):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.params = director.get_params()
+        self._write({
+            "type": "header",
+            "cameras": {str(k): v.get("role", f"CAM {k}") for k, v in director.camera_config.items()},
+            "params": self.params,
+            "state": director.get_state(),
+            "seed": seed,
+        })
+
+    def log(self, t, speaking_map, faces_map, volume_map, emotions_map, active, director):
+        tick = {
+            "t": t,
+            "speaking": {str(k): bool(v) for k, v in speaking_map.items()},
+            # Unrounded: the director scores relative volumes and face sizes, replays must see the same values
+            "volume": {str(k): float(v) for k, v in (volume_map or {}).items()},
+            # Boxes only: the director looks at presence and size
+            "faces": {str(k): None if v is None else np.asarray(v, dtype=np.float64)[:, :4].tolist()
+                      for k, v in faces_map.items()},
+            "emotions": {str(k): v for k, v in (emotions_map or {}).items()},
+            "active": active,
+        }
+        params = director.get_params()
+        if params != self.params:
+            # The GUI changed a parameter during the session
+            tick["params"] = self.params = params
+        self._write(tick)
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def _int_keys(d):
+    return {int(k) if k.lstrip("-").isdigit() else k: v for k, v in d.items()}
+
+
+def load_session(path):
+    """(header, ticks) of a tick log, with camera keys back as ints"""
+    header, ticks = None, []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("type") == "header":
+                header = record
+                header["cameras"] = _int_keys(record["cameras"])
+                continue
+            for key in ("speaking", "volume", "faces", "emotions"):
+                record[key] = _int_keys(record.get(key, {}))
+            ticks.append(record)
+    if header is None:
+        raise ValueError(f"{path} has no tick log header")
+    return header, ticks
+
+
+def _new_director(header, seed=None):
+    cameras = {k: {"role": role} for k, role in header["cameras"].items()}
+    director = AutoDirector(cameras, clock=lambda: 0.0, verbose=False,
+                            rng=random.Random(header.get("seed") if seed is None else seed))
+    director.set_params(**header["params"])
+    director.set_state(header["state"])
+    return director
+
+
+def prepare(header, ticks):
+    """
+    A session's ticks as arrays, converted once so every simulate() of it
+    runs on them: {"times", "features" (ticks x cameras x AutoDirector.FEATURES),
+    "params" {tick index: logged parameter change}, "logged" (logged camera
+    row per tick, -1 if none)}
+    """
+    director = _new_director(header)
+    n = len(ticks)
+    features = np.zeros((n, director.num_cameras, director.FEATURES))
+    logged = np.full(n, -1, dtype=np.intp)
+    for i, tick in enumerate(ticks):
+        director.fill_features(tick["speaking"], tick["faces"], tick["volume"], tick["emotions"], out=features[i])
+        if "active" in tick:
+            logged[i] = director.positions.get(tick["active"], -2) # -2: a camera the header doesn't know
+    return {
+        "times": [tick["t"] for tick in ticks],
+        "features": features,
+        "params": {i: tick["params"] for i, tick in enumerate(ticks) if "params" in tick},
+        "logged": logged,
+    }
+
+
+def simulate(header, ticks, params=None, seed=None, prepared=None):
+    """
+    Replays ticks through a new AutoDirector. params: overrides for
+    AutoDirector.PARAMS (they win over values logged during the session);
+    seed: RNG seed (default: the logged one); prepared: prepare(header, ticks),
+    when the session is simulated more than once.
+    Returns (cuts [(t, camera, reason)], raw totals for summarize()).
+    """
+    if prepared is None:
+        prepared = prepare(header, ticks)
+    director = _new_director(header, seed)
+    overrides = params or {}
+    director.set_params(**overrides)
+
+    times, features, changes = prepared["times"], prepared["features"], prepared["params"]
+    n = len(times)
+    active = np.empty(n, dtype=np.intp)
+    cuts = []
+    cut_rows = []
+    decide = director.decide
+    positions = director.positions
+    current = positions[director.active_camera_index]
+    for i in range(n):
+        if i in changes:
+            director.set_params(**{**changes[i], **overrides})
+        camera = decide(times[i], features[i])
+        if positions[camera] != current:
+            current = positions[camera]
+            cuts.append((times[i], camera, director.last_cut[2]))
+            cut_rows.append(i)
+        active[i] = current
+
+    # Metrics on the logged (raw) speaking flags
+    times = np.asarray(times, dtype=np.float64)
+    speaking = features[:, :, SPEAKING] > 0
+    on_speaker = speaking[np.arange(n), active]
+    anyone = speaking.any(axis=1)
+    logged = prepared["logged"]
+    # Each tick lasts until the next one (the last one as long as a typical tick)
+    dt = np.diff(times, append=times[-1] + (np.median(np.diff(times)) if n > 1 else 0.0)) if n else times
+    shot_starts = [times[0]] + [t for t, _, _ in cuts] if n else []
+    shot_lengths = np.diff(shot_starts + [times[-1] + dt[-1]]) if n else np.zeros(0)
+    raw = {
+        "duration": float(dt.sum()),
+        "speech_time": float(dt[anyone].sum()),
+        "on_speaker_time": float(dt[on_speaker & anyone].sum()),
+        "cuts": len(cuts),
+        "shots": len(shot_lengths),
+        "short_shots": int((shot_lengths < 2.0).sum()),
+        "reaction_shots": int((~on_speaker[cut_rows]).sum()) if cut_rows else 0,
+        "agree": int((logged == active).sum()),
+        "logged": int((logged != -1).sum()),
+    }
+    return cuts, raw
+
+
+def summarize(raw):
+    """Metrics (see module comment) from simulate()'s raw totals, or several of them summed"""
+    minutes = raw["duration"] / 60.0
+    return {
+        "cuts": raw["cuts"],
+        "cuts_per_minute": raw["cuts"] / minutes if minutes else 0.0,
+        "mean_shot": raw["duration"] / raw["shots"] if raw["shots"] else 0.0,
+        "short_shots": raw["short_shots"],
+        "time_on_speaker": raw["on_speaker_time"] / raw["speech_time"] if raw["speech_time"] else None,
+        "reaction_shots": raw["reaction_shots"],
+        "live_agreement": raw["agree"] / raw["logged"] if raw["logged"] else None,
+    }
+
+
+def _add(total, raw):
+    for key, value in raw.items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
+_sessions = None # [(header, prepared)] of this worker
+
+
+def _init_worker(sessions):
+    global _sessions
+    _sessions = [(header, prepare(header, ticks)) for header, ticks in sessions]
+
+
+def _run_combo(args):
+    params, seed = args
+    total = {}
+    for header, prepared in _sessions:
+        _add(total, simulate(header, None, params, seed, prepared=prepared)[1])
+    return params, summarize(total)
+
+
+def grid_combinations(grid):
+    """[{name: value}] for every combination of {name: [values]}"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def sweep(sessions, grid, seed=None, workers=None):
+    """
+    Simulates every parameter combination of grid ({name: [values]}) over all
+    sessions ([(header, ticks)]); returns [(params, metrics)] with the metrics
+    of all sessions together. workers: processes (None = one per CPU, 1 = inline).
+    """
+    jobs = [(params, seed) for params in grid_combinations(grid)]
+    if workers == 1:
+        _init_worker(sessions)
+        return [_run_combo(job) for job in jobs]
+    with mp.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=(sessions,)) as pool:
+        return pool.map(_run_combo, jobs, chunksize=max(1, len(jobs) // (4 * (workers or mp.cpu_count()))))
+
+
+def synthetic_session(seconds=600.0, cameras=2, fps=15.0, seed=0):
+    """
+    (header, ticks) of a made-up conversation: turns of 2-15 s with pauses,
+    short interjections, mic bleed, face dropouts and occasional emotion bursts.
+    For exercising the simulator when no tick logs are at hand.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    speaking = np.zeros((cameras, n), dtype=bool)
+    pos, speaker = int(rng.uniform(0, 2) * fps), 0
+    while pos < n:
+        turn = int(rng.uniform(2, 15) * fps)
+        speaking[speaker, pos:pos + turn] = True
+        if cameras > 1 and rng.random() < 0.3:
+            # Someone else chimes in during the turn
+            other = (speaker + rng.integers(1, cameras)) % cameras
+            start = pos + int(rng.uniform(0.3, 0.8) * turn)
+            speaking[other, start:start + int(rng.uniform(0.3, 1.5) * fps)] = True
+        pos += turn + int(rng.uniform(0.2, 3.0) * fps)
+        if cameras > 1:
+            speaker = (speaker + rng.integers(1, cameras)) % cameras
+    speaking = speaking[:, :n]
+
+    level = rng.uniform(3, 12, size=(cameras, 1))
+    own = speaking * level * rng.uniform(0.7, 1.3, size=(cameras, n))
+    # Everybody leaks into everybody else's mic
+    volume = own + 0.3 * (own.sum(axis=0) - own) + rng.uniform(0.0, 0.5, size=(cameras, n))
+
+    faces = np.ones((cameras, n), dtype=bool)
+    emotions = np.full((cameras, n), "Neutral", dtype=object)
+    for c in range(cameras):
+        for _ in range(rng.poisson(seconds / 60)):
+            start = rng.integers(0, n)
+            faces[c, start:start + int(rng.uniform(0.5, 4.0) * fps)] = False
+        for _ in range(rng.poisson(seconds / 90)):
+            start = rng.integers(0, n)
+            emotions[c, start:start + int(rng.uniform(0.5, 2.0) * fps)] = rng.choice(["Happy", "Surprise"])
+
+    box = [[200, 120, 160, 200]]
+    ticks = []
+    for i in range(n):
+        ticks.append({
+            "t": i / fps,
+            "speaking": {c: bool(speaking[c, i]) for c in range(cameras)},
+            "volume": {c: float(volume[c, i]) for c in range(cameras)},
+            "faces": {c: box if faces[c, i] else None for c in range(cameras)},
+            "emotions": {c: emotions[c, i] for c in range(cameras) if faces[c, i]},
+        })
+    director = AutoDirector({c: {} for c in range(cameras)}, clock=lambda: 0.0, verbose=False)
+    header = {
+        "type": "header",
+        "cameras": {c: f"CAM {c}" for c in range(cameras)},
+        "params": director.get_params(),
+        "state": director.get_state(),
+        "seed": seed,
+    }
+    return header, ticks
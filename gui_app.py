@@ -273,6 +273,9 @@ class ControlPanel(QMainWindow):
             ("Audio Sensitivity", "audio_threshold", 1, 100, 100.0, ""), # Display raw or inv?
             ("Silence Hold Time", "silence_hold", 1, 50, 10.0, "s"),
             ("Face Loss Grace", "grace_period", 0, 50, 10.0, "s"),
+            # Per session: applied when the next recording starts
+            ("Program Delay (next session)", "broadcast_delay", 0, 30, 10.0, "s"),
+            ("Delay Buffer JPEG Quality", "delay_quality", 50, 95, 1.0, ""),
         ]
         
         self.slider_labels = {}
@@ -438,7 +441,9 @@ class ControlPanel(QMainWindow):
             self.rec_list_layout.addWidget(QLabel("No recordings found."))
             return
 
-        files = sorted([f for f in os.listdir(output_dir) if f.endswith('.avi') or f.endswith('_report.txt')], reverse=True)
+        # Videos, muxed videos, audio sidecars (not the raw per-mic captures) and reports
+        files = sorted([f for f in os.listdir(output_dir)
+                        if f.endswith(('.avi', '.mkv', '.wav', '_report.txt')) and not f.endswith('.raw.wav')], reverse=True)
         if not files:
              self.rec_list_layout.addWidget(QLabel("No recordings found."))
              return
@@ -471,18 +476,16 @@ class ControlPanel(QMainWindow):
     def update_image_slot(self, cv_frame):
         """Standard PyQt slot to update the video label from a numpy BGR array"""
         if cv_frame is None: return
+        cv_frame = np.ascontiguousarray(cv_frame)
         
-        # Convert BGR (OpenCV) to RGB (Qt)
-        qt_img_format = QImage.Format.Format_RGB888
+        # Qt reads OpenCV's BGR layout directly, no RGB conversion needed
+        qt_img_format = QImage.Format.Format_BGR888
         
         h, w, ch = cv_frame.shape
-        bytes_per_line = ch * w
+        bytes_per_line = cv_frame.strides[0]
         
-        # We need a copy if data is not contiguous, but usually is.
-        # cvtColor handles copy implicitly or returns new array.
-        rgb_frame = cv2.cvtColor(cv_frame, cv2.COLOR_BGR2RGB)
-        
-        q_img = QImage(rgb_frame.data, w, h, bytes_per_line, qt_img_format)
+        # QImage wraps the buffer; the engine hands us a fresh frame per emit
+        q_img = QImage(cv_frame.data, w, h, bytes_per_line, qt_img_format)
         
         # Scale to fit label?
         pixmap = QPixmap.fromImage(q_img)
@@ -18,6 +18,11 @@ class AppState:
         self.silence_hold = 0.8
         self.grace_period = 2.0
         
+        # Delayed broadcast (read when a session starts): program delay in
+        # seconds (0 = live) and JPEG quality of the buffered frames
+        self.broadcast_delay = 0.0
+        self.delay_quality = 85
+        
         # Visuals
         self.show_face_boxes = True
         self.developer_mode = True # Controls text overlays
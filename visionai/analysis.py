@@ -0,0 +1,259 @@
+import time
+import threading
+
+from visionai.face_detect import scale_faces
+from visionai.frame_context import FrameContext
+from visionai.tracker import FaceTracker
+from visionai.motion import MotionGate
+from visionai.tiling import TileScheduler
+from visionai.emotion_cache import EmotionCache, face_signature
+
+# Face/emotion inference in its own thread, decoupled from render/encode.
+# Each round leases the newest frame of every enabled camera, runs tracking,
+# the motion gate, detection and the batched emotion pass on it, then publishes
+# one AnalysisResult per camera stamped with the source frame's capture time.
+# DirectorEngine.run only ever reads the latest results, so a slow detector
+# makes results older instead of making the recording stutter. Within a round,
+# detection waits at most DETECTION_TIMEOUT: a camera whose job misses it keeps
+# its tracker's predicted faces, its frame stays leased until the job ends and
+# it isn't detected again before then, so one stuck camera can't hold back the
+# others.
+
+
+class AnalysisResult:
+    def __init__(self, faces, track_ids, emotion, face_emotions, timestamp, seq):
+        self.faces = faces                  # YuNet rows in full-res frame coordinates, or None
+        self.track_ids = track_ids          # Track id per row of faces
+        self.emotion = emotion              # Camera-level emotion (primary face), or None
+        self.face_emotions = face_emotions  # {track_id: emotion probabilities}
+        self.timestamp = timestamp          # Capture time of the analysed frame (time.monotonic())
+        self.seq = seq                      # Camera sequence number of the analysed frame
+
+    def age(self, now=None):
+        """Seconds between capture of the analysed frame and `now`"""
+        return (time.monotonic() if now is None else now) - self.timestamp
+
+
+class AnalysisStage:
+    """
+    Background inference for a DirectorEngine. Reads the engine's cameras,
+    detectors and tunables (ANALYSIS_SIZE, TRACKER_*, ROI_*, TILING_DEFAULTS,
+    MOTION_*, EMOTION_TTL); call wake() when a camera publishes a frame.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.wake_event = threading.Event()
+        self.lock = threading.Lock()
+        self.results = {}        # {cam_idx: AnalysisResult}, replaced as a whole on publish
+        self.stopped = True
+        self.thread = None
+
+        self.trackers = {}       # {cam_idx: FaceTracker}
+        self.detect_passes = {}  # Detector passes per camera (drives the ROI full sweeps)
+        self.motion_gates = {}   # {cam_idx: MotionGate}
+        self.tile_schedulers = {} # {cam_idx: TileScheduler} of tiled cameras (heat map per tile)
+        self.emotion_cache = EmotionCache(ttl=engine.EMOTION_TTL)
+        self.emotion_stats = {}  # {cam_idx: {emotion: count}}, one count per scored face
+        self.last_seqs = {}
+        self.late = {}           # {cam_idx: Future} of detection jobs that missed their round's deadline
+        self.round_late = {}     # The current round's late jobs (their leases are released when they end)
+        self.rounds = 0
+
+    def start(self):
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="analysis", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        self.wake_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def wake(self):
+        self.wake_event.set()
+
+    def latest(self):
+        """{cam_idx: AnalysisResult} of the newest analysed frame per camera"""
+        with self.lock:
+            return self.results
+
+    def _run(self):
+        while not self.stopped:
+            self.wake_event.wait(timeout=0.1)
+            self.wake_event.clear()
+            if self.stopped:
+                break
+
+            leases = self._lease_newest()
+            if not leases:
+                continue
+            self.round_late = {}
+            try:
+                results = self._analyse(leases)
+            except Exception as e:
+                print(f"❌ Analysis error: {e}")
+                results = {}
+            finally:
+                for idx, lease in leases.items():
+                    if idx in self.round_late:
+                        # The detector may still read the frame
+                        self.round_late[idx].add_done_callback(lambda _f, l=lease: l.release())
+                    else:
+                        lease.release()
+
+            self.rounds += 1
+            with self.lock:
+                merged = {idx: r for idx, r in self.results.items() if idx in self.engine.active_cameras
+                          and self.engine.state.get_cam_enabled(idx)}
+                merged.update(results)
+                self.results = merged
+
+    def _lease_newest(self):
+        leases = {}
+        for idx, cam in list(self.engine.active_cameras.items()):
+            if not self.engine.state.get_cam_enabled(idx):
+                self._forget(idx)
+                continue
+            lease = cam.lease()
+            if lease.ret and lease.frame is not None and lease.seq != self.last_seqs.get(idx):
+                self.last_seqs[idx] = lease.seq
+                leases[idx] = lease
+            else:
+                lease.release()
+        return leases
+
+    def _forget(self, idx):
+        """Drops the state of a disabled camera"""
+        self.trackers.pop(idx, None)
+        self.detect_passes.pop(idx, None)
+        self.motion_gates.pop(idx, None)
+        self.tile_schedulers.pop(idx, None)
+        self.last_seqs.pop(idx, None)
+        self.late.pop(idx, None)
+        self.emotion_cache.drop_camera(idx)
+
+    def _analyse(self, leases):
+        engine = self.engine
+        faces_map = {}
+        track_ids_map = {}
+
+        # Every fresh frame advances the camera's tracker; the detector only
+        # runs when the tracker asks for it (low confidence / periodic / searching)
+        analysis = {} # {idx: (analysis FrameContext, scale)}
+        detect_options = {} # {idx: detect() kwargs}, ROI passes only
+        for idx, lease in leases.items():
+            # Derived images (analysis copy, motion thumbnail, gray face crops)
+            # are computed once per frame and shared by everything below
+            ctx = FrameContext(lease.frame, lease.timestamp, lease.seq)
+            tracker = self.trackers.get(idx)
+            if tracker is None:
+                tracker = FaceTracker(detect_every=engine.TRACKER_DETECT_EVERY,
+                                      min_confidence=engine.TRACKER_MIN_CONFIDENCE)
+                self.trackers[idx] = tracker
+            tracker.predict(lease.timestamp)
+
+            late = self.late.get(idx)
+            if late is not None and late.done():
+                del self.late[idx] # Its result is for an old frame: dropped
+                late = None
+            if not tracker.needs_detection() or late is not None:
+                faces_map[idx], track_ids_map[idx] = tracker.faces()
+                continue
+
+            # Analysis runs on a low-res copy, render keeps the full frame.
+            # Made first so the motion thumbnail is derived from it.
+            tiling = engine.tiling_config(idx)
+            if tiling:
+                analysis_size = tiling["frame_size"] # Tiles keep small faces visible
+            else:
+                analysis_size = engine.CAMERA_CONFIG.get(idx, {}).get("analysis_size", engine.ANALYSIS_SIZE)
+            analysis_ctx, scale = ctx.resized(analysis_size)
+
+            # Static scene: keep the last faces/emotions instead of re-running inference
+            if engine.MOTION_GATE:
+                gate = self.motion_gates.get(idx)
+                if gate is None:
+                    gate = MotionGate(threshold=engine.MOTION_THRESHOLD, max_age=engine.MOTION_MAX_AGE)
+                    self.motion_gates[idx] = gate
+                if not gate.check(ctx, lease.timestamp):
+                    tracker.hold()
+                    faces_map[idx], track_ids_map[idx] = tracker.faces()
+                    continue
+
+            analysis[idx] = (analysis_ctx, scale)
+
+            # Tiled: this pass's tiles plus the areas around known faces
+            if tiling:
+                scheduler = self.tile_schedulers.get(idx)
+                if scheduler is None:
+                    scheduler = TileScheduler(tile_size=tiling["tile_size"], overlap=tiling["overlap"],
+                                              tiles_per_pass=tiling["tiles_per_pass"])
+                    self.tile_schedulers[idx] = scheduler
+                detect_options[idx] = {"tiles": scheduler.select(analysis_ctx.shape),
+                                       "rois": tracker.boxes() * scale}
+                continue
+
+            # Stable tracks: only search around them, except on full sweeps
+            self.detect_passes[idx] = self.detect_passes.get(idx, 0) + 1
+            if (engine.ROI_DETECTION and tracker.is_stable(engine.ROI_STABLE_PASSES)
+                    and self.detect_passes[idx] % engine.ROI_FULL_SWEEP_EVERY != 0):
+                detect_options[idx] = {"rois": tracker.boxes() * analysis[idx][1]}
+
+        # Detect Faces for all due cameras concurrently; late ones keep the tracker's prediction
+        detections, late = engine.detector_pool.detect_many(
+            {idx: a[0].frame for idx, a in analysis.items()}, timeout=engine.DETECTION_TIMEOUT, options=detect_options
+        )
+        for idx, future in late.items():
+            faces_map[idx], track_ids_map[idx] = self.trackers[idx].faces()
+        self.late.update(late)
+        self.round_late = late
+
+        emotion_requests = [] # (cam_idx, track_id, analysis FrameContext, box, signature) for this round's batch
+        for idx, analysis_faces in detections.items():
+            analysis_ctx, scale = analysis[idx]
+            if idx in self.tile_schedulers:
+                self.tile_schedulers[idx].report(analysis_faces)
+            tracker = self.trackers[idx]
+            tracker.update(scale_faces(analysis_faces, 1.0 / scale))
+            faces_map[idx], track_ids_map[idx] = tracker.faces()
+
+            # Only faces whose cached emotion expired or that visibly changed
+            if engine.emotion_detector and faces_map[idx] is not None:
+                for face, track_id in zip(faces_map[idx], track_ids_map[idx]):
+                    analysis_face = scale_faces(face[None], scale)[0]
+                    signature = face_signature(analysis_ctx, analysis_face)
+                    if self.emotion_cache.needs_refresh((idx, track_id), signature, leases[idx].timestamp):
+                        emotion_requests.append((idx, track_id, analysis_ctx, analysis_face[:4], signature))
+
+        # Score all queued faces of all cameras in a single forward pass
+        if emotion_requests:
+            probs = engine.emotion_detector.detect_emotions_batch(
+                [(frame, box) for _, _, frame, box, _ in emotion_requests]
+            )
+            for (idx, track_id, _, _, signature), p in zip(emotion_requests, probs):
+                if p is None:
+                    continue
+                self.emotion_cache.update((idx, track_id), p, signature, leases[idx].timestamp)
+                emotion = engine.emotion_detector.label(p)
+                stats = self.emotion_stats.setdefault(idx, {})
+                stats[emotion] = stats.get(emotion, 0) + 1
+        self.emotion_cache.prune(time.monotonic())
+
+        # Per-face (smoothed) emotions; the camera's emotion, used by the
+        # director, is its primary face's
+        results = {}
+        for idx, lease in leases.items():
+            face_emotions = {}
+            for track_id in track_ids_map[idx]:
+                p = self.emotion_cache.get((idx, track_id))
+                if p is not None:
+                    face_emotions[track_id] = p
+            emotion = None
+            if face_emotions:
+                emotion = engine.emotion_detector.label(next(iter(face_emotions.values())))
+            results[idx] = AnalysisResult(faces_map[idx], track_ids_map[idx], emotion,
+                                          face_emotions, lease.timestamp, lease.seq)
+        return results
@@ -0,0 +1,100 @@
+import numpy as np
+
+from visionai.frame_context import as_context
+
+# Emotion results per face track. FERPlus only needs to run again when a
+# cached result expires (ttl) or the face visibly changed since it was scored:
+# landmarks moved relative to the box (smile, open mouth, head turn) or the
+# brightness histogram of the crop shifted. Scores are smoothed with an EMA so
+# a single noisy pass can't flip the label.
+
+
+def face_signature(frame, face, hist_bins=16):
+    """
+    Cheap descriptor of one face for change detection: landmarks in box units
+    and a normalized gray histogram of a 32x32 crop. face is a YuNet row in
+    `frame` (image or FrameContext) coordinates. Returns None if the box is
+    outside the frame.
+    """
+    x, y, w, h = face[:4]
+    if w <= 0 or h <= 0:
+        return None
+    landmarks = np.asarray(face[4:14], dtype=np.float32).copy()
+    landmarks[0::2] = (landmarks[0::2] - x) / w
+    landmarks[1::2] = (landmarks[1::2] - y) / h
+
+    crop = as_context(frame).crop(face, size=(32, 32), gray=True)
+    if crop is None:
+        return None
+    hist = np.bincount((crop // (256 // hist_bins)).ravel(), minlength=hist_bins).astype(np.float32)
+    return landmarks, hist / hist.sum()
+
+
+class EmotionCache:
+    def __init__(
+        self,
+        ttl=1.5,                  # Seconds a result stays valid for an unchanged face
+        ema_alpha=0.5,            # Weight of a new inference in the smoothed scores
+        landmark_threshold=0.06,  # Mean landmark shift (box units) that forces a refresh
+        hist_threshold=0.2,       # Histogram distance (0-1) that forces a refresh
+        forget_after=5.0          # Drop tracks not seen for this long
+    ):
+        self.ttl = ttl
+        self.ema_alpha = ema_alpha
+        self.landmark_threshold = landmark_threshold
+        self.hist_threshold = hist_threshold
+        self.forget_after = forget_after
+
+        # {(cam_idx, track_id): {"probs", "signature", "scored_at", "seen_at"}}
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def needs_refresh(self, key, signature, now):
+        """True if the face behind `key` should go through the emotion model again"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry["seen_at"] = now
+        if entry is None or now - entry["scored_at"] >= self.ttl:
+            return self._miss()
+        if signature is not None and entry["signature"] is not None:
+            landmarks, hist = signature
+            old_landmarks, old_hist = entry["signature"]
+            if float(np.abs(landmarks - old_landmarks).mean()) > self.landmark_threshold:
+                return self._miss()
+            if 0.5 * float(np.abs(hist - old_hist).sum()) > self.hist_threshold:
+                return self._miss()
+        self.hits += 1
+        return False
+
+    def _miss(self):
+        self.misses += 1
+        return True
+
+    def update(self, key, probs, signature, now):
+        """Blends a fresh inference into the track's scores"""
+        entry = self.entries.get(key)
+        if entry is None:
+            smoothed = np.asarray(probs, dtype=np.float32)
+        else:
+            smoothed = self.ema_alpha * probs + (1.0 - self.ema_alpha) * entry["probs"]
+        self.entries[key] = {"probs": smoothed, "signature": signature, "scored_at": now, "seen_at": now}
+
+    def get(self, key):
+        """Smoothed probabilities for a track, or None"""
+        entry = self.entries.get(key)
+        return None if entry is None else entry["probs"]
+
+    def drop_camera(self, cam_idx):
+        for key in [k for k in self.entries if k[0] == cam_idx]:
+            del self.entries[key]
+
+    def prune(self, now):
+        """Forgets tracks that haven't been seen for forget_after seconds"""
+        for key in [k for k, e in self.entries.items() if now - e["seen_at"] > self.forget_after]:
+            del self.entries[key]
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -3,14 +3,23 @@ import cv2
 import numpy as np
 import os
 
+from visionai.inference import resolve, apply_threads
+from visionai.frame_context import as_context
+
 class EmotionDetector:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend="default", target="cpu", threads=None):
+        # backend/target/threads: see visionai/inference.py
         if model_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             model_path = os.path.join(current_dir, "emotion_ferplus.onnx")
         
         self.net = cv2.dnn.readNetFromONNX(model_path)
+        backend_id, target_id = resolve(backend, target)
+        self.net.setPreferableBackend(backend_id)
+        self.net.setPreferableTarget(target_id)
+        self.threads = threads
         self.emotions = ['Neutral', 'Happy', 'Surprise', 'Sad', 'Angry', 'Disgust', 'Fear', 'Contempt']
+        self.batch_supported = True # Cleared if the model rejects batch sizes > 1
 
     def detect_emotion(self, frame, face_box):
         """
@@ -18,40 +27,65 @@ class EmotionDetector:
         face_box: [x, y, w, h] from face detector
         Returns: string (dominant emotion)
         """
-        x, y, w, h = map(int, face_box)
-        
-        # Padding to capture full face
-        h_img, w_img = frame.shape[:2]
-        x = max(0, x)
-        y = max(0, y)
-        w = min(w, w_img - x)
-        h = min(h, h_img - y)
-        
-        if w <= 0 or h <= 0:
+        return self.label(self.detect_emotions_batch([(frame, face_box)])[0])
+
+    def detect_emotions_batch(self, requests):
+        """
+        requests: list of (frame or FrameContext, face_box), faces may come
+        from different frames/cameras. All crops go through the network in one forward pass.
+        Returns: list of [8] probability vectors (order of self.emotions),
+        None where the box lies outside its frame.
+        """
+        crops = [self._preprocess(frame, box) for frame, box in requests]
+        valid = [c for c in crops if c is not None]
+        probs = iter(self.predict_batch(valid))
+        return [next(probs) if c is not None else None for c in crops]
+
+    def predict_batch(self, crops):
+        """crops: list of 64x64 grayscale faces -> [N, 8] probabilities"""
+        if not crops:
+            return np.zeros((0, len(self.emotions)), dtype=np.float32)
+
+        apply_threads(self.threads)
+        if self.batch_supported:
+            blob = cv2.dnn.blobFromImages(crops, 1.0, (64, 64), (0, 0, 0), swapRB=False, crop=False)
+            self.net.setInput(blob)
+            try:
+                scores = self.net.forward()
+                if scores.shape[0] == len(crops):
+                    return self._softmax(scores.reshape(len(crops), -1))
+            except cv2.error:
+                pass
+            # Model exported with a fixed batch size of 1: one forward per face from now on
+            print("⚠️ Emotion model does not support batching, falling back to per-face inference")
+            self.batch_supported = False
+
+        scores = []
+        for crop in crops:
+            self.net.setInput(cv2.dnn.blobFromImage(crop, 1.0, (64, 64), (0, 0, 0), swapRB=False, crop=False))
+            scores.append(self.net.forward().reshape(-1))
+        return self._softmax(np.array(scores))
+
+    def warmup(self, batch_size=2):
+        """
+        Runs the model on blank faces so the first live pass isn't the slow one.
+        A batch > 1 also finds out right away whether the model supports batching.
+        """
+        self.predict_batch([np.zeros((64, 64), dtype=np.uint8)] * batch_size)
+
+    def label(self, probs):
+        """Dominant emotion of a probability vector"""
+        if probs is None:
             return "Unknown"
-            
-        face_img = frame[y:y+h, x:x+w]
-        
-        # Preprocessing for FERPlus
-        # 1. Grayscale
-        if len(face_img.shape) == 3:
-            gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = face_img
-            
-        # 2. Resize to 64x64
-        resized = cv2.resize(gray, (64, 64))
-        
-        # 3. Blob (normalization)
-        # FERPlus often expects 0-255 inputs or generic normalization
-        # Let's try standard blobFromImage.
-        blob = cv2.dnn.blobFromImage(resized, 1.0, (64, 64), (0, 0, 0), swapRB=False, crop=False)
-        
-        self.net.setInput(blob)
-        scores = self.net.forward()
-        
-        # Softmax to get probabilities (optional, but argmax is enough)
-        # scores is [1, 8]
-        
-        idx = np.argmax(scores[0])
-        return self.emotions[idx]
+        return self.emotions[int(np.argmax(probs))]
+
+    @staticmethod
+    def _softmax(scores):
+        scores = scores - scores.max(axis=1, keepdims=True)
+        e = np.exp(scores)
+        return (e / e.sum(axis=1, keepdims=True)).astype(np.float32)
+
+    def _preprocess(self, frame, face_box):
+        """64x64 grayscale crop of the face (FERPlus input), or None if it's outside the frame"""
+        # Normalization happens in blobFromImage(s)
+        return as_context(frame).crop(face_box, size=(64, 64), gray=True)
@@ -1,35 +1,173 @@
 import cv2
 import numpy as np
 import os
+import threading
+import concurrent.futures
+
+from visionai.inference import resolve, apply_threads
+
+def make_analysis_frame(frame, long_side=None):
+    """
+    Downscales frame so its longer side is at most long_side pixels (never upscales).
+    Returns (analysis_frame, scale) where scale = analysis / original.
+    """
+    h, w = frame.shape[:2]
+    if not long_side or max(h, w) <= long_side:
+        return frame, 1.0
+    scale = long_side / float(max(h, w))
+    small = cv2.resize(frame, (max(1, int(round(w * scale))), max(1, int(round(h * scale)))), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+def scale_faces(faces, factor):
+    """Scales YuNet rows (box + 5 landmarks, score untouched) by factor."""
+    if faces is None or factor == 1.0:
+        return faces
+    scaled = faces.copy()
+    scaled[:, :14] *= factor
+    return scaled
+
+def merge_rects(rects):
+    """Unions overlapping (x1, y1, x2, y2) rects until none overlap."""
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        while rects:
+            r = rects.pop()
+            for o in rects:
+                if r[0] < o[2] and o[0] < r[2] and r[1] < o[3] and o[1] < r[3]:
+                    o[0], o[1] = min(o[0], r[0]), min(o[1], r[1])
+                    o[2], o[3] = max(o[2], r[2]), max(o[3], r[3])
+                    merged = True
+                    break
+            else:
+                out.append(r)
+        rects = out
+    return rects
+
+def nms_faces(faces, score_threshold, nms_threshold):
+    """Drops duplicate YuNet rows (e.g. the same face found in two crops)."""
+    if faces is None or len(faces) <= 1:
+        return faces
+    keep = cv2.dnn.NMSBoxes(faces[:, :4].tolist(), faces[:, 14].tolist(), score_threshold, nms_threshold)
+    keep = np.array(keep).reshape(-1)
+    return faces[keep] if len(keep) else None
 
 class FaceDetector:
-    def __init__(self, model_path=None, score_threshold=0.6, nms_threshold=0.3):
+    def __init__(self, model_path=None, score_threshold=0.6, nms_threshold=0.3,
+                 backend="default", target="cpu", threads=None):
+        # backend/target/threads: see visionai/inference.py
         if model_path is None:
             # Default to the file in the same directory
             current_dir = os.path.dirname(os.path.abspath(__file__))
             model_path = os.path.join(current_dir, "face_detection_yunet_2023mar.onnx")
         
+        backend_id, target_id = resolve(backend, target)
         self.detector = cv2.FaceDetectorYN.create(
             model=model_path,
             config="",
             input_size=(320, 320),
             score_threshold=score_threshold,
             nms_threshold=nms_threshold,
-            top_k=5000
+            top_k=5000,
+            backend_id=backend_id,
+            target_id=target_id
         )
+        self.threads = threads
+        self.score_threshold = score_threshold
+        self.nms_threshold = nms_threshold
         self.input_size_set = False
         self.last_input_size = None
 
-    def detect(self, frame):
+    def detect(self, frame, analysis_size=None, rois=None, roi_padding=0.6, tiles=None):
+        """
+        Returns YuNet rows [x, y, w, h, 5 landmark (x, y) pairs, score] or None.
+        analysis_size: run on a copy downscaled to this long side and map the
+        results back to frame coordinates (None = full resolution).
+        rois: optional [x, y, w, h] boxes (frame coordinates, e.g. tracked
+        faces) to restrict detection to; see detect_rois.
+        tiles: optional (x1, y1, x2, y2) tiles (frame coordinates, see
+        visionai/tiling.py) to scan instead of the whole frame; rois are
+        scanned as well.
+        """
+        if analysis_size:
+            small, scale = make_analysis_frame(frame, analysis_size)
+            if scale != 1.0:
+                small_rois = None if rois is None else np.asarray(rois, dtype=np.float32)[:, :4] * scale
+                small_tiles = None if tiles is None else [tuple(int(v * scale) for v in t) for t in tiles]
+                return scale_faces(self.detect(small, rois=small_rois, roi_padding=roi_padding, tiles=small_tiles), 1.0 / scale)
+        
+        if tiles is not None and len(tiles) > 0:
+            return self.detect_tiles(frame, tiles, rois, roi_padding)
+        if rois is not None and len(rois) > 0:
+            return self.detect_rois(frame, rois, roi_padding)
+        
         h, w, _ = frame.shape
         # Input size needs to be set once or if dimensions change. 
         if self.last_input_size != (w, h):
             self.detector.setInputSize((w, h))
             self.last_input_size = (w, h)
         
+        apply_threads(self.threads)
         _, faces = self.detector.detect(frame)
         return faces
 
+    def warmup(self, shape=(240, 320, 3)):
+        """
+        One detection on a blank frame of `shape` (use the real analysis frame
+        shape), so graph setup and buffer allocation don't hit the first live frame.
+        """
+        self.detect(np.zeros(shape, dtype=np.uint8))
+
+    def detect_rois(self, frame, rois, padding=0.6):
+        """
+        ROI mode: runs YuNet only on crops around the given boxes, each padded
+        by `padding` x its size on every side (overlapping crops are merged).
+        Results come back in full-frame coordinates. Faces outside every ROI
+        are NOT found, so callers should still do a full sweep now and then.
+        """
+        return self._detect_regions(frame, merge_rects(self._roi_rects(frame, rois, padding)))
+
+    def detect_tiles(self, frame, tiles, rois=None, padding=0.6):
+        """
+        Tiled mode: runs YuNet on each (x1, y1, x2, y2) tile at the frame's own
+        resolution, plus padded crops around `rois` (so tracked faces outside
+        this pass's tiles aren't lost). Results are NMS-merged across
+        overlapping tiles, in full-frame coordinates.
+        """
+        rects = list(tiles)
+        if rois is not None and len(rois) > 0:
+            rects += merge_rects(self._roi_rects(frame, rois, padding))
+        return self._detect_regions(frame, rects)
+
+    @staticmethod
+    def _roi_rects(frame, rois, padding):
+        h_img, w_img = frame.shape[:2]
+        rects = []
+        for x, y, w, h in np.asarray(rois, dtype=np.float32)[:, :4]:
+            pad_w, pad_h = w * padding, h * padding
+            x1, y1 = max(0, int(x - pad_w)), max(0, int(y - pad_h))
+            x2, y2 = min(w_img, int(x + w + pad_w)), min(h_img, int(y + h + pad_h))
+            if x2 - x1 >= 16 and y2 - y1 >= 16:
+                rects.append((x1, y1, x2, y2))
+        return rects
+
+    def _detect_regions(self, frame, rects):
+        """Detects in each (x1, y1, x2, y2) region and merges the results"""
+        found = []
+        for x1, y1, x2, y2 in rects:
+            faces = self.detect(frame[y1:y2, x1:x2])
+            if faces is not None:
+                faces = faces.copy()
+                faces[:, [0, 4, 6, 8, 10, 12]] += x1 # x and landmark x's (w, h stay)
+                faces[:, [1, 5, 7, 9, 11, 13]] += y1
+                found.append(faces)
+
+        if not found:
+            return None
+        return nms_faces(np.concatenate(found), self.score_threshold, self.nms_threshold)
+
     def draw(self, frame, faces):
         if faces is not None:
             for face in faces:
@@ -46,3 +184,78 @@ class FaceDetector:
                 #     k = 4 + 2 * i
                 #     cv2.circle(frame, (int(face[k]), int(face[k+1])), 2, (0, 0, 255), -1)
         return frame
+
+class FaceDetectorPool:
+    """
+    Runs detection for several frames at once on a thread pool. OpenCV's DNN
+    forward releases the GIL, so cameras are processed in parallel.
+    FaceDetectorYN isn't thread-safe, so each worker thread owns its own instance.
+    """
+    def __init__(self, workers=None, **detector_kwargs):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.detector_kwargs = detector_kwargs
+        self.local = threading.local()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="face-detect"
+        )
+
+    def _worker_detector(self):
+        detector = getattr(self.local, "detector", None)
+        if detector is None:
+            detector = FaceDetector(**self.detector_kwargs)
+            self.local.detector = detector
+        return detector
+
+    def _detect(self, frame, kwargs):
+        return self._worker_detector().detect(frame, **kwargs)
+
+    def submit(self, frame, **kwargs):
+        """Returns a Future resolving to the same result as FaceDetector.detect"""
+        return self.executor.submit(self._detect, frame, kwargs)
+
+    def detect_many(self, frames, timeout=None, options=None, **kwargs):
+        """
+        frames: {key: frame}. Waits at most `timeout` seconds for all of them.
+        options: optional {key: detect() kwargs} for per-frame settings (e.g. rois).
+        Returns (results, pending): results {key: faces} for the ones that made
+        it, pending {key: Future} for the ones still running (not cancelled,
+        their results are simply not waited for).
+        """
+        options = options or {}
+        futures = {key: self.submit(frame, **{**kwargs, **options.get(key, {})}) for key, frame in frames.items()}
+        done, _ = concurrent.futures.wait(futures.values(), timeout=timeout)
+
+        results = {}
+        pending = {}
+        for key, future in futures.items():
+            if future in done:
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    print(f"Face detection failed for {key}: {e}")
+                    results[key] = None
+            else:
+                pending[key] = future
+        return results, pending
+
+    def warmup(self, shapes=((240, 320, 3),), timeout=30.0):
+        """Creates and warms up every worker's detector for each frame shape"""
+        # The barrier holds each task until all workers have one, so every
+        # thread of the executor gets its own detector warmed
+        barrier = threading.Barrier(self.workers)
+
+        def warm():
+            try:
+                barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                pass
+            detector = self._worker_detector()
+            for shape in shapes:
+                detector.warmup(shape)
+
+        futures = [self.executor.submit(warm) for _ in range(self.workers)]
+        concurrent.futures.wait(futures, timeout=timeout)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,86 @@
+import cv2
+
+# Derived images of one frame, computed on first use and shared by every
+# consumer (motion gate, detector, emotion model, signatures). Downscaled
+# levels are built from the nearest larger level that already exists, so e.g.
+# the motion thumbnail comes from the 320 px analysis copy, not the 1080p frame.
+
+
+class FrameContext:
+    def __init__(self, frame, timestamp=None, seq=None):
+        self.frame = frame          # BGR (or gray) image, not modified
+        self.timestamp = timestamp
+        self.seq = seq
+        self._gray = None
+        self._levels = {}           # {long_side: (FrameContext, scale relative to this frame)}
+        self._crops = {}            # {(x1, y1, x2, y2, size, gray): image or None}
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    def gray(self):
+        """Grayscale version of the frame"""
+        if self._gray is None:
+            if self.frame.ndim == 3:
+                self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+            else:
+                self._gray = self.frame
+        return self._gray
+
+    def resized(self, long_side):
+        """
+        Same as face_detect.make_analysis_frame, but returns a FrameContext
+        (so its gray image and crops are memoized too) and its scale.
+        """
+        h, w = self.frame.shape[:2]
+        if not long_side or max(h, w) <= long_side:
+            return self, 1.0
+        level = self._levels.get(long_side)
+        if level is not None:
+            return level
+
+        scale = long_side / float(max(h, w))
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        # Pyramid: shrink the smallest existing level that is still big enough
+        source = self.frame
+        for side, (ctx, _) in self._levels.items():
+            if side >= long_side and ctx.frame.shape[1] < source.shape[1]:
+                source = ctx.frame
+        small = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+        level = (FrameContext(small, self.timestamp, self.seq), scale)
+        self._levels[long_side] = level
+        return level
+
+    def crop(self, box, size=None, gray=False):
+        """
+        The [x, y, w, h] box clipped to the frame, optionally resized to
+        `size` (w, h) and/or grayscale. None if the box is outside the frame.
+        Unresized crops are views, don't write to them.
+        """
+        x, y, w, h = box[:4]
+        h_img, w_img = self.frame.shape[:2]
+        x1, y1 = max(0, int(x)), max(0, int(y))
+        x2, y2 = min(w_img, int(x + w)), min(h_img, int(y + h))
+        key = (x1, y1, x2, y2, size, gray)
+        if key in self._crops:
+            return self._crops[key]
+
+        crop = None
+        if size is not None:
+            # Resized crops of the same box share the full-size one
+            base = self.crop((x1, y1, x2 - x1, y2 - y1), gray=gray)
+            crop = None if base is None else cv2.resize(base, size)
+        elif x2 > x1 and y2 > y1:
+            if gray and self._gray is None and self.frame.ndim == 3:
+                # Convert just the crop rather than the whole frame
+                crop = cv2.cvtColor(self.frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+            else:
+                crop = (self.gray() if gray else self.frame)[y1:y2, x1:x2]
+        self._crops[key] = crop
+        return crop
+
+
+def as_context(frame):
+    """Wraps a plain image; FrameContexts pass through"""
+    return frame if isinstance(frame, FrameContext) else FrameContext(frame)
@@ -0,0 +1,52 @@
+import cv2
+
+# OpenCV DNN settings shared by the face and emotion models.
+# Backend/target names map to OpenCV ids. Threads is the cv2.setNumThreads
+# budget a model's forward pass runs with (None = leave OpenCV's default).
+# The setting is process-wide in OpenCV, so each model applies its own budget
+# right before its forward; the analysis stage runs detection and emotion
+# one after the other, so the budgets don't fight over it.
+
+BACKENDS = {
+    "default": cv2.dnn.DNN_BACKEND_DEFAULT,
+    "opencv": cv2.dnn.DNN_BACKEND_OPENCV,
+    "openvino": cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE,
+}
+
+TARGETS = {
+    "cpu": cv2.dnn.DNN_TARGET_CPU,
+    "cpu_fp16": cv2.dnn.DNN_TARGET_CPU_FP16,
+    "opencl": cv2.dnn.DNN_TARGET_OPENCL,
+    "opencl_fp16": cv2.dnn.DNN_TARGET_OPENCL_FP16,
+}
+
+
+def resolve(backend="default", target="cpu"):
+    """Returns (backend_id, target_id) for the given names."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown DNN backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if target not in TARGETS:
+        raise ValueError(f"Unknown DNN target '{target}' (expected one of {', '.join(TARGETS)})")
+    return BACKENDS[backend], TARGETS[target]
+
+
+def apply_threads(threads):
+    """Sets OpenCV's thread budget for the next forward pass (None = unchanged)."""
+    if threads is not None and cv2.getNumThreads() != threads:
+        cv2.setNumThreads(threads)
+
+
+def available_configs():
+    """(backend, target) name pairs this OpenCV build can run."""
+    configs = []
+    for backend_name, backend_id in BACKENDS.items():
+        if backend_name == "default":
+            continue # Same as whatever OpenCV picks; listed separately below
+        try:
+            target_ids = set(cv2.dnn.getAvailableTargets(backend_id))
+        except cv2.error:
+            continue
+        for target_name, target_id in TARGETS.items():
+            if target_id in target_ids:
+                configs.append((backend_name, target_name))
+    return [("default", "cpu")] + configs
@@ -0,0 +1,57 @@
+import cv2
+
+from visionai.frame_context import as_context
+
+# Cheap per-camera "did anything change?" check that runs before the detector.
+# Podcast cameras are mostly static, so when almost no pixel of a tiny grayscale
+# thumbnail changed (beyond sensor noise) since the frame we last analysed, the
+# previous faces and emotions are reused instead of paying for YuNet / FERPlus again.
+
+
+class MotionGate:
+    def __init__(
+        self,
+        threshold=0.01,   # Fraction of thumbnail pixels that must change to count as motion
+        pixel_threshold=8, # Gray-level difference (0-255) above which a pixel changed (sensor noise stays below)
+        max_age=1.0,      # Seconds after which we analyse anyway, moving or not
+        thumb_size=64     # Long side of the thumbnail the difference is measured on
+    ):
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.max_age = max_age
+        self.thumb_size = thumb_size
+
+        self.reference = None       # Thumbnail of the last analysed frame
+        self.reference_time = None
+        self.energy = 0.0           # Changed fraction measured by the last check()
+        self.checks = 0
+        self.skips = 0
+
+    def check(self, frame, timestamp):
+        """
+        Returns True if `frame` should be analysed (it moved, the last analysis
+        is older than max_age, or there is none yet); the frame then becomes the
+        new reference. False means the previous results are still good.
+        frame: image or FrameContext (the thumbnail is then shared/reused).
+        """
+        self.checks += 1
+        thumb = as_context(frame).resized(self.thumb_size)[0].gray()
+
+        stale = self.reference is None or self.reference.shape != thumb.shape
+        if not stale:
+            diff = cv2.absdiff(thumb, self.reference)
+            self.energy = float((diff > self.pixel_threshold).mean())
+            stale = self.energy > self.threshold or timestamp - self.reference_time >= self.max_age
+
+        if stale:
+            self.reference = thumb
+            self.reference_time = timestamp
+            return True
+
+        self.skips += 1
+        return False
+
+    @property
+    def hit_rate(self):
+        """Fraction of checks that skipped inference"""
+        return self.skips / self.checks if self.checks else 0.0
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Tiled detection for wide / high-resolution cameras. Downscaling a 4K room
+# shot to 320 px turns faces into a few pixels YuNet can't see, while running
+# it on the whole frame every tick is too slow. Instead the frame is cut into
+# overlapping tiles that are scanned at (near) native resolution, a few per
+# pass: tiles that recently held faces come up more often, the rest in turn.
+
+
+def make_tiles(width, height, tile_size=640, overlap=0.25):
+    """Overlapping (x1, y1, x2, y2) tiles covering a width x height frame"""
+    step = max(1, int(tile_size * (1.0 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size) # Last tile flush with the edge
+        return positions
+
+    return [(x, y, min(width, x + tile_size), min(height, y + tile_size))
+            for y in starts(height) for x in starts(width)]
+
+
+class TileScheduler:
+    """Per-camera choice of which tiles to scan on each detector pass."""
+
+    def __init__(
+        self,
+        tile_size=640,       # Tile side in pixels of the frame being tiled
+        overlap=0.25,        # Fraction of a tile shared with its neighbour (faces on seams)
+        tiles_per_pass=2,    # Tiles scanned per detector pass
+        heat_decay=0.7,      # Per pass; a tile that held a face stays "hot" for a few passes
+        hot_weight=3.0       # How much heat outweighs time since the last scan
+    ):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.tiles_per_pass = tiles_per_pass
+        self.heat_decay = heat_decay
+        self.hot_weight = hot_weight
+
+        self.shape = None
+        self.tiles = []
+        self.heat = np.zeros((0,))             # Recent face activity per tile (0-1)
+        self.since_scan = np.zeros((0,))       # Passes since each tile was last scanned
+        self.last_selected = []
+
+    def _layout(self, shape):
+        h, w = shape[:2]
+        self.shape = shape[:2]
+        self.tiles = make_tiles(w, h, self.tile_size, self.overlap)
+        self.heat = np.zeros(len(self.tiles))
+        # Unscanned tiles start "overdue" so the first passes sweep the frame
+        self.since_scan = np.full(len(self.tiles), float(len(self.tiles)))
+
+    def select(self, shape):
+        """Tiles (x1, y1, x2, y2) to scan on this pass for a frame of `shape`"""
+        if self.shape != shape[:2]:
+            self._layout(shape)
+        priority = self.hot_weight * self.heat + self.since_scan / max(1, len(self.tiles))
+        order = np.argsort(-priority, kind="stable")
+        chosen = order[:self.tiles_per_pass]
+        self.since_scan += 1
+        self.since_scan[chosen] = 0
+        self.last_selected = [self.tiles[i] for i in chosen]
+        return self.last_selected
+
+    def report(self, faces):
+        """Updates the heat map with this pass's faces (rows in the tiled frame's coordinates)"""
+        if not len(self.tiles):
+            return
+        self.heat *= self.heat_decay
+        if faces is None or not len(faces):
+            return
+        tiles = np.asarray(self.tiles, dtype=np.float32)
+        cx = faces[:, 0] + faces[:, 2] / 2
+        cy = faces[:, 1] + faces[:, 3] / 2
+        inside = ((cx[None, :] >= tiles[:, 0:1]) & (cx[None, :] < tiles[:, 2:3]) &
+                  (cy[None, :] >= tiles[:, 1:2]) & (cy[None, :] < tiles[:, 3:4]))
+        self.heat[inside.any(axis=1)] = 1.0
@@ -0,0 +1,251 @@
+import numpy as np
+
+# Lightweight per-camera face tracker.
+# Each face is a constant-velocity Kalman filter on its box (cx, cy, w, h) with
+# landmarks stored relative to the box, so between YuNet passes we can predict
+# where every face is and keep zoom/pan targets moving smoothly. Tracks get
+# stable IDs, and a confidence that decays while we only predict; the engine
+# asks needs_detection() to decide when a real detector pass is worth it.
+
+STATE_DIM = 8  # cx, cy, w, h, vcx, vcy, vw, vh
+MEAS_DIM = 4
+
+
+def box_iou(a, b):
+    """IoU matrix between [N, 4] and [M, 4] arrays of (x, y, w, h)"""
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+    iw = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    ih = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = iw * ih
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class FaceTracker:
+    def __init__(
+        self,
+        detect_every=10,       # Force a detector pass at least every N frames
+        search_every=2,        # Cadence while nothing is tracked (look for newcomers)
+        min_confidence=0.5,    # Re-detect as soon as any track drops below this
+        confidence_decay=0.9,  # Per predicted-only frame
+        iou_threshold=0.3,     # Detection <-> track association
+        max_misses=3,          # Detector passes a track may miss before it's dropped
+        process_noise=50.0,    # Acceleration noise (px / s^2)
+        measurement_noise=4.0  # Detector jitter (px)
+    ):
+        self.detect_every = detect_every
+        self.search_every = search_every
+        self.min_confidence = min_confidence
+        self.confidence_decay = confidence_decay
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+        self.next_id = 1
+        self.ids = np.zeros((0,), dtype=np.int64)
+        self.x = np.zeros((0, STATE_DIM))              # Kalman states
+        self.P = np.zeros((0, STATE_DIM, STATE_DIM))   # Covariances
+        self.landmarks = np.zeros((0, 10))             # Landmarks relative to box, in box units
+        self.scores = np.zeros((0,))                   # Last detector score
+        self.misses = np.zeros((0,), dtype=np.int64)
+        self.hits = np.zeros((0,), dtype=np.int64)     # Detector passes that confirmed the track
+        self.predicted_frames = np.zeros((0,), dtype=np.int64)
+
+        self.last_timestamp = None
+        self.frames_since_detection = 0
+        self.H = np.hstack([np.eye(MEAS_DIM), np.zeros((MEAS_DIM, MEAS_DIM))])
+
+    # --- Kalman ---
+
+    def predict(self, timestamp):
+        """Advances all tracks to `timestamp` (seconds, same clock as frame timestamps)"""
+        dt = 0.0 if self.last_timestamp is None else max(0.0, timestamp - self.last_timestamp)
+        self.last_timestamp = timestamp
+        self.frames_since_detection += 1
+        if not len(self.ids) or dt == 0.0:
+            return
+
+        F = np.eye(STATE_DIM)
+        F[:MEAS_DIM, MEAS_DIM:] = np.eye(MEAS_DIM) * dt
+        # Discrete white-noise acceleration model
+        q = self.process_noise ** 2
+        Q = np.zeros((STATE_DIM, STATE_DIM))
+        Q[:MEAS_DIM, :MEAS_DIM] = np.eye(MEAS_DIM) * (dt ** 4) / 4 * q
+        Q[:MEAS_DIM, MEAS_DIM:] = np.eye(MEAS_DIM) * (dt ** 3) / 2 * q
+        Q[MEAS_DIM:, :MEAS_DIM] = np.eye(MEAS_DIM) * (dt ** 3) / 2 * q
+        Q[MEAS_DIM:, MEAS_DIM:] = np.eye(MEAS_DIM) * (dt ** 2) * q
+
+        self.x = self.x @ F.T
+        self.P = F @ self.P @ F.T + Q
+        # Keep sizes sane if a velocity estimate runs away
+        self.x[:, 2:4] = np.maximum(self.x[:, 2:4], 4.0)
+        self.predicted_frames += 1
+
+    def _correct(self, rows, z):
+        R = np.eye(MEAS_DIM) * self.measurement_noise ** 2
+        P = self.P[rows]
+        S = self.H @ P @ self.H.T + R
+        K = P @ self.H.T @ np.linalg.inv(S)
+        innovation = z - self.x[rows] @ self.H.T
+        self.x[rows] = self.x[rows] + np.einsum("nij,nj->ni", K, innovation)
+        self.P[rows] = (np.eye(STATE_DIM) - K @ self.H) @ P
+
+    # --- Detection updates ---
+
+    def update(self, faces, timestamp=None):
+        """
+        Feeds a full detector result (YuNet rows in frame coordinates, or None).
+        Call predict() for the same frame first.
+        """
+        if timestamp is not None and self.last_timestamp is None:
+            self.last_timestamp = timestamp
+        self.frames_since_detection = 0
+
+        if faces is None or len(faces) == 0:
+            dets = np.zeros((0, 15), dtype=np.float64)
+        else:
+            dets = np.asarray(faces, dtype=np.float64)
+
+        boxes = self.boxes()
+        matched_tracks = np.zeros(len(self.ids), dtype=bool)
+        matched_dets = np.zeros(len(dets), dtype=bool)
+
+        if len(boxes) and len(dets):
+            iou = box_iou(boxes, dets[:, :4])
+            # Greedy association, best pairs first
+            order = np.dstack(np.unravel_index(np.argsort(-iou, axis=None), iou.shape))[0]
+            pairs = []
+            for t, d in order:
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if matched_tracks[t] or matched_dets[d]:
+                    continue
+                matched_tracks[t] = True
+                matched_dets[d] = True
+                pairs.append((t, d))
+
+            if pairs:
+                rows = np.array([p[0] for p in pairs])
+                cols = np.array([p[1] for p in pairs])
+                self._correct(rows, self._measurement(dets[cols]))
+                self.landmarks[rows] = self._relative_landmarks(dets[cols])
+                self.scores[rows] = dets[cols, 14]
+                self.misses[rows] = 0
+                self.hits[rows] += 1
+                self.predicted_frames[rows] = 0
+
+        # Tracks the detector didn't confirm
+        self.misses[~matched_tracks] += 1
+        keep = self.misses <= self.max_misses
+        self._select(keep)
+
+        # Newcomers
+        new = dets[~matched_dets]
+        if len(new):
+            n = len(new)
+            x = np.zeros((n, STATE_DIM))
+            x[:, :MEAS_DIM] = self._measurement(new)
+            P = np.tile(np.diag([self.measurement_noise ** 2] * MEAS_DIM + [100.0 ** 2] * MEAS_DIM), (n, 1, 1))
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + n)])
+            self.next_id += n
+            self.x = np.concatenate([self.x, x])
+            self.P = np.concatenate([self.P, P])
+            self.landmarks = np.concatenate([self.landmarks, self._relative_landmarks(new)])
+            self.scores = np.concatenate([self.scores, new[:, 14]])
+            self.misses = np.concatenate([self.misses, np.zeros(n, dtype=np.int64)])
+            self.hits = np.concatenate([self.hits, np.ones(n, dtype=np.int64)])
+            self.predicted_frames = np.concatenate([self.predicted_frames, np.zeros(n, dtype=np.int64)])
+
+    def hold(self):
+        """
+        The scene didn't change (see visionai.motion): pin every track where it
+        is, as if the detector had confirmed its predicted box.
+        """
+        self.frames_since_detection = 0
+        if not len(self.ids):
+            return
+        rows = np.arange(len(self.ids))
+        self.x[:, MEAS_DIM:] = 0.0
+        self._correct(rows, self.x[:, :MEAS_DIM].copy())
+        self.predicted_frames[:] = 0
+
+    def _select(self, mask):
+        self.ids = self.ids[mask]
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+        self.landmarks = self.landmarks[mask]
+        self.scores = self.scores[mask]
+        self.misses = self.misses[mask]
+        self.hits = self.hits[mask]
+        self.predicted_frames = self.predicted_frames[mask]
+
+    @staticmethod
+    def _measurement(dets):
+        return np.stack([
+            dets[:, 0] + dets[:, 2] / 2,
+            dets[:, 1] + dets[:, 3] / 2,
+            dets[:, 2],
+            dets[:, 3],
+        ], axis=1)
+
+    @staticmethod
+    def _relative_landmarks(dets):
+        cx = dets[:, 0] + dets[:, 2] / 2
+        cy = dets[:, 1] + dets[:, 3] / 2
+        w = np.maximum(dets[:, 2], 1e-6)
+        h = np.maximum(dets[:, 3], 1e-6)
+        rel = dets[:, 4:14].copy()
+        rel[:, 0::2] = (rel[:, 0::2] - cx[:, None]) / w[:, None]
+        rel[:, 1::2] = (rel[:, 1::2] - cy[:, None]) / h[:, None]
+        return rel
+
+    # --- Outputs ---
+
+    def boxes(self):
+        """Predicted (x, y, w, h) per track"""
+        cx, cy, w, h = self.x[:, 0], self.x[:, 1], self.x[:, 2], self.x[:, 3]
+        return np.stack([cx - w / 2, cy - h / 2, w, h], axis=1) if len(self.ids) else np.zeros((0, 4))
+
+    def confidence(self):
+        """Per-track confidence: detector score, decayed while coasting and for fast motion"""
+        if not len(self.ids):
+            return np.zeros((0,))
+        conf = self.scores * self.confidence_decay ** self.predicted_frames
+        # Uncertainty of the predicted center relative to the face size
+        sigma = np.sqrt(self.P[:, 0, 0] + self.P[:, 1, 1]) / np.maximum(self.x[:, 2], 1.0)
+        return conf / (1.0 + sigma)
+
+    def is_stable(self, min_hits):
+        """True if there are tracks and every one was confirmed by >= min_hits detector passes in a row"""
+        return bool(len(self.ids)) and bool(np.all(self.misses == 0)) and bool(np.all(self.hits >= min_hits))
+
+    def needs_detection(self):
+        if not len(self.ids):
+            return self.frames_since_detection >= self.search_every
+        if self.frames_since_detection >= self.detect_every:
+            return True
+        return bool(np.min(self.confidence()) < self.min_confidence)
+
+    def faces(self):
+        """
+        Visible tracks as YuNet-style rows [x, y, w, h, landmarks..., score]
+        (score = track confidence) or None, plus their track IDs.
+        Tracks that missed the last detector pass are kept for re-association
+        but not reported.
+        """
+        visible = self.misses == 0
+        if not np.any(visible):
+            return None, []
+        boxes = self.boxes()[visible]
+        x = self.x[visible]
+        rel = self.landmarks[visible]
+        rows = np.zeros((len(boxes), 15), dtype=np.float32)
+        rows[:, :4] = boxes
+        rows[:, 4:14:2] = x[:, 0:1] + rel[:, 0::2] * x[:, 2:3]
+        rows[:, 5:14:2] = x[:, 1:2] + rel[:, 1::2] * x[:, 3:4]
+        rows[:, 14] = self.confidence()[visible]
+        return rows, self.ids[visible].tolist()